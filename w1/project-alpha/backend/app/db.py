@@ -1,3 +1,7 @@
+import time
+
+from fastapi import Request
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -13,7 +17,90 @@ SessionLocal = async_sessionmaker(
     bind=engine, expire_on_commit=False, class_=AsyncSession
 )
 
+# 可选只读副本：未配置 READ_DATABASE_URL 时读写都走主库
+read_engine = (
+    create_async_engine(settings.read_database_url, echo=False, future=True)
+    if settings.read_database_url
+    else engine
+)
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine, expire_on_commit=False, class_=AsyncSession
+)
+
+
+def replica_enabled() -> bool:
+    return read_engine is not engine
+
+
+class PrimaryPins:
+    """read-your-writes：客户端写入后的一小段时间内，其读请求固定走主库
+
+    仅在本进程内生效；多 worker 部署时依赖负载均衡的会话保持。
+    """
+
+    def __init__(self) -> None:
+        self._until: dict[str, float] = {}
+
+    def pin(self, client_key: str, seconds: float) -> None:
+        now = time.monotonic()
+        self._until[client_key] = now + seconds
+        # 顺带清理过期记录，避免字典无限增长
+        if len(self._until) > 1024:
+            self._until = {k: v for k, v in self._until.items() if v > now}
+
+    def is_pinned(self, client_key: str) -> bool:
+        until = self._until.get(client_key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._until.pop(client_key, None)
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._until.clear()
+
+
+primary_pins = PrimaryPins()
+
+
+def client_key(request: Request) -> str:
+    explicit = request.headers.get("x-client-id")
+    if explicit:
+        return explicit
+    return request.client.host if request.client else "unknown"
+
 
 async def get_session() -> AsyncSession:
     async with SessionLocal() as session:
         yield session
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    factory = ReadSessionLocal
+    if not replica_enabled() or primary_pins.is_pinned(client_key(request)):
+        factory = SessionLocal
+    async with factory() as session:
+        yield session
+
+
+async def replica_lag_seconds() -> float | None:
+    """只读副本的回放延迟（秒）；未配置副本或非 Postgres 时返回 None"""
+    if not replica_enabled() or read_engine.dialect.name != "postgresql":
+        return None
+    async with read_engine.connect() as conn:
+        # 已回放到接收位点时视为无延迟，避免主库空闲时 replay 时间戳持续变旧
+        lag = await conn.scalar(
+            text(
+                "SELECT CASE "
+                "WHEN NOT pg_is_in_recovery() THEN 0 "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+                "END"
+            )
+        )
+    return round(float(lag or 0), 3)
+
+
+def dialect_name(session: AsyncSession) -> str:
+    return session.bind.dialect.name
@@ -0,0 +1,119 @@
+"""按请求统计 SQL：条数、数据库耗时与重复语句形态（N+1 检测）
+
+- 引擎上注册 before/after_cursor_execute 钩子，统计写入当前请求的 QueryStats
+- QueryStats 通过 contextvar 传递；SQLAlchemy 的 greenlet 会继承调用方上下文
+- 中间件把结果写入 Server-Timing 响应头与请求日志
+- 路由可通过 query_budget(n) 声明 SQL 条数预算，超出时记录告警；
+  QUERY_BUDGET_ENFORCED=true（测试环境）下直接抛出 QueryBudgetExceeded
+"""
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_LITERAL_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|:\w+|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def statement_shape(statement: str) -> str:
+    """把 SQL 归一化为语句形态：字面量与绑定参数替换为 ?，IN 列表折叠"""
+    shape = statement
+    for pattern, replacement in _LITERAL_PATTERNS:
+        shape = pattern.sub(replacement, shape)
+    return shape.strip()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    budget: int | None = None
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """同一形态执行次数达到阈值的语句（疑似 N+1）"""
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.2f};desc="{self.count} queries"'
+
+
+class QueryBudgetExceeded(AssertionError):
+    """测试模式下路由执行的 SQL 条数超出预算"""
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+def begin_request() -> tuple[QueryStats, object]:
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token) -> None:
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+def _handle_error(exception_context) -> None:
+    # 执行失败时不会触发 after_cursor_execute，丢弃对应的起始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(target: AsyncEngine) -> None:
+    sync_engine = target.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def query_budget(limit: int):
+    """路由依赖：声明当前请求最多执行的 SQL 条数"""
+
+    async def dependency() -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = limit
+
+    return dependency
@@ -8,7 +8,14 @@ from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .config import settings
+from .db import client_key, engine, primary_pins, read_engine, replica_enabled
 from .errors import AppError, app_error_handler, error_response
+from .instrumentation import (
+    QueryBudgetExceeded,
+    begin_request,
+    end_request,
+    instrument_engine,
+)
 from .logger import json_log, setup_logging
 from .routes import health, tags, tickets
 
@@ -35,9 +42,30 @@ class BodySizeLimitMiddleware(BaseHTTPMiddleware):
         return response
 
 
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """成功写入后将该客户端的读请求在短时间内固定到主库"""
+
+    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
+        response = await call_next(request)
+        if (
+            replica_enabled()
+            and request.method in WRITE_METHODS
+            and response.status_code < 400
+        ):
+            primary_pins.pin(client_key(request), settings.read_your_writes_seconds)
+        return response
+
+
 def create_app() -> FastAPI:
     app = FastAPI(title="Project Alpha API", version="0.1.0")
 
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
+
     # CORS 配置：如果配置了允许的源，使用配置；否则允许所有源（仅开发环境）
     # 确保包含常见的前端开发端口
     default_origins = [
@@ -58,13 +86,17 @@ def create_app() -> FastAPI:
     )
 
     app.add_middleware(BodySizeLimitMiddleware)
+    app.add_middleware(ReadYourWritesMiddleware)
 
     @app.middleware("http")
     async def log_requests(request: Request, call_next):  # type: ignore[override]
         start = time.perf_counter()
+        stats, token = begin_request()
         try:
             response = await call_next(request)
             duration = (time.perf_counter() - start) * 1000
+            response.headers.append("Server-Timing", stats.server_timing())
+            repeated = stats.repeated(settings.repeated_query_threshold)
             json_log(
                 "request_completed",
                 {
@@ -72,9 +104,30 @@ def create_app() -> FastAPI:
                     "method": request.method,
                     "status": response.status_code,
                     "duration_ms": round(duration, 2),
+                    "db_queries": stats.count,
+                    "db_ms": round(stats.total_ms, 2),
                 },
             )
+            if repeated or stats.over_budget:
+                json_log(
+                    "query_budget_warning",
+                    {
+                        "path": request.url.path,
+                        "method": request.method,
+                        "db_queries": stats.count,
+                        "budget": stats.budget,
+                        "repeated": repeated,
+                    },
+                    level=logging.WARNING,
+                )
+            if stats.over_budget and settings.query_budget_enforced:
+                raise QueryBudgetExceeded(
+                    f"{request.method} {request.url.path} executed {stats.count} "
+                    f"queries, budget is {stats.budget}: {dict(stats.shapes)}"
+                )
             return response
+        except QueryBudgetExceeded:
+            raise
         except Exception as exc:
             duration = (time.perf_counter() - start) * 1000
             json_log(
@@ -88,6 +141,8 @@ def create_app() -> FastAPI:
                 level=logging.ERROR,
             )
             raise
+        finally:
+            end_request(token)
 
     app.include_router(health.router)
     app.include_router(tags.router)
@@ -1,10 +1,12 @@
 import uuid
 from datetime import datetime
 from enum import Enum
+from typing import Iterable
 
 from sqlalchemy import (
     CheckConstraint,
     Column,
+    JSON,
     DateTime,
     Enum as SqlEnum,
     ForeignKey,
@@ -12,9 +14,11 @@ from sqlalchemy import (
     String,
     Table,
     Text,
+    TypeDecorator,
     func,
+    literal,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -25,6 +29,33 @@ class TicketStatus(str, Enum):
     DONE = "done"
 
 
+class UUIDArray(TypeDecorator):
+    """Postgres 上为 uuid[]；其他方言（测试用 SQLite）退化为 JSON 字符串数组"""
+
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):  # type: ignore[override]
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(ARRAY(UUID(as_uuid=True)))
+        return dialect.type_descriptor(JSON())
+
+    def process_bind_param(self, value, dialect):  # type: ignore[override]
+        if value is None or dialect.name == "postgresql":
+            return value
+        return [str(item) for item in value]
+
+    def process_result_value(self, value, dialect):  # type: ignore[override]
+        if value is None or dialect.name == "postgresql":
+            return value
+        return [uuid.UUID(item) for item in value]
+
+
+def uuid_array(values: Iterable[uuid.UUID]):
+    """uuid[] 字面量，用于 tag_ids @> ... 等数组谓词（仅 Postgres）"""
+    return literal(list(values), ARRAY(UUID(as_uuid=True)))
+
+
 ticket_tags = Table(
     "ticket_tags",
     Base.metadata,
@@ -73,6 +104,10 @@ class Ticket(Base):
         onupdate=func.now(),
         nullable=False,
     )
+    # ticket_tags 的反规范化副本，用于 tag_ids @> ARRAY[...] 的 AND 过滤
+    tag_ids: Mapped[list[uuid.UUID]] = mapped_column(
+        UUIDArray(), default=list, nullable=False
+    )
 
     tags: Mapped[list["Tag"]] = relationship(
         "Tag",
@@ -101,4 +136,19 @@ class Tag(Base):
 
 Index("ix_tickets_status", Ticket.status)
 Index("ix_tickets_title_lower", func.lower(Ticket.title))
+Index("ix_tickets_tag_ids", Ticket.tag_ids, postgresql_using="gin").ddl_if(
+    dialect="postgresql"
+)
 Index("ux_tags_name_lower", func.lower(Tag.name), unique=True)
+# 标签自动补全：前缀 LIKE 走 text_pattern_ops，子串 LIKE 走 pg_trgm（仅 Postgres）
+Index(
+    "ix_tags_name_lower_pattern",
+    func.lower(Tag.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_tags_name_lower_trgm",
+    func.lower(Tag.name).label("name_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"name_lower": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
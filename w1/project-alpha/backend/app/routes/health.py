@@ -2,13 +2,20 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from ..db import get_read_session, replica_enabled, replica_lag_seconds
+from ..instrumentation import query_budget
 from ..schemas import HealthResponse
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 
-@router.get("", response_model=HealthResponse)
-async def health_check(session: AsyncSession = Depends(get_session)) -> HealthResponse:
+@router.get("", response_model=HealthResponse, dependencies=[Depends(query_budget(2))])
+async def health_check(
+    session: AsyncSession = Depends(get_read_session),
+) -> HealthResponse:
     await session.execute(text("SELECT 1"))
-    return HealthResponse(status="ok")
+    return HealthResponse(
+        status="ok",
+        replica_enabled=replica_enabled(),
+        replica_lag_seconds=await replica_lag_seconds(),
+    )
@@ -1,23 +1,37 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from ..db import get_read_session, get_session
+from ..instrumentation import query_budget
 from ..schemas import TagCreate, TagResponse
 from ..services import tags as tag_service
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 
-@router.get("", response_model=list[TagResponse])
+@router.get(
+    "", response_model=list[TagResponse], dependencies=[Depends(query_budget(2))]
+)
 async def list_tags(
     q: str | None = Query(default=None, description="按名称模糊过滤"),
-    session: AsyncSession = Depends(get_session),
+    limit: int | None = Query(
+        default=None, ge=1, le=100, description="自动补全模式：前缀优先，最多返回条数"
+    ),
+    session: AsyncSession = Depends(get_read_session),
 ) -> list[TagResponse]:
-    tags = await tag_service.list_tags(session, q)
+    if limit is not None:
+        tags = await tag_service.autocomplete_tags(session, q, limit)
+    else:
+        tags = await tag_service.list_tags(session, q)
     return [TagResponse.model_validate(tag) for tag in tags]
 
 
-@router.post("", response_model=TagResponse, status_code=201)
+@router.post(
+    "",
+    response_model=TagResponse,
+    status_code=201,
+    dependencies=[Depends(query_budget(3))],
+)
 async def create_tag(
     payload: TagCreate, session: AsyncSession = Depends(get_session)
 ) -> TagResponse:
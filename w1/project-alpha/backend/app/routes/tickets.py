@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from ..db import get_read_session, get_session
+from ..instrumentation import query_budget
 from ..models import TicketStatus
+from ..responses import ORJSONResponse
 from ..schemas import TicketCreate, TicketResponse, TicketsListResponse, TicketUpdate
 from ..services import tickets as ticket_service
 
@@ -42,15 +44,19 @@ def _parse_status(raw: str | None) -> TicketStatus | None:
         raise ValueError(f"状态值无效: {raw}，必须是 'open' 或 'done'（大小写不敏感）")
 
 
-@router.get("", response_model=TicketsListResponse)
+@router.get(
+    "",
+    response_model=TicketsListResponse,
+    dependencies=[Depends(query_budget(4))],
+)
 async def list_tickets(
     status: str | None = Query(default=None, description="open/done (大小写不敏感)"),
     tags: str | None = Query(default=None, description="逗号分隔的标签名（AND 过滤）"),
     q: str | None = Query(default=None, description="标题关键词"),
     limit: int = Query(default=20, le=100, ge=1),
     offset: int = Query(default=0, ge=0),
-    session: AsyncSession = Depends(get_session),
-) -> TicketsListResponse:
+    session: AsyncSession = Depends(get_read_session),
+) -> ORJSONResponse:
     # 规范化状态值
     try:
         normalized_status = _parse_status(status)
@@ -60,7 +66,8 @@ async def list_tickets(
         raise HTTPException(status_code=422, detail=str(e))
 
     tag_list = _parse_tags(tags)
-    items, total = await ticket_service.list_tickets(
+    # 快速路径：行元组直接拼装为响应 dict，由 orjson 编码，跳过 response_model 二次校验
+    items, total = await ticket_service.list_ticket_rows(
         session,
         status=normalized_status,
         tags=tag_list,
@@ -68,12 +75,15 @@ async def list_tickets(
         limit=limit,
         offset=offset,
     )
-    return TicketsListResponse(
-        total=total, items=[TicketResponse.model_validate(item) for item in items]
-    )
+    return ORJSONResponse({"total": total, "items": items})
 
 
-@router.post("", response_model=TicketResponse, status_code=201)
+@router.post(
+    "",
+    response_model=TicketResponse,
+    status_code=201,
+    dependencies=[Depends(query_budget(8))],
+)
 async def create_ticket(
     payload: TicketCreate, session: AsyncSession = Depends(get_session)
 ) -> TicketResponse:
@@ -85,15 +95,23 @@ async def create_ticket(
     return response
 
 
-@router.get("/{ticket_id}", response_model=TicketResponse)
+@router.get(
+    "/{ticket_id}",
+    response_model=TicketResponse,
+    dependencies=[Depends(query_budget(2))],
+)
 async def get_ticket(
-    ticket_id: str, session: AsyncSession = Depends(get_session)
+    ticket_id: str, session: AsyncSession = Depends(get_read_session)
 ) -> TicketResponse:
     ticket = await ticket_service.get_ticket(session, ticket_id)
     return TicketResponse.model_validate(ticket)
 
 
-@router.patch("/{ticket_id}", response_model=TicketResponse)
+@router.patch(
+    "/{ticket_id}",
+    response_model=TicketResponse,
+    dependencies=[Depends(query_budget(9))],
+)
 async def update_ticket(
     ticket_id: str,
     payload: TicketUpdate,
@@ -104,7 +122,7 @@ async def update_ticket(
     return TicketResponse.model_validate(ticket)
 
 
-@router.delete("/{ticket_id}", status_code=204)
+@router.delete("/{ticket_id}", status_code=204, dependencies=[Depends(query_budget(4))])
 async def delete_ticket(
     ticket_id: str, session: AsyncSession = Depends(get_session)
 ) -> None:
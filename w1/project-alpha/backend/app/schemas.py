@@ -140,3 +140,5 @@ class TicketsListResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     status: str
+    replica_enabled: bool = False
+    replica_lag_seconds: float | None = None
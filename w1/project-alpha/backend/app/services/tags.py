@@ -1,13 +1,130 @@
-from typing import List
+import asyncio
+import time
+import uuid
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
+from ..db import dialect_name
 from ..errors import AppError
-from ..models import Tag
+from ..models import Tag, Ticket, ticket_tags, uuid_array
 from ..schemas import TagCreate
 
 
+@dataclass(frozen=True)
+class TagEntry:
+    """内存索引中的标签快照（字段与 TagResponse 对齐）"""
+
+    id: uuid.UUID
+    name: str
+    created_at: datetime
+
+
+class TagIndex:
+    """标签名的内存有序数组，用于自动补全
+
+    - 前缀匹配通过 bisect 在有序数组上做区间扫描，其余子串匹配线性补齐
+    - 本进程内的写操作（创建/删除标签、ticket 自动创建标签）会同步更新索引
+    - 多 worker 部署时其他进程的写入依赖 TTL 到期后整体重载
+    """
+
+    def __init__(self) -> None:
+        self._names: list[str] = []
+        self._entries: dict[str, TagEntry] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        if self._loaded_at is None:
+            return False
+        return time.monotonic() - self._loaded_at < ttl_seconds
+
+    async def ensure_loaded(self, session: AsyncSession, ttl_seconds: float) -> None:
+        if self.is_fresh(ttl_seconds):
+            return
+        async with self._lock:
+            # 等锁期间可能已被其他请求加载
+            if self.is_fresh(ttl_seconds):
+                return
+            rows = await session.execute(select(Tag.id, Tag.name, Tag.created_at))
+            self.load(
+                TagEntry(id=r.id, name=r.name, created_at=r.created_at) for r in rows
+            )
+
+    def load(self, entries: Iterable[TagEntry]) -> None:
+        mapping = {entry.name.lower(): entry for entry in entries}
+        self._entries = mapping
+        self._names = sorted(mapping)
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        self._names = []
+        self._entries = {}
+        self._loaded_at = None
+
+    def add(self, tag: Tag | TagEntry) -> None:
+        if not self.loaded:
+            return
+        key = tag.name.lower()
+        if key not in self._entries:
+            insort(self._names, key)
+        self._entries[key] = TagEntry(
+            id=tag.id, name=tag.name, created_at=tag.created_at
+        )
+
+    def add_many(self, tags: Iterable[Tag | TagEntry]) -> None:
+        for tag in tags:
+            self.add(tag)
+
+    def discard(self, name: str) -> None:
+        if not self.loaded:
+            return
+        key = name.lower()
+        if self._entries.pop(key, None) is None:
+            return
+        pos = bisect_left(self._names, key)
+        if pos < len(self._names) and self._names[pos] == key:
+            del self._names[pos]
+
+    def search(self, q: str, limit: int) -> List[TagEntry]:
+        prefix = q.lower()
+        matches: list[str] = []
+        pos = bisect_left(self._names, prefix)
+        while (
+            pos < len(self._names)
+            and len(matches) < limit
+            and self._names[pos].startswith(prefix)
+        ):
+            matches.append(self._names[pos])
+            pos += 1
+
+        if prefix and len(matches) < limit:
+            for name in self._names:
+                if prefix in name and not name.startswith(prefix):
+                    matches.append(name)
+                    if len(matches) >= limit:
+                        break
+
+        return [self._entries[name] for name in matches]
+
+
+tag_index = TagIndex()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 async def list_tags(session: AsyncSession, q: str | None = None) -> List[Tag]:
     query = select(Tag)
     if q:
@@ -16,6 +133,42 @@ async def list_tags(session: AsyncSession, q: str | None = None) -> List[Tag]:
     return list(rows.scalars().all())
 
 
+async def autocomplete_tags(
+    session: AsyncSession, q: str | None, limit: int
+) -> Sequence[Tag | TagEntry]:
+    """自动补全：前缀匹配优先，子串匹配补齐，最多返回 limit 条"""
+    keyword = (q or "").strip().lower()
+
+    if settings.tag_index_enabled:
+        await tag_index.ensure_loaded(session, settings.tag_index_ttl_seconds)
+        return tag_index.search(keyword, limit)
+
+    name_lower = func.lower(Tag.name)
+    escaped = _escape_like(keyword)
+
+    # 前缀查询可走 lower(name) text_pattern_ops 索引的范围扫描
+    prefix_rows = await session.execute(
+        select(Tag)
+        .where(name_lower.like(f"{escaped}%", escape="\\"))
+        .order_by(name_lower.asc())
+        .limit(limit)
+    )
+    tags = list(prefix_rows.scalars().all())
+
+    # 前缀结果不足时，用子串匹配补齐（Postgres 上走 pg_trgm GIN 索引）
+    if keyword and len(tags) < limit:
+        substring_rows = await session.execute(
+            select(Tag)
+            .where(name_lower.like(f"%{escaped}%", escape="\\"))
+            .where(name_lower.not_like(f"{escaped}%", escape="\\"))
+            .order_by(name_lower.asc())
+            .limit(limit - len(tags))
+        )
+        tags.extend(substring_rows.scalars().all())
+
+    return tags
+
+
 async def create_tag(session: AsyncSession, payload: TagCreate) -> Tag:
     normalized = payload.name.strip().lower()
     existing = await session.execute(
@@ -28,6 +181,7 @@ async def create_tag(session: AsyncSession, payload: TagCreate) -> Tag:
     session.add(tag)
     await session.commit()
     await session.refresh(tag)
+    tag_index.add(tag)
     return tag
 
 
@@ -35,5 +189,42 @@ async def delete_tag(session: AsyncSession, tag_id: str) -> None:
     tag = await session.get(Tag, tag_id)
     if not tag:
         raise AppError(status_code=404, code="not_found", message="标签不存在")
+    name = tag.name
+    await _remove_tag_from_tickets(session, tag.id)
     await session.delete(tag)
     await session.commit()
+    tag_index.discard(name)
+
+
+async def _remove_tag_from_tickets(session: AsyncSession, tag_id: uuid.UUID) -> None:
+    """从 tickets.tag_ids 中移除被删除的标签（ticket_tags 由外键级联删除）"""
+    if dialect_name(session) == "postgresql":
+        # 单条 UPDATE，借助 GIN 索引定位；保持 updated_at 不变
+        await session.execute(
+            update(Ticket)
+            .where(Ticket.tag_ids.op("@>")(uuid_array([tag_id])))
+            .values(
+                tag_ids=func.array_remove(
+                    Ticket.tag_ids, literal(tag_id, PG_UUID(as_uuid=True))
+                ),
+                updated_at=Ticket.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return
+
+    rows = await session.execute(
+        select(Ticket.id, Ticket.tag_ids)
+        .join(ticket_tags, ticket_tags.c.ticket_id == Ticket.id)
+        .where(ticket_tags.c.tag_id == tag_id)
+    )
+    for ticket_id, tag_ids in rows.all():
+        await session.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id)
+            .values(
+                tag_ids=[item for item in tag_ids if item != tag_id],
+                updated_at=Ticket.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
@@ -1,4 +1,4 @@
-from typing import Iterable, List, Tuple
+from typing import Any, Iterable, List, Tuple
 from uuid import UUID
 
 from sqlalchemy import Select, func, select
@@ -6,9 +6,11 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from ..db import dialect_name
 from ..errors import AppError
-from ..models import Tag, Ticket, TicketStatus, ticket_tags
+from ..models import Tag, Ticket, TicketStatus, ticket_tags, uuid_array
 from ..schemas import TicketCreate, TicketUpdate
+from .tags import tag_index
 
 
 async def get_ticket(session: AsyncSession, ticket_id: str | UUID) -> Ticket:
@@ -30,38 +32,147 @@ async def list_tickets(
     limit: int,
     offset: int,
 ) -> Tuple[List[Ticket], int]:
-    base_query: Select[tuple[Ticket]] = select(Ticket).options(
-        selectinload(Ticket.tags)
+    base_query = await _apply_ticket_filters(
+        session,
+        select(Ticket).options(selectinload(Ticket.tags)),
+        status=status,
+        tags=tags,
+        q=q,
     )
+    if base_query is None:
+        return [], 0
 
+    total = await session.scalar(
+        select(func.count()).select_from(base_query.subquery())
+    )
+    rows = await session.execute(
+        base_query.order_by(Ticket.created_at.desc()).limit(limit).offset(offset)
+    )
+    return list(rows.scalars().all()), int(total or 0)
+
+
+async def list_ticket_rows(
+    session: AsyncSession,
+    *,
+    status: TicketStatus | None,
+    tags: List[str],
+    q: str | None,
+    limit: int,
+    offset: int,
+) -> Tuple[List[dict[str, Any]], int]:
+    """list_tickets 的序列化快速路径
+
+    只查询列元组，标签用一次 IN 查询批量取回，直接拼装成与 TicketResponse
+    字段顺序一致的 dict，交给 ORJSONResponse 编码，跳过 ORM 实例化与 Pydantic 校验。
+    """
+    base_query = await _apply_ticket_filters(
+        session,
+        select(
+            Ticket.id,
+            Ticket.title,
+            Ticket.description,
+            Ticket.status,
+            Ticket.created_at,
+            Ticket.updated_at,
+        ),
+        status=status,
+        tags=tags,
+        q=q,
+    )
+    if base_query is None:
+        return [], 0
+
+    total = await session.scalar(
+        select(func.count()).select_from(base_query.subquery())
+    )
+    rows = (
+        await session.execute(
+            base_query.order_by(Ticket.created_at.desc()).limit(limit).offset(offset)
+        )
+    ).all()
+    if not rows:
+        return [], int(total or 0)
+
+    tags_by_ticket: dict[UUID, list[dict[str, Any]]] = {row.id: [] for row in rows}
+    tag_rows = await session.execute(
+        select(ticket_tags.c.ticket_id, Tag.name, Tag.id, Tag.created_at)
+        .join(Tag, Tag.id == ticket_tags.c.tag_id)
+        .where(ticket_tags.c.ticket_id.in_(list(tags_by_ticket)))
+        .order_by(Tag.name.asc())
+    )
+    for ticket_id, name, tag_id, created_at in tag_rows:
+        tags_by_ticket[ticket_id].append(
+            {"name": name, "id": tag_id, "created_at": created_at}
+        )
+
+    items = [
+        {
+            "title": row.title,
+            "description": row.description,
+            "id": row.id,
+            "status": TicketStatus(row.status).value,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "tags": tags_by_ticket[row.id],
+        }
+        for row in rows
+    ]
+    return items, int(total or 0)
+
+
+async def _apply_ticket_filters(
+    session: AsyncSession,
+    query: Select,
+    *,
+    status: TicketStatus | None,
+    tags: List[str],
+    q: str | None,
+) -> Select | None:
+    """追加状态/关键词/标签过滤条件；已知结果为空时返回 None"""
     if status:
-        base_query = base_query.where(Ticket.status == status)
+        query = query.where(Ticket.status == status)
 
     if q:
         keyword = f"%{q.lower()}%"
-        base_query = base_query.where(func.lower(Ticket.title).like(keyword))
+        query = query.where(func.lower(Ticket.title).like(keyword))
 
     if tags:
-        normalized_tags = [tag.lower() for tag in tags]
-        tag_subquery = (
-            select(ticket_tags.c.ticket_id)
-            .join(Tag, Tag.id == ticket_tags.c.tag_id)
-            .where(func.lower(Tag.name).in_(normalized_tags))
-            .group_by(ticket_tags.c.ticket_id)
-            .having(
-                func.count(func.distinct(ticket_tags.c.tag_id)) == len(normalized_tags)
-            )
-            .subquery()
-        )
-        base_query = base_query.where(Ticket.id.in_(select(tag_subquery.c.ticket_id)))
+        normalized_tags = list(dict.fromkeys(tag.lower() for tag in tags))
+        if dialect_name(session) == "postgresql":
+            tag_ids = await _resolve_tag_ids(session, normalized_tags)
+            if tag_ids is None:
+                # 有标签不存在，AND 过滤必然为空
+                return None
+            query = query.where(Ticket.tag_ids.op("@>")(uuid_array(tag_ids)))
+        else:
+            query = query.where(Ticket.id.in_(_tag_and_subquery(normalized_tags)))
 
-    total = await session.scalar(
-        select(func.count()).select_from(base_query.subquery())
-    )
+    return query
+
+
+async def _resolve_tag_ids(
+    session: AsyncSession, normalized_tags: List[str]
+) -> List[UUID] | None:
     rows = await session.execute(
-        base_query.order_by(Ticket.created_at.desc()).limit(limit).offset(offset)
+        select(Tag.id).where(func.lower(Tag.name).in_(normalized_tags))
     )
-    return list(rows.scalars().all()), int(total or 0)
+    tag_ids = list(rows.scalars().all())
+    if len(tag_ids) < len(normalized_tags):
+        return None
+    return tag_ids
+
+
+def _tag_and_subquery(normalized_tags: List[str]):
+    """非 Postgres（如测试用 SQLite）没有数组类型，回退到关联表分组计数"""
+    tag_subquery = (
+        select(ticket_tags.c.ticket_id)
+        .join(Tag, Tag.id == ticket_tags.c.tag_id)
+        .where(func.lower(Tag.name).in_(normalized_tags))
+        .group_by(ticket_tags.c.ticket_id)
+        .having(func.count(func.distinct(ticket_tags.c.tag_id)) == len(normalized_tags))
+        .subquery()
+    )
+    return select(tag_subquery.c.ticket_id)
 
 
 async def _upsert_tags(session: AsyncSession, tag_names: Iterable[str]) -> List[Tag]:
@@ -107,12 +218,15 @@ async def _sync_ticket_tags(
         ticket_tags.delete().where(ticket_tags.c.ticket_id == ticket.id)
     )
 
-    # 如果有新标签，添加新的关联关系
+    # 如果有新标签，批量添加新的关联关系（executemany，避免逐条 INSERT）
     if tags:
-        for tag in tags:
-            await session.execute(
-                ticket_tags.insert().values(ticket_id=ticket.id, tag_id=tag.id)
-            )
+        await session.execute(
+            ticket_tags.insert(),
+            [{"ticket_id": ticket.id, "tag_id": tag.id} for tag in tags],
+        )
+
+    # 同步反规范化的 tag_ids 数组（整体赋值以触发变更追踪）
+    ticket.tag_ids = sorted({tag.id for tag in tags})
 
     await session.flush()
 
@@ -131,7 +245,10 @@ async def create_ticket(session: AsyncSession, payload: TicketCreate) -> Ticket:
 
     # 使用重新查询的方式获取完整的 ticket 对象，包括加载 tags 关系
     # 这种方式比 refresh 更可靠，可以避免 MissingGreenlet 错误
-    return await get_ticket(session, ticket.id)
+    ticket = await get_ticket(session, ticket.id)
+    # 提交后再同步标签自动补全索引，避免回滚产生幽灵标签
+    tag_index.add_many(ticket.tags)
+    return ticket
 
 
 async def update_ticket(
@@ -149,7 +266,10 @@ async def update_ticket(
 
     # 使用重新查询的方式获取完整的 ticket 对象，包括加载 tags 关系
     # 这种方式比 refresh 更可靠，可以避免 MissingGreenlet 错误
-    return await get_ticket(session, ticket.id)
+    ticket = await get_ticket(session, ticket.id)
+    if payload.tags is not None:
+        tag_index.add_many(ticket.tags)
+    return ticket
 
 
 async def delete_ticket(session: AsyncSession, ticket: Ticket) -> None:
@@ -0,0 +1,126 @@
+"""GET /tickets 序列化路径基准：ORM + Pydantic + json vs 行元组 + orjson
+
+默认使用 SQLite 内存库；设置 DATABASE_URL 可对 Postgres 运行。
+
+用法：
+    uv run python benchmarks/bench_ticket_list.py --tickets 100 --tags-per-ticket 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import Tag, Ticket, ticket_tags  # noqa: E402
+from app.responses import ORJSONResponse  # noqa: E402
+from app.schemas import TicketResponse, TicketsListResponse  # noqa: E402
+from app.services import tickets as ticket_service  # noqa: E402
+
+LIST_ARGS = {"status": None, "tags": [], "q": None, "offset": 0}
+
+
+async def seed(tickets: int, tags_per_ticket: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    tag_ids = [uuid.uuid4() for _ in range(tags_per_ticket)]
+    ticket_ids = [uuid.uuid4() for _ in range(tickets)]
+    async with SessionLocal() as session:
+        await session.execute(
+            insert(Tag),
+            [{"id": tid, "name": f"tag-{i:04d}"} for i, tid in enumerate(tag_ids)],
+        )
+        await session.execute(
+            insert(Ticket),
+            [
+                {
+                    "id": tid,
+                    "title": f"Ticket {i}",
+                    "description": ("benchmark ticket " * 4).strip(),
+                    "tag_ids": tag_ids,
+                }
+                for i, tid in enumerate(ticket_ids)
+            ],
+        )
+        await session.execute(
+            insert(ticket_tags),
+            [
+                {"ticket_id": ticket_id, "tag_id": tag_id}
+                for ticket_id in ticket_ids
+                for tag_id in tag_ids
+            ],
+        )
+        await session.commit()
+
+
+async def legacy_path(limit: int) -> bytes:
+    """近似旧路由：ORM 对象 -> model_validate -> response_model 再校验 -> 标准库 json"""
+    async with SessionLocal() as session:
+        items, total = await ticket_service.list_tickets(
+            session, limit=limit, **LIST_ARGS
+        )
+        response = TicketsListResponse(
+            total=total, items=[TicketResponse.model_validate(item) for item in items]
+        )
+    validated = TicketsListResponse.model_validate(response.model_dump())
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+async def fast_path(limit: int) -> bytes:
+    async with SessionLocal() as session:
+        items, total = await ticket_service.list_ticket_rows(
+            session, limit=limit, **LIST_ARGS
+        )
+    return ORJSONResponse({"total": total, "items": items}).body
+
+
+async def measure(name: str, fn, limit: int, rounds: int) -> None:
+    for _ in range(min(10, rounds)):
+        await fn(limit)
+    samples = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = await fn(limit)
+        samples.append((time.perf_counter() - start) * 1000)
+        size = len(body)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{name:<8} mean={statistics.mean(samples):7.2f}ms "
+        f"p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms bytes={size}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=100)
+    parser.add_argument("--tags-per-ticket", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    await seed(args.tickets, args.tags_per_ticket)
+    print(
+        f"tickets={args.tickets} tags/ticket={args.tags_per_ticket} "
+        f"limit={args.limit} rounds={args.rounds}"
+    )
+    await measure("legacy", legacy_path, args.limit, args.rounds)
+    await measure("fast", fast_path, args.limit, args.rounds)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,194 @@
+"""合成数据生成器：按生产数据形态批量灌入 tickets / tags
+
+- 标签热度服从 Zipf 分布（少数标签出现在大部分 ticket 上）
+- 每个 ticket 的标签数在 [min, max] 区间内随机，创建时间分布在最近 N 天
+- 同一 --seed 生成完全相同的数据，便于前后对比
+
+默认使用 SQLite 内存库；设置 DATABASE_URL 可直接灌入 Postgres：
+    DATABASE_URL=postgresql+asyncpg://... uv run python benchmarks/datagen.py \\
+        --tickets 300000 --tags 3000 --reset
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession  # noqa: E402
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import Tag, Ticket, TicketStatus, ticket_tags  # noqa: E402
+
+BATCH_SIZE = 5_000
+
+
+@dataclass
+class DatasetSpec:
+    tickets: int = 10_000
+    tags: int = 500
+    min_tags_per_ticket: int = 0
+    max_tags_per_ticket: int = 6
+    zipf_exponent: float = 1.1
+    done_ratio: float = 0.3
+    days: int = 365
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    """生成结果摘要，供负载测试挑选过滤条件与更新目标"""
+
+    tag_names: list[str] = field(default_factory=list)
+    tag_usage: dict[str, int] = field(default_factory=dict)
+    ticket_ids: list[uuid.UUID] = field(default_factory=list)
+
+    @property
+    def tags_by_popularity(self) -> list[str]:
+        return sorted(self.tag_names, key=lambda name: -self.tag_usage.get(name, 0))
+
+
+def _chunks(rows: list[dict], size: int = BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+async def _bulk_insert(session: AsyncSession, target, rows: list[dict]) -> None:
+    for chunk in _chunks(rows):
+        await session.execute(insert(target), chunk)
+
+
+async def reset_schema(target_engine: AsyncEngine = engine) -> None:
+    async with target_engine.begin() as conn:
+        if target_engine.dialect.name == "postgresql":
+            # ix_tags_name_lower_trgm 依赖 pg_trgm 扩展
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def generate(spec: DatasetSpec, session_factory=SessionLocal) -> Dataset:
+    rng = random.Random(spec.seed)
+    now = datetime.now(timezone.utc)
+
+    tag_rows = [
+        {
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "name": f"tag-{rank:05d}",
+            "created_at": now - timedelta(days=spec.days),
+        }
+        for rank in range(spec.tags)
+    ]
+    # Zipf 权重：排名越靠前的标签越热门
+    cum_weights = list(
+        itertools.accumulate(
+            1.0 / (rank + 1) ** spec.zipf_exponent for rank in range(spec.tags)
+        )
+    )
+
+    dataset = Dataset(tag_names=[row["name"] for row in tag_rows])
+    ticket_rows: list[dict] = []
+    link_rows: list[dict] = []
+    for index in range(spec.tickets):
+        ticket_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        wanted = rng.randint(spec.min_tags_per_ticket, spec.max_tags_per_ticket)
+        picked: dict[int, None] = {}
+        if wanted and tag_rows:
+            for rank in rng.choices(
+                range(spec.tags), cum_weights=cum_weights, k=wanted * 3
+            ):
+                picked[rank] = None
+                if len(picked) >= wanted:
+                    break
+        created_at = now - timedelta(seconds=rng.randint(0, spec.days * 86_400))
+        ticket_rows.append(
+            {
+                "id": ticket_id,
+                "title": f"Synthetic ticket {index}",
+                "description": f"Generated for load testing (seed={spec.seed})",
+                "status": TicketStatus.DONE
+                if rng.random() < spec.done_ratio
+                else TicketStatus.OPEN,
+                "created_at": created_at,
+                "updated_at": created_at,
+                "tag_ids": sorted(tag_rows[rank]["id"] for rank in picked),
+            }
+        )
+        for rank in picked:
+            link_rows.append({"ticket_id": ticket_id, "tag_id": tag_rows[rank]["id"]})
+            name = tag_rows[rank]["name"]
+            dataset.tag_usage[name] = dataset.tag_usage.get(name, 0) + 1
+        dataset.ticket_ids.append(ticket_id)
+
+    async with session_factory() as session:
+        await _bulk_insert(session, Tag, tag_rows)
+        await _bulk_insert(session, Ticket, ticket_rows)
+        await _bulk_insert(session, ticket_tags, link_rows)
+        await session.commit()
+
+    return dataset
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = DatasetSpec()
+    parser.add_argument("--tickets", type=int, default=defaults.tickets)
+    parser.add_argument("--tags", type=int, default=defaults.tags)
+    parser.add_argument(
+        "--min-tags-per-ticket", type=int, default=defaults.min_tags_per_ticket
+    )
+    parser.add_argument(
+        "--max-tags-per-ticket", type=int, default=defaults.max_tags_per_ticket
+    )
+    parser.add_argument("--zipf-exponent", type=float, default=defaults.zipf_exponent)
+    parser.add_argument("--done-ratio", type=float, default=defaults.done_ratio)
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> DatasetSpec:
+    return DatasetSpec(
+        tickets=args.tickets,
+        tags=args.tags,
+        min_tags_per_ticket=args.min_tags_per_ticket,
+        max_tags_per_ticket=args.max_tags_per_ticket,
+        zipf_exponent=args.zipf_exponent,
+        done_ratio=args.done_ratio,
+        days=args.days,
+        seed=args.seed,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic dataset")
+    add_spec_arguments(parser)
+    parser.add_argument(
+        "--reset", action="store_true", help="drop and recreate all tables first"
+    )
+    args = parser.parse_args()
+
+    if args.reset or engine.dialect.name == "sqlite":
+        await reset_schema()
+    start = time.perf_counter()
+    dataset = await generate(spec_from_args(args))
+    elapsed = time.perf_counter() - start
+    top = dataset.tags_by_popularity[:5]
+    print(
+        f"loaded {len(dataset.ticket_ids)} tickets, {len(dataset.tag_names)} tags, "
+        f"{sum(dataset.tag_usage.values())} links in {elapsed:.1f}s"
+    )
+    print("most popular tags: " + ", ".join(f"{n}={dataset.tag_usage[n]}" for n in top))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
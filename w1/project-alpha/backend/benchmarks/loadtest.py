@@ -0,0 +1,391 @@
+"""API 负载测试：按固定并发压测核心接口，统计延迟分位数与每请求 SQL 数
+
+- 数据由 benchmarks/datagen.py 按 --seed 生成，结果可复现
+- 每个场景输出 p50/p95/p99、错误数与平均每请求 SQL 条数；每个场景测 --rounds 轮，
+  取 p95 居中的一轮
+- 指定 --baseline 时与基线对比，p95 超出容忍度（比例 + 绝对余量）或 SQL 条数增加即以非零码退出；
+  基线文件不存在、或其数据库方言 / 数据规格 / 并发数与本次不同时直接报错退出
+- benchmarks/baseline.json 为默认参数（SQLite 内存库）下的基线，延迟与机器相关，
+  换机器后先用 --output 重新生成
+
+用法：
+    uv run python benchmarks/loadtest.py --tickets 20000 --requests 300 --concurrency 16
+    # 保存基线，后续改动与之对比
+    uv run python benchmarks/loadtest.py --output benchmarks/baseline.json
+    uv run python benchmarks/loadtest.py --baseline benchmarks/baseline.json
+
+默认使用 SQLite 内存库；设置 DATABASE_URL 可对 Postgres 运行（需配合 --reset
+或事先用 datagen.py 灌好数据，此时加 --no-generate 只读取现有数据）。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from datagen import (  # noqa: E402
+    Dataset,
+    add_spec_arguments,
+    generate,
+    reset_schema,
+    spec_from_args,
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import event, select  # noqa: E402
+
+from app.db import SessionLocal, engine, read_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Tag, Ticket  # noqa: E402
+
+Request = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Request
+    # SQLite 上按字符串 id 查询 UUID 列会失败，单条读写场景仅在 Postgres 上运行
+    postgres_only: bool = False
+    # SQLite 内存库所有会话共享同一连接，写场景在 SQLite 上串行执行
+    writes: bool = False
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    queries: int = 0
+
+    def summary(self) -> dict:
+        count = len(self.latencies_ms)
+        ordered = sorted(self.latencies_ms)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "p50_ms": round(_percentile(ordered, 50), 2),
+            "p95_ms": round(_percentile(ordered, 95), 2),
+            "p99_ms": round(_percentile(ordered, 99), 2),
+            "mean_ms": round(statistics.fmean(ordered), 2) if ordered else 0.0,
+            "queries_per_request": round(self.queries / count, 2) if count else 0.0,
+        }
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class QueryCounter:
+    """通过 before_cursor_execute 统计当前场景执行的 SQL 条数"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._engines = {
+            id(e.sync_engine): e.sync_engine for e in (engine, read_engine)
+        }
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        for sync_engine in self._engines.values():
+            event.listen(sync_engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for sync_engine in self._engines.values():
+            event.remove(sync_engine, "before_cursor_execute", self._on_execute)
+
+
+def build_scenarios(dataset: Dataset) -> list[Scenario]:
+    popular = dataset.tags_by_popularity
+    hot, warm = popular[0], popular[min(1, len(popular) - 1)]
+    ticket_ids = [str(ticket_id) for ticket_id in dataset.ticket_ids]
+    counter = itertools.count()
+
+    async def list_default(client, rng):
+        return await client.get("/tickets", params={"limit": 20})
+
+    async def list_deep_page(client, rng):
+        return await client.get(
+            "/tickets", params={"limit": 100, "offset": rng.randint(0, 500)}
+        )
+
+    async def list_status(client, rng):
+        return await client.get("/tickets", params={"status": "done", "limit": 20})
+
+    async def list_hot_tag(client, rng):
+        return await client.get("/tickets", params={"tags": hot, "limit": 20})
+
+    async def list_two_tags(client, rng):
+        return await client.get("/tickets", params={"tags": f"{hot},{warm}"})
+
+    async def search_title(client, rng):
+        return await client.get("/tickets", params={"q": str(rng.randint(1, 999))})
+
+    async def tag_autocomplete(client, rng):
+        return await client.get("/tags", params={"q": "tag-000", "limit": 10})
+
+    async def get_ticket(client, rng):
+        return await client.get(f"/tickets/{rng.choice(ticket_ids)}")
+
+    async def create_ticket(client, rng):
+        return await client.post(
+            "/tickets",
+            json={
+                "title": f"Load test ticket {next(counter)}",
+                "tags": rng.sample(popular[:50], k=min(3, len(popular))),
+            },
+        )
+
+    async def update_ticket(client, rng):
+        return await client.patch(
+            f"/tickets/{rng.choice(ticket_ids)}",
+            json={"status": rng.choice(["open", "done"])},
+        )
+
+    return [
+        Scenario("list_default", list_default),
+        Scenario("list_deep_page", list_deep_page),
+        Scenario("list_status", list_status),
+        Scenario("list_hot_tag", list_hot_tag),
+        Scenario("list_two_tags", list_two_tags),
+        Scenario("search_title", search_title),
+        Scenario("tag_autocomplete", tag_autocomplete),
+        Scenario("get_ticket", get_ticket, postgres_only=True),
+        Scenario("create_ticket", create_ticket, writes=True),
+        Scenario("update_ticket", update_ticket, postgres_only=True, writes=True),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> ScenarioResult:
+    result = ScenarioResult(name=scenario.name)
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1_000 + worker_id)
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await scenario.request(client, rng)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            result.latencies_ms.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                result.errors += 1
+
+    with QueryCounter() as counter:
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    result.queries = counter.count
+    return result
+
+
+async def load_existing_dataset() -> Dataset:
+    """--no-generate 时从现有数据构造 Dataset（标签热度按关联数统计）"""
+    async with SessionLocal() as session:
+        tag_names = list((await session.execute(select(Tag.name))).scalars())
+        ticket_ids = list((await session.execute(select(Ticket.id))).scalars())
+        usage: dict[str, int] = {}
+        if tag_names:
+            tags = await session.execute(select(Tag.id, Tag.name))
+            names_by_id = {str(tag_id): name for tag_id, name in tags}
+            for (tag_ids,) in await session.execute(select(Ticket.tag_ids)):
+                for tag_id in tag_ids or []:
+                    name = names_by_id.get(str(tag_id))
+                    if name:
+                        usage[name] = usage.get(name, 0) + 1
+    return Dataset(tag_names=tag_names, tag_usage=usage, ticket_ids=ticket_ids)
+
+
+def compare_with_baseline(
+    current: dict[str, dict],
+    baseline: dict[str, dict],
+    max_regression: float,
+    min_regression_ms: float = 0.0,
+) -> list[str]:
+    failures = []
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        # 快接口的 p95 只有几十毫秒，按比例的容忍度小于调度抖动，另加绝对余量
+        limit = base["p95_ms"] * (1 + max_regression) + min_regression_ms
+        if stats["p95_ms"] > limit:
+            failures.append(
+                f"{name}: p95 {stats['p95_ms']}ms > baseline {base['p95_ms']}ms "
+                f"(+{max_regression:.0%} +{min_regression_ms:g}ms)"
+            )
+        if stats["queries_per_request"] > base["queries_per_request"]:
+            failures.append(
+                f"{name}: queries/request {stats['queries_per_request']} > "
+                f"baseline {base['queries_per_request']}"
+            )
+        if stats["errors"] > base.get("errors", 0):
+            failures.append(f"{name}: errors {stats['errors']} > {base['errors']}")
+    return failures
+
+
+def baseline_mismatch(baseline: dict, dialect: str, spec: dict, concurrency: int) -> list[str]:
+    """基线与本次运行条件不一致的项；不一致时延迟不可比"""
+    current = {"dialect": dialect, "spec": spec, "concurrency": concurrency}
+    return [
+        f"{key}: baseline {baseline.get(key)!r} != {value!r}"
+        for key, value in current.items()
+        if baseline.get(key) != value
+    ]
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the ticket API")
+    add_spec_arguments(parser)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10, help="per scenario")
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="measure each scenario this many times and report the median-p95 round",
+    )
+    parser.add_argument(
+        "--scenario", action="append", help="run only the named scenario(s)"
+    )
+    parser.add_argument(
+        "--no-generate",
+        action="store_true",
+        help="use the data already in DATABASE_URL instead of generating it",
+    )
+    parser.add_argument(
+        "--reset", action="store_true", help="drop and recreate all tables first"
+    )
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against a JSON result")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="allowed p95 growth over the baseline (0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--min-regression-ms",
+        type=float,
+        default=5.0,
+        help="allowed p95 growth in ms on top of --max-regression (noise floor)",
+    )
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    baseline = None
+    if args.baseline:
+        if not args.baseline.exists():
+            print(f"baseline {args.baseline} not found", file=sys.stderr)
+            return 2
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        mismatches = baseline_mismatch(
+            baseline, engine.dialect.name, vars(spec_from_args(args)), args.concurrency
+        )
+        if mismatches:
+            print(f"cannot compare with {args.baseline}:", file=sys.stderr)
+            for mismatch in mismatches:
+                print(f"  {mismatch}", file=sys.stderr)
+            return 2
+
+    if args.no_generate:
+        dataset = await load_existing_dataset()
+    else:
+        if args.reset or engine.dialect.name == "sqlite":
+            await reset_schema()
+        dataset = await generate(spec_from_args(args))
+    if not dataset.tag_names or not dataset.ticket_ids:
+        print("dataset is empty; generate data first", file=sys.stderr)
+        return 2
+
+    scenarios = build_scenarios(dataset)
+    if args.scenario:
+        scenarios = [s for s in scenarios if s.name in set(args.scenario)]
+    if engine.dialect.name != "postgresql":
+        skipped = [s.name for s in scenarios if s.postgres_only]
+        scenarios = [s for s in scenarios if not s.postgres_only]
+        if skipped:
+            print(f"skipping on {engine.dialect.name}: {', '.join(skipped)}")
+
+    results: dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for scenario in scenarios:
+            concurrency = args.concurrency
+            if scenario.writes and engine.dialect.name == "sqlite":
+                concurrency = 1
+            await run_scenario(client, scenario, args.warmup, 1, args.seed)
+            # 单轮 p95 受调度抖动影响大，取 p95 居中的一轮
+            rounds = [
+                (
+                    await run_scenario(
+                        client, scenario, args.requests, concurrency, args.seed
+                    )
+                ).summary()
+                for _ in range(max(1, args.rounds))
+            ]
+            rounds.sort(key=lambda summary: summary["p95_ms"])
+            results[scenario.name] = rounds[len(rounds) // 2]
+
+    header = f"{'scenario':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}{'sql/req':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in results.items():
+        print(
+            f"{name:<18}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+            f"{stats['p99_ms']:>9.2f}{stats['errors']:>6}"
+            f"{stats['queries_per_request']:>9.2f}"
+        )
+
+    if args.output:
+        payload = {
+            "dialect": engine.dialect.name,
+            "spec": vars(spec_from_args(args)),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "scenarios": results,
+        }
+        args.output.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+    if baseline is not None:
+        failures = compare_with_baseline(
+            results, baseline["scenarios"], args.max_regression, args.min_regression_ms
+        )
+        if failures:
+            print("\nregressions against baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("\nno regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
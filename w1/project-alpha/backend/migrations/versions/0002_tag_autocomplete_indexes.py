@@ -0,0 +1,26 @@
+"""Tag autocomplete indexes (text_pattern_ops + pg_trgm)"""
+
+from alembic import op
+
+
+revision = "0002_tag_autocomplete_indexes"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_tags_name_lower_pattern "
+        "ON tags (lower(name) text_pattern_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_tags_name_lower_trgm "
+        "ON tags USING gin (lower(name) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tags_name_lower_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_tags_name_lower_pattern")
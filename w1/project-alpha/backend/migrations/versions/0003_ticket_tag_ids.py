@@ -0,0 +1,43 @@
+"""Denormalized tag_ids array on tickets"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0003_ticket_tag_ids"
+down_revision = "0002_tag_autocomplete_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tickets",
+        sa.Column(
+            "tag_ids",
+            postgresql.ARRAY(postgresql.UUID(as_uuid=True)),
+            nullable=False,
+            server_default=sa.text("'{}'::uuid[]"),
+        ),
+    )
+    op.execute(
+        """
+        UPDATE tickets AS t
+        SET tag_ids = sub.tag_ids
+        FROM (
+            SELECT ticket_id, array_agg(tag_id ORDER BY tag_id) AS tag_ids
+            FROM ticket_tags
+            GROUP BY ticket_id
+        ) AS sub
+        WHERE sub.ticket_id = t.id
+        """
+    )
+    op.create_index(
+        "ix_tickets_tag_ids", "tickets", ["tag_ids"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tickets_tag_ids", table_name="tickets")
+    op.drop_column("tickets", "tag_ids")
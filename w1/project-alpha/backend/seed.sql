@@ -593,6 +593,16 @@ BEGIN
     END LOOP;
 END $$;
 
+-- 回填 tickets.tag_ids（ticket_tags 的反规范化副本，用于标签 AND 过滤）
+UPDATE tickets AS t
+SET tag_ids = sub.tag_ids
+FROM (
+    SELECT ticket_id, array_agg(tag_id ORDER BY tag_id) AS tag_ids
+    FROM ticket_tags
+    GROUP BY ticket_id
+) AS sub
+WHERE sub.ticket_id = t.id;
+
 -- 验证数据
 SELECT 'Tags count:' as info, COUNT(*) as count FROM tags
 UNION ALL
@@ -4,6 +4,7 @@ import pytest
 from httpx import AsyncClient
 
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+os.environ["QUERY_BUDGET_ENFORCED"] = "true"
 
 from app.db import Base, engine  # noqa: E402
 from app.main import app  # noqa: E402
@@ -31,3 +32,91 @@ async def test_health_check(client: AsyncClient):
     assert resp.status_code == 200
     data = resp.json()
     assert data["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_read_replica_routing(client: AsyncClient, monkeypatch):
+    """测试只读副本路由：读走副本，写后短时间内读固定到主库"""
+    from sqlalchemy.ext.asyncio import (
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+
+    from app import db
+
+    replica = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with replica.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(db, "read_engine", replica)
+    monkeypatch.setattr(
+        db,
+        "ReadSessionLocal",
+        async_sessionmaker(bind=replica, expire_on_commit=False, class_=AsyncSession),
+    )
+    db.primary_pins.clear()
+
+    resp = await client.get("/health")
+    assert resp.json()["replica_enabled"] is True
+
+    # 写入后同一客户端立即读取，应读到主库数据
+    headers = {"X-Client-Id": "client-a"}
+    await client.post("/tags", json={"name": "fresh"}, headers=headers)
+    resp = await client.get("/tags", headers=headers)
+    assert [t["name"] for t in resp.json()] == ["fresh"]
+
+    # 其他客户端没有被固定，读副本（副本中尚无数据）
+    resp = await client.get("/tags", headers={"X-Client-Id": "client-b"})
+    assert resp.json() == []
+
+    db.primary_pins.clear()
+    await replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(client: AsyncClient):
+    """测试响应头携带本次请求的 SQL 条数与耗时"""
+    resp = await client.get("/health")
+    timing = resp.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert 'desc="1 queries"' in timing
+
+
+@pytest.mark.asyncio
+async def test_query_budget_enforced():
+    """测试模式下路由超出 SQL 预算时直接失败，并能识别重复语句形态"""
+    from fastapi import Depends
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.db import get_session
+    from app.instrumentation import (
+        QueryBudgetExceeded,
+        QueryStats,
+        query_budget,
+        statement_shape,
+    )
+    from app.main import create_app
+
+    budget_app = create_app()
+
+    @budget_app.get("/n-plus-one", dependencies=[Depends(query_budget(2))])
+    async def n_plus_one(session: AsyncSession = Depends(get_session)) -> dict:
+        for ticket_id in range(3):
+            await session.execute(
+                text("SELECT id FROM tickets WHERE title = :title"),
+                {"title": f"t{ticket_id}"},
+            )
+        return {}
+
+    async with AsyncClient(app=budget_app, base_url="http://test") as ac:
+        with pytest.raises(QueryBudgetExceeded, match="executed 3 queries"):
+            await ac.get("/n-plus-one")
+
+    assert statement_shape("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'") == (
+        "SELECT * FROM t WHERE id IN (?) AND name = ?"
+    )
+    stats = QueryStats()
+    for value in range(5):
+        stats.record(f"SELECT * FROM tags WHERE id = {value}", 0.1)
+    assert stats.repeated(5) == {"SELECT * FROM tags WHERE id = ?": 5}
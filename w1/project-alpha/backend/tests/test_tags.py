@@ -4,9 +4,12 @@ import pytest
 from httpx import AsyncClient
 
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+os.environ["QUERY_BUDGET_ENFORCED"] = "true"
 
+from app.config import settings  # noqa: E402
 from app.db import Base, engine  # noqa: E402
 from app.main import app  # noqa: E402
+from app.services.tags import tag_index  # noqa: E402
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -113,6 +116,53 @@ async def test_filter_tags_by_query(client: AsyncClient):
     assert all("python" in tag["name"] for tag in tags)
 
 
+@pytest.mark.asyncio
+async def test_autocomplete_tags_prefix_first(client: AsyncClient):
+    """测试自动补全：前缀匹配优先，并按 limit 截断"""
+    for name in ["web-python", "python", "pytest", "python-advanced", "java"]:
+        await client.post("/tags", json={"name": name})
+
+    resp = await client.get("/tags", params={"q": "py", "limit": 10})
+    assert resp.status_code == 200
+    names = [tag["name"] for tag in resp.json()]
+    assert names == ["pytest", "python", "python-advanced", "web-python"]
+
+    resp = await client.get("/tags", params={"q": "py", "limit": 2})
+    assert [tag["name"] for tag in resp.json()] == ["pytest", "python"]
+
+    # limit 超过上限
+    resp = await client.get("/tags", params={"q": "py", "limit": 101})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_tags_from_memory_index(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    """测试自动补全：内存索引模式，并随写操作同步"""
+    monkeypatch.setattr(settings, "tag_index_enabled", True)
+    tag_index.invalidate()
+
+    await client.post("/tags", json={"name": "backend"})
+    await client.post("/tags", json={"name": "frontend"})
+
+    resp = await client.get("/tags", params={"q": "back", "limit": 5})
+    assert [tag["name"] for tag in resp.json()] == ["backend"]
+    assert tag_index.loaded
+
+    # 索引加载后，新建标签与 ticket 自动创建的标签都应同步进索引
+    await client.post("/tags", json={"name": "backlog"})
+    await client.post("/tickets", json={"title": "T", "tags": ["backup"]})
+
+    resp = await client.get("/tags", params={"q": "back", "limit": 5})
+    assert [tag["name"] for tag in resp.json()] == ["backend", "backlog", "backup"]
+
+    resp = await client.get("/tags", params={"q": "end", "limit": 5})
+    assert [tag["name"] for tag in resp.json()] == ["backend", "frontend"]
+
+    tag_index.invalidate()
+
+
 @pytest.mark.asyncio
 async def test_delete_tag(client: AsyncClient):
     """测试删除标签"""
@@ -1,13 +1,20 @@
+import json
 import os
+import uuid
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
 
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+os.environ["QUERY_BUDGET_ENFORCED"] = "true"
 
-from app.db import Base, engine  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
 from app.main import app  # noqa: E402
-from app.models import TicketStatus  # noqa: E402
+from app.models import Ticket, TicketStatus  # noqa: E402
+from app.schemas import TicketResponse, TicketsListResponse  # noqa: E402
+from app.services import tags as tag_service  # noqa: E402
+from app.services import tickets as ticket_service  # noqa: E402
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -230,6 +237,44 @@ async def test_filter_by_tags_and(client: AsyncClient):
     assert res.json()["total"] == 2  # A 和 B
 
 
+async def _ticket_tag_ids(ticket_id: str) -> set[uuid.UUID]:
+    async with SessionLocal() as session:
+        tag_ids = await session.scalar(
+            select(Ticket.tag_ids).where(Ticket.id == uuid.UUID(ticket_id))
+        )
+    return set(tag_ids)
+
+
+@pytest.mark.asyncio
+async def test_ticket_tag_ids_kept_in_sync(client: AsyncClient):
+    """测试 tickets.tag_ids 反规范化数组随标签变更同步"""
+    resp = await client.post("/tickets", json={"title": "A", "tags": ["x", "y"]})
+    ticket = resp.json()
+    ticket_id = ticket["id"]
+    assert await _ticket_tag_ids(ticket_id) == {
+        uuid.UUID(tag["id"]) for tag in ticket["tags"]
+    }
+
+    # 删除标签后，tag_ids 中对应的 id 被移除
+    x_id = next(uuid.UUID(t["id"]) for t in ticket["tags"] if t["name"] == "x")
+    async with SessionLocal() as session:
+        await tag_service.delete_tag(session, x_id)
+    assert x_id not in await _ticket_tag_ids(ticket_id)
+    assert len(await _ticket_tag_ids(ticket_id)) == 1
+
+
+@pytest.mark.asyncio
+async def test_filter_by_tags_unknown_or_duplicate(client: AsyncClient):
+    """测试标签过滤：不存在的标签返回空，重复标签不影响结果"""
+    await client.post("/tickets", json={"title": "A", "tags": ["x", "y"]})
+
+    res = await client.get("/tickets", params={"tags": "x,missing"})
+    assert res.json()["total"] == 0
+
+    res = await client.get("/tickets", params={"tags": "x,x"})
+    assert res.json()["total"] == 1
+
+
 @pytest.mark.asyncio
 async def test_filter_by_search_query(client: AsyncClient):
     """测试按标题搜索"""
@@ -278,6 +323,34 @@ async def test_filter_combined(client: AsyncClient):
     assert data["items"][0]["title"] == "Open Python"
 
 
+@pytest.mark.asyncio
+async def test_list_tickets_fast_path_matches_pydantic_output(client: AsyncClient):
+    """测试列表快速路径与 Pydantic 序列化结果逐字节一致"""
+    await client.post(
+        "/tickets",
+        json={"title": "中文标题", "description": "desc", "tags": ["b", "a", "c"]},
+    )
+    await client.post("/tickets", json={"title": "No tags"})
+
+    resp = await client.get("/tickets", params={"limit": 100})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+
+    async with SessionLocal() as session:
+        items, total = await ticket_service.list_tickets(
+            session, status=None, tags=[], q=None, limit=100, offset=0
+        )
+    expected = TicketsListResponse(
+        total=total, items=[TicketResponse.model_validate(item) for item in items]
+    ).model_dump(mode="json")
+    for item in expected["items"]:
+        item["tags"].sort(key=lambda tag: tag["name"])
+
+    assert resp.content == json.dumps(
+        expected, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
 # ========== Pagination Tests ==========
 
 
@@ -5,15 +5,22 @@ New database types can be added by implementing the DatabaseAdapter protocol
 and registering with the DatabaseAdapterFactory.
 """
 
-from .base import DatabaseAdapter, ConnectionInfo, QueryResult
+from .columnar import ColumnarResult
+from .base import CatalogProbeAdapter, CsvCopyAdapter, DatabaseAdapter, ConnectionInfo, QueryEstimate, QueryResult, QueryTimeoutError, ResultCursor
 from .factory import DatabaseAdapterFactory, get_adapter_factory
 from .postgresql import PostgreSQLAdapter
 from .mysql import MySQLAdapter
 
 __all__ = [
+    "CatalogProbeAdapter",
+    "ColumnarResult",
+    "CsvCopyAdapter",
     "DatabaseAdapter",
     "ConnectionInfo",
+    "QueryEstimate",
     "QueryResult",
+    "QueryTimeoutError",
+    "ResultCursor",
     "DatabaseAdapterFactory",
     "get_adapter_factory",
     "PostgreSQLAdapter",
@@ -4,14 +4,42 @@ This module defines the interface that all database adapters must implement,
 following the Interface Segregation Principle (ISP) and Dependency Inversion Principle (DIP).
 """
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import AbstractAsyncContextManager, nullcontext
 from dataclasses import dataclass
-from typing import Any, Protocol
+from typing import Any, Protocol, runtime_checkable
+
+from .columnar import ColumnarResult
 
 # sqlglot dialect can be a string or Dialect enum
 DialectType = str | Any  # str or sqlglot.dialects.Dialect
 
 
+# Extra time the client-side timeout allows on top of the server-side
+# statement timeout, so that the database normally aborts the query first
+CLIENT_TIMEOUT_GRACE_SECONDS = 1.0
+
+
+class QueryTimeoutError(ValueError):
+    """Raised when a query exceeds its statement timeout."""
+
+
+def client_timeout(timeout_ms: int | None) -> AbstractAsyncContextManager:
+    """Client-side backstop for the server-side statement timeout.
+    
+    Args:
+        timeout_ms: Statement timeout in milliseconds, None for no timeout
+        
+    Returns:
+        ``asyncio.timeout`` context (or a no-op context when there is no timeout)
+    """
+    if timeout_ms is None:
+        return nullcontext()
+    return asyncio.timeout(timeout_ms / 1000 + CLIENT_TIMEOUT_GRACE_SECONDS)
+
+
 @dataclass(frozen=True)
 class ConnectionInfo:
     """Database connection information.
@@ -83,6 +111,76 @@ class QueryResult:
         }
 
 
+@dataclass(frozen=True)
+class QueryEstimate:
+    """Planner estimate for a query, taken from EXPLAIN without running it.
+    
+    Costs are in the database's own planner units and are only comparable
+    between queries on the same database type.
+    """
+    
+    cost: float
+    rows: float
+
+
+class ResultCursor(Protocol):
+    """Server-side cursor over a query result, read page by page.
+    
+    The cursor holds its own database connection until it is closed.
+    """
+    
+    columns: list[str]
+    
+    async def fetch(self, n: int) -> list[list[Any]]:
+        """Fetch up to ``n`` more rows; fewer means the result is exhausted."""
+        ...
+    
+    async def close(self) -> None:
+        """Close the cursor and release its connection."""
+        ...
+
+
+@runtime_checkable
+class CsvCopyAdapter(Protocol):
+    """Adapter that can have the database itself format a result as CSV."""
+    
+    async def copy_query_csv(
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        output: Callable[[bytes], Awaitable[None]],
+        timeout_ms: int | None = None,
+    ) -> None:
+        """Stream the query result as CSV (with a header row) to ``output``.
+        
+        ``timeout_ms`` only limits the wait for the first chunk; the rest of
+        the COPY is paced by ``output``.
+        """
+        ...
+
+
+@runtime_checkable
+class CatalogProbeAdapter(Protocol):
+    """Adapter that can tell which tables changed without reading their columns."""
+    
+    async def fetch_catalog_signatures(
+        self, connection_info: ConnectionInfo
+    ) -> dict[str, str]:
+        """Fetch a change signature for every table and view.
+        
+        The signatures come from the system catalog and are cheap to read; a
+        table's signature changes when its definition (or, where the database
+        only tracks that, its data) changes.
+        
+        Args:
+            connection_info: Connection parameters
+            
+        Returns:
+            Signature by "schema.table", for the tables ``fetch_metadata`` returns
+        """
+        ...
+
+
 class DatabaseAdapter(Protocol):
     """Protocol defining the interface for database adapters.
     
@@ -121,29 +219,116 @@ class DatabaseAdapter(Protocol):
         ...
     
     async def execute_query(
-        self, connection_info: ConnectionInfo, sql: str
-    ) -> QueryResult:
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        timeout_ms: int | None = None,
+        on_connect: Callable[[int], None] | None = None,
+    ) -> ColumnarResult:
         """Execute a SQL SELECT query and return results.
         
+        The timeout is enforced by the database server and, as a backstop, on
+        the client. If the calling task is cancelled the statement is cancelled
+        on the server too.
+        
         Args:
             connection_info: Connection parameters
             sql: SQL SELECT query to execute
+            timeout_ms: Statement timeout in milliseconds, None for no timeout
+            on_connect: Called with the server-side session id (see ``cancel_query``)
+                once the connection is established
             
         Returns:
-            QueryResult containing columns, rows, and row count
+            ColumnarResult containing columns, rows, and row count
             
         Raises:
+            QueryTimeoutError: If the query exceeds the timeout
             ValueError: If query execution fails
         """
         ...
     
+    async def cancel_query(
+        self, connection_info: ConnectionInfo, backend_id: int
+    ) -> bool:
+        """Cancel the statement running in another session.
+        
+        Args:
+            connection_info: Connection parameters
+            backend_id: Server-side session id passed to ``on_connect``
+            
+        Returns:
+            True if the cancel request was delivered, False otherwise
+        """
+        ...
+    
+    async def open_cursor(
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        timeout_ms: int | None = None,
+        idle_timeout_seconds: float | None = None,
+    ) -> ResultCursor:
+        """Execute a SQL SELECT query behind a server-side cursor.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to execute
+            timeout_ms: Timeout for each fetch in milliseconds, None for no timeout
+            idle_timeout_seconds: How long the server may keep the cursor open
+                between fetches before dropping it, where the database supports it
+            
+        Returns:
+            Open ResultCursor positioned before the first row
+            
+        Raises:
+            ValueError: If the query cannot be executed
+        """
+        ...
+    
+    async def explain_query(
+        self, connection_info: ConnectionInfo, sql: str
+    ) -> str:
+        """Return the estimated execution plan of a query without running it.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to explain
+            
+        Returns:
+            Plan as a JSON document string
+            
+        Raises:
+            ValueError: If the plan cannot be obtained
+        """
+        ...
+    
+    async def estimate_query(
+        self, connection_info: ConnectionInfo, sql: str
+    ) -> QueryEstimate:
+        """Return the planner's cost and row estimates for a query.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to estimate
+            
+        Returns:
+            QueryEstimate from the query's EXPLAIN plan
+            
+        Raises:
+            ValueError: If the plan cannot be obtained
+        """
+        ...
+    
     async def fetch_metadata(
-        self, connection_info: ConnectionInfo
+        self,
+        connection_info: ConnectionInfo,
+        tables: Sequence[tuple[str, str]] | None = None,
     ) -> list[dict[str, Any]]:
         """Fetch database metadata (tables, views, columns).
         
         Args:
             connection_info: Connection parameters
+            tables: Only these (schema, table) pairs, None for all of them
             
         Returns:
             List of dictionaries containing table/view metadata with columns
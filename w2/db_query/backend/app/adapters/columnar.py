@@ -0,0 +1,180 @@
+"""Column-oriented query results.
+
+Drivers hand rows over as tuples (asyncpg ``Record``, aiomysql's default
+cursor). :class:`ColumnarResult` transposes them once into one sequence per
+column instead of keeping a list per row: integer and float columns without
+NULLs become typed arrays (NumPy arrays when NumPy is installed, otherwise
+:mod:`array`), other columns stay tuples of the driver's values. Numeric cells
+then cost 8 bytes instead of a pointer plus a boxed Python object, and no
+per-row list or dict is allocated.
+
+The result is a read-only mapping with the ``columns`` / ``rows`` /
+``row_count`` keys of :meth:`QueryResult.to_dict`, so existing callers keep
+working; ``rows`` is only built when it is asked for. :meth:`to_json` encodes
+the API response straight from the columns with orjson, which writes
+ints, floats, strings, UUIDs, timestamps and (Postgres array) lists natively.
+Other values go through :func:`_default`: decimals as strings, bytes as text
+(or PostgreSQL's ``\\x`` hex form when not UTF-8), asyncpg ranges as
+``{"lower", "upper", "lowerInc", "upperInc", "isEmpty"}`` objects, and
+anything else as Pydantic would serialize it.
+"""
+
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from asyncpg import Range
+from pydantic_core import to_jsonable_python
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+_ARRAY_CODES = {int: "q", float: "d"}
+
+
+def _typed_column(values: tuple[Any, ...]) -> Sequence[Any]:
+    """Pack a column of non-NULL ints or floats into a typed array.
+
+    Database columns are homogeneous, so the first value decides the type.
+    """
+    code = _ARRAY_CODES.get(type(values[0])) if values else None
+    if code is None or None in values:
+        return values
+    try:
+        if np is not None:
+            return np.array(values, dtype=np.int64 if code == "q" else np.float64)
+        return array(code, values)
+    except (TypeError, OverflowError):
+        # Wider than 64 bits, or not actually homogeneous
+        return values
+
+
+def _as_list(column: Sequence[Any]) -> Sequence[Any]:
+    # Typed arrays yield NumPy scalars (or are slower to iterate); unbox them once
+    return column.tolist() if hasattr(column, "tolist") else column
+
+
+def _encode_bytes(value: bytes) -> str:
+    try:
+        return value.decode()
+    except UnicodeDecodeError:
+        # Binary data: PostgreSQL's hex output format for bytea
+        return "\\x" + value.hex()
+
+
+def _encode_range(value: Range) -> dict[str, Any]:
+    return {
+        "lower": value.lower,
+        "upper": value.upper,
+        "lowerInc": value.lower_inc,
+        "upperInc": value.upper_inc,
+        "isEmpty": value.isempty,
+    }
+
+
+_ENCODERS = {
+    Decimal: str,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+    Range: _encode_range,
+}
+
+
+def _default(value: Any) -> Any:
+    """orjson fallback for values it cannot write natively."""
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    return to_jsonable_python(value)
+
+
+class ColumnarResult(Mapping[str, Any]):
+    """Query result stored column by column."""
+
+    __slots__ = ("columns", "data", "row_count", "_rows")
+
+    def __init__(self, columns: list[str], data: list[Sequence[Any]], row_count: int) -> None:
+        self.columns = columns
+        self.data = data
+        self.row_count = row_count
+        self._rows: list[list[Any]] | None = None
+
+    @classmethod
+    def from_records(cls, columns: list[str], records: Sequence[Sequence[Any]]) -> "ColumnarResult":
+        """Build a result from driver row tuples.
+
+        Args:
+            columns: Column names
+            records: Rows as tuples (or tuple-like records)
+
+        Returns:
+            ColumnarResult with one typed array or tuple per column
+        """
+        if not records:
+            return cls(columns, [() for _ in columns], 0)
+        return cls(columns, [_typed_column(values) for values in zip(*records)], len(records))
+
+    @property
+    def rows(self) -> list[list[Any]]:
+        """Row-oriented copy of the result, built on first access."""
+        if self._rows is None:
+            self._rows = [list(row) for row in self.iter_rows()]
+        return self._rows
+
+    def iter_rows(self) -> Iterator[tuple[Any, ...]]:
+        """Iterate over the rows as tuples of plain Python values."""
+        if not self.data:
+            return iter(())
+        return zip(*(_as_list(column) for column in self.data))
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Values of one column (a typed array for numeric columns)."""
+        return self.data[self.columns.index(name)]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to the row-oriented dictionary format of ``QueryResult``."""
+        return {
+            "columns": self.columns,
+            "rows": self.rows,
+            "row_count": self.row_count,
+        }
+
+    def to_json(self, **extra: Any) -> bytes:
+        """Encode as the camelCase API response without building row lists.
+
+        Args:
+            **extra: Additional top-level fields, appended after ``rowCount``
+
+        Returns:
+            JSON document ``{"columns", "rows", "rowCount", ...extra}``
+        """
+        return orjson.dumps(
+            {
+                "columns": self.columns,
+                "rows": list(self.iter_rows()),
+                "rowCount": self.row_count,
+                **extra,
+            },
+            default=_default,
+            # Timestamps as Pydantic writes them ("Z" for UTC)
+            option=orjson.OPT_UTC_Z,
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "columns":
+            return self.columns
+        if key == "rows":
+            return self.rows
+        if key == "row_count":
+            return self.row_count
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("columns", "rows", "row_count"))
+
+    def __len__(self) -> int:
+        return 3
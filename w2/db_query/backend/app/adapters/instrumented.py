@@ -0,0 +1,55 @@
+"""Instrumented wrappers for the native database drivers.
+
+The adapters talk to user databases through asyncpg and aiomysql directly,
+bypassing SQLAlchemy, so these thin proxies record every statement into the
+request's query stats (see :mod:`app.instrumentation`). Everything other than
+the statement-executing methods is delegated to the wrapped object unchanged.
+"""
+
+from typing import Any
+
+from ..instrumentation import TARGET_DB, track_query
+
+
+class InstrumentedConnection:
+    """Proxy around an ``asyncpg.Connection`` that records executed statements."""
+
+    def __init__(self, connection: Any) -> None:
+        self._connection = connection
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        with track_query(TARGET_DB, query):
+            return await self._connection.fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        with track_query(TARGET_DB, query):
+            return await self._connection.fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        with track_query(TARGET_DB, query):
+            return await self._connection.fetchval(query, *args, **kwargs)
+
+    async def execute(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        with track_query(TARGET_DB, query):
+            return await self._connection.execute(query, *args, **kwargs)
+
+
+class InstrumentedCursor:
+    """Proxy around an ``aiomysql.Cursor`` that records executed statements."""
+
+    def __init__(self, cursor: Any) -> None:
+        self._cursor = cursor
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    async def execute(self, query: str, args: Any = None) -> Any:
+        with track_query(TARGET_DB, query):
+            return await self._cursor.execute(query, args)
+
+    async def executemany(self, query: str, args: Any) -> Any:
+        with track_query(TARGET_DB, query):
+            return await self._cursor.executemany(query, args)
@@ -1,6 +1,9 @@
 """MySQL database adapter implementation."""
 
+import asyncio
+import json
 import logging
+from collections.abc import Callable, Sequence
 from typing import Any
 from urllib.parse import urlparse
 
@@ -9,10 +12,68 @@ from sqlglot import dialects
 
 from .base import DialectType
 
-from .base import ConnectionInfo, DatabaseAdapter, QueryResult
+from ..instrumentation import TARGET_DB, track_query
+from .base import ConnectionInfo, DatabaseAdapter, QueryEstimate, QueryTimeoutError, client_timeout
+from .columnar import ColumnarResult
+from .instrumented import InstrumentedCursor
 
 logger = logging.getLogger(__name__)
 
+# ER_QUERY_TIMEOUT (MySQL max_execution_time) and ER_STATEMENT_TIMEOUT (MariaDB max_statement_time)
+_TIMEOUT_ERROR_CODES = {3024, 1969}
+
+
+class MySQLCursor:
+    """Unbuffered (``SSCursor``) result streamed from its own connection."""
+    
+    def __init__(
+        self,
+        adapter: "MySQLAdapter",
+        connection_info: ConnectionInfo,
+        conn: aiomysql.Connection,
+        cursor: aiomysql.SSCursor,
+        sql: str,
+        timeout_ms: int | None,
+    ) -> None:
+        self._adapter = adapter
+        self._connection_info = connection_info
+        self._conn = conn
+        self._cursor = cursor
+        self._sql = sql
+        self._timeout_ms = timeout_ms
+        self._exhausted = False
+        self.columns = [column[0] for column in cursor.description or []]
+    
+    async def fetch(self, n: int) -> list[list[Any]]:
+        """Fetch up to ``n`` more rows from the stream.
+        
+        Raises:
+            QueryTimeoutError: If the fetch exceeds the timeout
+            ValueError: If the fetch fails
+        """
+        try:
+            with track_query(TARGET_DB, self._sql):
+                async with client_timeout(self._timeout_ms):
+                    rows = await self._cursor.fetchmany(n)
+        except TimeoutError as e:
+            raise QueryTimeoutError(
+                f"Fetch exceeded the {self._timeout_ms}ms timeout"
+            ) from e
+        except Exception as e:
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+        if len(rows) < n:
+            self._exhausted = True
+        return [list(row) for row in rows]
+    
+    async def close(self) -> None:
+        """Close the connection without reading the rest of the result."""
+        if not self._exhausted:
+            # Closing an SSCursor would read all remaining rows first
+            await self._adapter.cancel_query(
+                self._connection_info, self._conn.thread_id()
+            )
+        self._conn.close()
+
 
 class MySQLAdapter:
     """MySQL database adapter.
@@ -66,15 +127,24 @@ class MySQLAdapter:
             database=parsed.path.lstrip("/") if parsed.path else None,
         )
     
-    async def _get_connection(self, connection_info: ConnectionInfo) -> aiomysql.Connection:
+    async def _get_connection(
+        self, connection_info: ConnectionInfo, timeout_ms: int | None = None
+    ) -> aiomysql.Connection:
         """Create MySQL connection.
         
         Args:
             connection_info: Connection parameters
+            timeout_ms: Session statement timeout in milliseconds (SELECT only)
             
         Returns:
             aiomysql.Connection instance
         """
+        init_command = None
+        if timeout_ms is not None:
+            if connection_info.url.lower().startswith("mariadb"):
+                init_command = f"SET SESSION max_statement_time = {timeout_ms / 1000}"
+            else:
+                init_command = f"SET SESSION max_execution_time = {int(timeout_ms)}"
         return await aiomysql.connect(
             host=connection_info.host,
             port=connection_info.port,
@@ -82,6 +152,7 @@ class MySQLAdapter:
             password=connection_info.password,
             db=connection_info.database,
             charset="utf8mb4",
+            init_command=init_command,
         )
     
     async def test_connection(self, connection_info: ConnectionInfo) -> bool:
@@ -103,75 +174,336 @@ class MySQLAdapter:
             return False
     
     async def execute_query(
-        self, connection_info: ConnectionInfo, sql: str
-    ) -> QueryResult:
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        timeout_ms: int | None = None,
+        on_connect: Callable[[int], None] | None = None,
+    ) -> ColumnarResult:
         """Execute a SQL SELECT query on MySQL.
         
+        The timeout is applied as the session's ``max_execution_time``
+        (``max_statement_time`` on MariaDB), with ``asyncio.timeout`` as a
+        client-side backstop. aiomysql does not cancel the statement when the
+        task is cancelled, so a client timeout or cancellation issues
+        ``KILL QUERY`` for the session before the connection is closed.
+        
         Args:
             connection_info: Connection parameters
             sql: SQL SELECT query to execute
+            timeout_ms: Statement timeout in milliseconds, None for no timeout
+            on_connect: Called with the connection (thread) id once connected
             
         Returns:
-            QueryResult containing columns, rows, and row count
+            ColumnarResult containing columns, rows, and row count
             
         Raises:
+            QueryTimeoutError: If the query exceeds the timeout
             ValueError: If query execution fails
         """
         try:
-            conn = await self._get_connection(connection_info)
+            conn = await self._get_connection(connection_info, timeout_ms)
             try:
-                cur = await conn.cursor(aiomysql.DictCursor)
-                await cur.execute(sql)
-                rows = await cur.fetchall()
-                await cur.close()
+                thread_id = conn.thread_id()
+                if on_connect is not None:
+                    on_connect(thread_id)
+                try:
+                    async with client_timeout(timeout_ms):
+                        # Plain cursor: rows come back as tuples, not one dict per row
+                        cur = InstrumentedCursor(await conn.cursor())
+                        await cur.execute(sql)
+                        rows = await cur.fetchall()
+                        columns = [column[0] for column in cur.description or []]
+                        await cur.close()
+                except (asyncio.CancelledError, TimeoutError):
+                    await asyncio.shield(self.cancel_query(connection_info, thread_id))
+                    raise
                 
                 if not rows:
-                    return QueryResult(columns=[], rows=[], row_count=0)
-                
-                columns = list(rows[0].keys())
-                rows_data = [list(row.values()) for row in rows]
+                    return ColumnarResult.from_records([], [])
                 
-                return QueryResult(
-                    columns=columns,
-                    rows=rows_data,
-                    row_count=len(rows_data),
-                )
+                return ColumnarResult.from_records(columns, rows)
             finally:
                 conn.close()
                 await conn.ensure_closed()
         except Exception as e:
+            if isinstance(e, TimeoutError) or (
+                isinstance(e, aiomysql.OperationalError)
+                and e.args
+                and e.args[0] in _TIMEOUT_ERROR_CODES
+            ):
+                logger.warning(f"MySQL query exceeded the {timeout_ms}ms timeout")
+                raise QueryTimeoutError(
+                    f"Query exceeded the {timeout_ms}ms statement timeout"
+                ) from e
             logger.error(f"MySQL query execution failed: {e}")
             raise ValueError(f"Query execution failed: {str(e)}") from e
     
-    async def fetch_metadata(
+    async def open_cursor(
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        timeout_ms: int | None = None,
+        idle_timeout_seconds: float | None = None,
+    ) -> MySQLCursor:
+        """Start streaming a query's result through an unbuffered cursor.
+        
+        ``max_execution_time`` is not set: the statement lasts as long as the
+        result is being read, so it would limit how long a user may page.
+        The timeout is applied to each fetch on the client instead, and the
+        server's ``net_write_timeout`` ends abandoned streams.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to execute
+            timeout_ms: Timeout for each fetch in milliseconds, None for no timeout
+            idle_timeout_seconds: Unused, MySQL has no per-session idle timeout
+                for an open result
+            
+        Returns:
+            Open MySQLCursor
+            
+        Raises:
+            ValueError: If the query cannot be executed
+        """
+        try:
+            conn = await self._get_connection(connection_info)
+        except Exception as e:
+            logger.error(f"MySQL cursor connection failed: {e}")
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+        try:
+            cursor = await conn.cursor(aiomysql.SSCursor)
+            with track_query(TARGET_DB, sql):
+                async with client_timeout(timeout_ms):
+                    await cursor.execute(sql)
+        except Exception as e:
+            conn.close()
+            logger.error(f"MySQL cursor open failed: {e}")
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+        return MySQLCursor(self, connection_info, conn, cursor, sql, timeout_ms)
+    
+    async def cancel_query(
+        self, connection_info: ConnectionInfo, backend_id: int
+    ) -> bool:
+        """Cancel the statement running in another connection (``KILL QUERY``).
+        
+        Args:
+            connection_info: Connection parameters
+            backend_id: Connection (thread) id of the session running the statement
+            
+        Returns:
+            True if the statement was killed, False otherwise
+        """
+        try:
+            conn = await self._get_connection(connection_info)
+            try:
+                cur = InstrumentedCursor(await conn.cursor())
+                await cur.execute(f"KILL QUERY {int(backend_id)}")
+                await cur.close()
+                return True
+            finally:
+                conn.close()
+                await conn.ensure_closed()
+        except Exception as e:
+            logger.warning(f"MySQL cancel of connection {backend_id} failed: {e}")
+            return False
+    
+    async def explain_query(
+        self, connection_info: ConnectionInfo, sql: str
+    ) -> str:
+        """Return the MySQL plan of a query as JSON (EXPLAIN FORMAT=JSON).
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to explain
+            
+        Returns:
+            Plan as a JSON document string
+            
+        Raises:
+            ValueError: If the plan cannot be obtained
+        """
+        try:
+            conn = await self._get_connection(connection_info)
+            try:
+                cur = InstrumentedCursor(await conn.cursor())
+                await cur.execute(f"EXPLAIN FORMAT=JSON {sql}")
+                row = await cur.fetchone()
+                await cur.close()
+                return row[0] if row else "{}"
+            finally:
+                conn.close()
+                await conn.ensure_closed()
+        except Exception as e:
+            logger.warning(f"MySQL EXPLAIN failed: {e}")
+            raise ValueError(f"EXPLAIN failed: {str(e)}") from e
+    
+    async def estimate_query(
+        self, connection_info: ConnectionInfo, sql: str
+    ) -> QueryEstimate:
+        """Return the query cost and the largest per-table row estimate.
+        
+        MySQL's JSON plan has no row estimate for the whole query, so the
+        largest ``rows_produced_per_join`` of any table in the plan is used.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to estimate
+            
+        Returns:
+            QueryEstimate with ``query_cost`` and the row estimate
+            
+        Raises:
+            ValueError: If the plan cannot be obtained
+        """
+        plan = json.loads(await self.explain_query(connection_info, sql))
+        query_block = plan.get("query_block", {})
+        cost = float(query_block.get("cost_info", {}).get("query_cost", 0))
+        
+        rows = 0.0
+        stack: list[Any] = [query_block]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if "rows_produced_per_join" in node:
+                    rows = max(rows, float(node["rows_produced_per_join"]))
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        return QueryEstimate(cost=cost, rows=rows)
+    
+    async def fetch_catalog_signatures(
         self, connection_info: ConnectionInfo
+    ) -> dict[str, str]:
+        """Fetch a change signature for every table and view.
+        
+        A table is signed with a hash of its columns' names, types,
+        nullability, defaults and extras from ``information_schema.columns``,
+        which changes with every ALTER TABLE (INSTANT ones included) but not
+        with writes; views also with a hash of their definition.
+        
+        Args:
+            connection_info: Connection parameters
+            
+        Returns:
+            Signature by "schema.table"
+        """
+        conn = await self._get_connection(connection_info)
+        try:
+            cur = InstrumentedCursor(await conn.cursor(aiomysql.DictCursor))
+            # GROUP_CONCAT is cut at 1024 bytes by default
+            await cur.execute("SET SESSION group_concat_max_len = 16777216")
+            query = """
+            SELECT 
+                t.table_schema AS table_schema,
+                t.table_name AS table_name,
+                CONCAT_WS(
+                    ':',
+                    t.table_type,
+                    MD5(GROUP_CONCAT(
+                        CONCAT_WS(
+                            '|', c.column_name, c.column_type, c.is_nullable,
+                            QUOTE(c.column_default), c.extra
+                        )
+                        ORDER BY c.ordinal_position SEPARATOR ','
+                    )),
+                    MAX(MD5(v.view_definition))
+                ) AS signature
+            FROM information_schema.tables t
+            LEFT JOIN information_schema.columns c
+                ON c.table_schema = t.table_schema
+                AND c.table_name = t.table_name
+            LEFT JOIN information_schema.views v
+                ON v.table_schema = t.table_schema
+                AND v.table_name = t.table_name
+            WHERE t.table_schema NOT IN ('information_schema', 'performance_schema', 'mysql', 'sys')
+            GROUP BY t.table_schema, t.table_name, t.table_type;
+            """
+            await cur.execute(query)
+            rows = await cur.fetchall()
+            await cur.close()
+            return {
+                f"{row['table_schema']}.{row['table_name']}": row["signature"] or ""
+                for row in rows
+            }
+        finally:
+            conn.close()
+            await conn.ensure_closed()
+    
+    async def fetch_metadata(
+        self,
+        connection_info: ConnectionInfo,
+        tables: Sequence[tuple[str, str]] | None = None,
     ) -> list[dict[str, Any]]:
         """Fetch MySQL database metadata.
         
         Args:
             connection_info: Connection parameters
+            tables: Only these (schema, table) pairs, None for all of them
             
         Returns:
             List of dictionaries containing table/view metadata with columns
         """
+        if tables is not None and not tables:
+            return []
         conn = await self._get_connection(connection_info)
         try:
-            cur = await conn.cursor(aiomysql.DictCursor)
+            cur = InstrumentedCursor(await conn.cursor(aiomysql.DictCursor))
+            
+            params: tuple[str, ...] = ()
+            table_filter = ""
+            if tables is not None:
+                params = tuple(value for pair in tables for value in pair)
+                placeholders = ", ".join(["(%s, %s)"] * len(tables))
+                table_filter = f"\n            AND (table_schema, table_name) IN ({placeholders})"
             
             # Query for tables and views
-            query = """
+            query = f"""
             SELECT 
                 t.table_schema,
                 t.table_name,
                 t.table_type
             FROM information_schema.tables t
-            WHERE t.table_schema NOT IN ('information_schema', 'performance_schema', 'mysql', 'sys')
+            WHERE t.table_schema NOT IN ('information_schema', 'performance_schema', 'mysql', 'sys'){table_filter}
             ORDER BY t.table_schema, t.table_name;
             """
             
-            await cur.execute(query)
+            await cur.execute(query, params or None)
             rows = await cur.fetchall()
             
+            # Fetch columns for all tables in one round trip instead of one
+            # query per table, then group them in memory
+            columns_query = f"""
+            SELECT 
+                table_schema,
+                table_name,
+                column_name,
+                data_type,
+                is_nullable,
+                column_default,
+                ordinal_position
+            FROM information_schema.columns
+            WHERE table_schema NOT IN ('information_schema', 'performance_schema', 'mysql', 'sys'){table_filter}
+            ORDER BY table_schema, table_name, ordinal_position;
+            """
+            await cur.execute(columns_query, params or None)
+            column_rows = await cur.fetchall()
+            
+            columns_by_table: dict[tuple[str, str], list[dict[str, Any]]] = {}
+            for col in column_rows:
+                key = (
+                    col.get("table_schema") or col.get("TABLE_SCHEMA", ""),
+                    col.get("table_name") or col.get("TABLE_NAME", ""),
+                )
+                columns_by_table.setdefault(key, []).append(
+                    {
+                        "column_name": col.get("column_name") or col.get("COLUMN_NAME", ""),
+                        "data_type": col.get("data_type") or col.get("DATA_TYPE", ""),
+                        "is_nullable": col.get("is_nullable") or col.get("IS_NULLABLE", "NO"),
+                        "column_default": col.get("column_default") or col.get("COLUMN_DEFAULT"),
+                    }
+                )
+            
             metadata = []
             for row in rows:
                 # Handle case where DictCursor might return uppercase keys
@@ -182,37 +514,12 @@ class MySQLAdapter:
                 if not table_schema or not table_name:
                     continue
                 
-                # Fetch columns separately for each table
-                columns_query = """
-                SELECT 
-                    column_name,
-                    data_type,
-                    is_nullable,
-                    column_default,
-                    ordinal_position
-                FROM information_schema.columns
-                WHERE table_schema = %s AND table_name = %s
-                ORDER BY ordinal_position;
-                """
-                await cur.execute(columns_query, (table_schema, table_name))
-                column_rows = await cur.fetchall()
-                
-                columns = [
-                    {
-                        "column_name": col.get("column_name") or col.get("COLUMN_NAME", ""),
-                        "data_type": col.get("data_type") or col.get("DATA_TYPE", ""),
-                        "is_nullable": col.get("is_nullable") or col.get("IS_NULLABLE", "NO"),
-                        "column_default": col.get("column_default") or col.get("COLUMN_DEFAULT"),
-                    }
-                    for col in column_rows
-                ]
-                
                 metadata.append(
                     {
                         "schema": table_schema,
                         "name": table_name,
                         "type": "table" if table_type == "BASE TABLE" else "view",
-                        "columns": columns,
+                        "columns": columns_by_table.get((table_schema, table_name), []),
                     }
                 )
             
@@ -263,7 +570,7 @@ class MySQLAdapter:
         """
         conn = await self._get_connection(connection_info)
         try:
-            cur = await conn.cursor(aiomysql.DictCursor)
+            cur = InstrumentedCursor(await conn.cursor(aiomysql.DictCursor))
             query = """
             SELECT 
                 column_name,
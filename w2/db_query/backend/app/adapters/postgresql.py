@@ -1,6 +1,9 @@
 """PostgreSQL database adapter implementation."""
 
+import asyncio
+import json
 import logging
+from collections.abc import Awaitable, Callable, Sequence
 from typing import Any
 
 import asyncpg
@@ -8,11 +11,70 @@ from sqlglot import dialects
 
 from .base import DialectType
 
-from .base import ConnectionInfo, DatabaseAdapter, QueryResult
+from ..instrumentation import TARGET_DB, track_query
+from .base import ConnectionInfo, DatabaseAdapter, QueryEstimate, QueryTimeoutError, client_timeout
+from .columnar import ColumnarResult
+from .instrumented import InstrumentedConnection
 
 logger = logging.getLogger(__name__)
 
 
+def _is_statement_timeout(error: Exception) -> bool:
+    return isinstance(error, TimeoutError) or (
+        isinstance(error, asyncpg.exceptions.QueryCanceledError)
+        and "statement timeout" in str(error)
+    )
+
+
+class PostgreSQLCursor:
+    """Server-side cursor inside a read-only transaction on its own connection."""
+    
+    def __init__(
+        self,
+        conn: asyncpg.Connection,
+        transaction: Any,
+        cursor: Any,
+        columns: list[str],
+        sql: str,
+        timeout_ms: int | None,
+    ) -> None:
+        self._conn = conn
+        self._transaction = transaction
+        self._cursor = cursor
+        self._sql = sql
+        self._timeout_ms = timeout_ms
+        self.columns = columns
+    
+    async def fetch(self, n: int) -> list[list[Any]]:
+        """Fetch up to ``n`` more rows (``FETCH n`` on the portal).
+        
+        Raises:
+            QueryTimeoutError: If the fetch exceeds the timeout
+            ValueError: If the fetch fails
+        """
+        try:
+            with track_query(TARGET_DB, self._sql):
+                async with client_timeout(self._timeout_ms):
+                    records = await self._cursor.fetch(n)
+        except Exception as e:
+            if _is_statement_timeout(e):
+                raise QueryTimeoutError(
+                    f"Fetch exceeded the {self._timeout_ms}ms statement timeout"
+                ) from e
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+        return [list(record.values()) for record in records]
+    
+    async def close(self) -> None:
+        """Roll back the cursor's transaction and close its connection."""
+        try:
+            if not self._conn.is_closed():
+                await self._transaction.rollback()
+        except Exception as e:
+            logger.debug(f"PostgreSQL cursor rollback failed: {e}")
+        finally:
+            await self._conn.close()
+
+
 class PostgreSQLAdapter:
     """PostgreSQL database adapter.
     
@@ -61,56 +123,310 @@ class PostgreSQLAdapter:
             return False
     
     async def execute_query(
-        self, connection_info: ConnectionInfo, sql: str
-    ) -> QueryResult:
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        timeout_ms: int | None = None,
+        on_connect: Callable[[int], None] | None = None,
+    ) -> ColumnarResult:
         """Execute a SQL SELECT query on PostgreSQL.
         
+        The timeout is applied as the session's ``statement_timeout``, with
+        ``asyncio.timeout`` as a client-side backstop. When the fetch is
+        cancelled (client timeout or task cancellation) asyncpg sends a cancel
+        request for the running statement before the connection is closed.
+        
         Args:
             connection_info: Connection parameters
             sql: SQL SELECT query to execute
+            timeout_ms: Statement timeout in milliseconds, None for no timeout
+            on_connect: Called with the backend PID once connected
             
         Returns:
-            QueryResult containing columns, rows, and row count
+            ColumnarResult containing columns, rows, and row count
             
         Raises:
+            QueryTimeoutError: If the query exceeds the timeout
             ValueError: If query execution fails
         """
+        server_settings = (
+            {"statement_timeout": str(timeout_ms)} if timeout_ms is not None else None
+        )
         try:
-            conn = await asyncpg.connect(connection_info.url)
+            conn = InstrumentedConnection(
+                await asyncpg.connect(connection_info.url, server_settings=server_settings)
+            )
             try:
-                rows = await conn.fetch(sql)
+                if on_connect is not None:
+                    on_connect(conn.get_server_pid())
+                async with client_timeout(timeout_ms):
+                    rows = await conn.fetch(sql)
                 
                 if not rows:
-                    return QueryResult(columns=[], rows=[], row_count=0)
+                    return ColumnarResult.from_records([], [])
                 
-                columns = list(rows[0].keys())
-                rows_data = [list(row.values()) for row in rows]
-                
-                return QueryResult(
-                    columns=columns,
-                    rows=rows_data,
-                    row_count=len(rows_data),
-                )
+                # Records are tuple-like: transposed into columns without per-row lists
+                return ColumnarResult.from_records(list(rows[0].keys()), rows)
             finally:
                 await conn.close()
         except Exception as e:
+            if _is_statement_timeout(e):
+                logger.warning(f"PostgreSQL query exceeded the {timeout_ms}ms timeout")
+                raise QueryTimeoutError(
+                    f"Query exceeded the {timeout_ms}ms statement timeout"
+                ) from e
             logger.error(f"PostgreSQL query execution failed: {e}")
             raise ValueError(f"Query execution failed: {str(e)}") from e
     
-    async def fetch_metadata(
+    async def open_cursor(
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        timeout_ms: int | None = None,
+        idle_timeout_seconds: float | None = None,
+    ) -> PostgreSQLCursor:
+        """Open a server-side cursor for a query in a read-only transaction.
+        
+        ``statement_timeout`` applies to each fetch, and
+        ``idle_in_transaction_session_timeout`` makes the server drop the
+        cursor's session if it is abandoned between fetches.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to execute
+            timeout_ms: Timeout for each fetch in milliseconds, None for no timeout
+            idle_timeout_seconds: Idle time after which the server ends the session
+            
+        Returns:
+            Open PostgreSQLCursor
+            
+        Raises:
+            ValueError: If the query cannot be executed
+        """
+        server_settings = {}
+        if timeout_ms is not None:
+            server_settings["statement_timeout"] = str(timeout_ms)
+        if idle_timeout_seconds is not None:
+            server_settings["idle_in_transaction_session_timeout"] = str(
+                int(idle_timeout_seconds * 1000)
+            )
+        try:
+            conn = await asyncpg.connect(
+                connection_info.url, server_settings=server_settings or None
+            )
+        except Exception as e:
+            logger.error(f"PostgreSQL cursor connection failed: {e}")
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+        try:
+            transaction = conn.transaction(readonly=True)
+            await transaction.start()
+            with track_query(TARGET_DB, sql):
+                statement = await conn.prepare(sql)
+                cursor = await statement.cursor()
+            columns = [attribute.name for attribute in statement.get_attributes()]
+        except Exception as e:
+            await conn.close()
+            logger.error(f"PostgreSQL cursor open failed: {e}")
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+        return PostgreSQLCursor(conn, transaction, cursor, columns, sql, timeout_ms)
+    
+    async def copy_query_csv(
+        self,
+        connection_info: ConnectionInfo,
+        sql: str,
+        output: Callable[[bytes], Awaitable[None]],
+        timeout_ms: int | None = None,
+    ) -> None:
+        """Stream a query's result as CSV with ``COPY (query) TO STDOUT``.
+        
+        The server formats the CSV (with a header row) and ``output`` is
+        awaited with each chunk as it arrives, so a slow consumer slows the
+        COPY down instead of buffering the result. For that reason the
+        timeout only runs until the first chunk: it is enforced client-side
+        (cancelling the COPY) rather than with ``statement_timeout``, which
+        would also count the time the client takes to download the file.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to export
+            output: Coroutine function called with each chunk of CSV data
+            timeout_ms: Time allowed until the first chunk, None for no timeout
+            
+        Raises:
+            QueryTimeoutError: If no data arrived within the timeout
+            ValueError: If the query fails
+        """
+        timeout = timeout_ms / 1000 if timeout_ms is not None else None
+        try:
+            conn = await asyncpg.connect(connection_info.url)
+            try:
+                async with asyncio.timeout(timeout) as deadline:
+                    async def forward(chunk: bytes) -> None:
+                        deadline.reschedule(None)
+                        await output(chunk)
+
+                    with track_query(TARGET_DB, sql):
+                        async with conn.transaction(readonly=True):
+                            await conn.copy_from_query(sql, output=forward, format="csv", header=True)
+            finally:
+                await conn.close()
+        except Exception as e:
+            if _is_statement_timeout(e):
+                raise QueryTimeoutError(
+                    f"Export returned no data within the {timeout_ms}ms timeout"
+                ) from e
+            logger.error(f"PostgreSQL COPY failed: {e}")
+            raise ValueError(f"Query execution failed: {str(e)}") from e
+    
+    async def cancel_query(
+        self, connection_info: ConnectionInfo, backend_id: int
+    ) -> bool:
+        """Cancel the statement running in another backend (``pg_cancel_backend``).
+        
+        Args:
+            connection_info: Connection parameters
+            backend_id: Backend PID of the session running the statement
+            
+        Returns:
+            True if the cancel signal was sent, False otherwise
+        """
+        try:
+            conn = InstrumentedConnection(await asyncpg.connect(connection_info.url))
+            try:
+                return bool(
+                    await conn.fetchval("SELECT pg_cancel_backend($1)", backend_id)
+                )
+            finally:
+                await conn.close()
+        except Exception as e:
+            logger.warning(f"PostgreSQL cancel of backend {backend_id} failed: {e}")
+            return False
+    
+    async def explain_query(
+        self, connection_info: ConnectionInfo, sql: str
+    ) -> str:
+        """Return the PostgreSQL plan of a query as JSON (EXPLAIN, not ANALYZE).
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to explain
+            
+        Returns:
+            Plan as a JSON document string
+            
+        Raises:
+            ValueError: If the plan cannot be obtained
+        """
+        try:
+            conn = InstrumentedConnection(await asyncpg.connect(connection_info.url))
+            try:
+                plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}")
+                return plan if isinstance(plan, str) else json.dumps(plan)
+            finally:
+                await conn.close()
+        except Exception as e:
+            logger.warning(f"PostgreSQL EXPLAIN failed: {e}")
+            raise ValueError(f"EXPLAIN failed: {str(e)}") from e
+    
+    async def estimate_query(
+        self, connection_info: ConnectionInfo, sql: str
+    ) -> QueryEstimate:
+        """Return the total cost and row estimate of the plan's top node.
+        
+        Args:
+            connection_info: Connection parameters
+            sql: SQL SELECT query to estimate
+            
+        Returns:
+            QueryEstimate with ``Total Cost`` and ``Plan Rows``
+            
+        Raises:
+            ValueError: If the plan cannot be obtained
+        """
+        plan = json.loads(await self.explain_query(connection_info, sql))
+        top = plan[0]["Plan"]
+        return QueryEstimate(cost=float(top["Total Cost"]), rows=float(top["Plan Rows"]))
+    
+    async def fetch_catalog_signatures(
         self, connection_info: ConnectionInfo
+    ) -> dict[str, str]:
+        """Fetch a change signature for every table and view.
+        
+        DDL writes new versions of a relation's ``pg_class``, ``pg_attribute``
+        and ``pg_attrdef`` rows, so the transaction ids (``xmin``) of those
+        rows change with the table's definition. Only the catalog is read,
+        none of the ``information_schema`` views.
+        
+        Args:
+            connection_info: Connection parameters
+            
+        Returns:
+            Signature by "schema.table"
+        """
+        conn = InstrumentedConnection(await asyncpg.connect(connection_info.url))
+        try:
+            # Same relations and visibility rules as information_schema.tables
+            query = """
+            SELECT
+                n.nspname AS table_schema,
+                c.relname AS table_name,
+                c.xmin::text || ':' || md5(
+                    coalesce(string_agg(
+                        a.attnum || ':' || a.xmin::text || ':' || coalesce(d.xmin::text, ''),
+                        ',' ORDER BY a.attnum
+                    ), '')
+                ) AS signature
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            LEFT JOIN pg_catalog.pg_attribute a
+                ON a.attrelid = c.oid AND a.attnum > 0
+            LEFT JOIN pg_catalog.pg_attrdef d
+                ON d.adrelid = c.oid AND d.adnum = a.attnum
+            WHERE c.relkind IN ('r', 'v', 'f', 'p')
+                AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+                AND NOT pg_is_other_temp_schema(n.oid)
+                AND (
+                    pg_has_role(c.relowner, 'USAGE')
+                    OR has_table_privilege(c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER')
+                    OR has_any_column_privilege(c.oid, 'SELECT, INSERT, UPDATE, REFERENCES')
+                )
+            GROUP BY n.nspname, c.relname, c.xmin::text;
+            """
+            rows = await conn.fetch(query)
+            return {
+                f"{row['table_schema']}.{row['table_name']}": row["signature"]
+                for row in rows
+            }
+        finally:
+            await conn.close()
+    
+    async def fetch_metadata(
+        self,
+        connection_info: ConnectionInfo,
+        tables: Sequence[tuple[str, str]] | None = None,
     ) -> list[dict[str, Any]]:
         """Fetch PostgreSQL database metadata.
         
         Args:
             connection_info: Connection parameters
+            tables: Only these (schema, table) pairs, None for all of them
             
         Returns:
             List of dictionaries containing table/view metadata with columns
         """
-        conn = await asyncpg.connect(connection_info.url)
+        if tables is not None and not tables:
+            return []
+        conn = InstrumentedConnection(await asyncpg.connect(connection_info.url))
         try:
-            query = """
+            args: list[Any] = []
+            table_filter = ""
+            if tables is not None:
+                args = [[schema for schema, _ in tables], [table for _, table in tables]]
+                table_filter = """
+                AND (t.table_schema::text, t.table_name::text) IN (
+                    SELECT * FROM unnest($1::text[], $2::text[])
+                )"""
+            query = f"""
             SELECT 
                 t.table_schema,
                 t.table_name,
@@ -127,11 +443,11 @@ class PostgreSQLAdapter:
             LEFT JOIN information_schema.columns c 
                 ON t.table_schema = c.table_schema 
                 AND t.table_name = c.table_name
-            WHERE t.table_schema NOT IN ('pg_catalog', 'information_schema')
+            WHERE t.table_schema NOT IN ('pg_catalog', 'information_schema'){table_filter}
             GROUP BY t.table_schema, t.table_name, t.table_type
             ORDER BY t.table_schema, t.table_name;
             """
-            rows = await conn.fetch(query)
+            rows = await conn.fetch(query, *args)
             
             metadata = []
             for row in rows:
@@ -187,7 +503,7 @@ class PostgreSQLAdapter:
         Returns:
             List of dictionaries with column information
         """
-        conn = await asyncpg.connect(connection_info.url)
+        conn = InstrumentedConnection(await asyncpg.connect(connection_info.url))
         try:
             query = """
             SELECT 
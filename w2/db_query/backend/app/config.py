@@ -23,6 +23,86 @@ class Settings(BaseSettings):
     app_port: int = 8000
     log_level: str = "INFO"
 
+    # Slow-query log: executions at or above the threshold are recorded
+    slow_query_threshold_ms: float = 1000.0
+    slow_query_capture_plan: bool = True
+
+    # Statement timeouts on target databases, enforced by the server
+    # (statement_timeout / max_execution_time) with a client-side backstop;
+    # overrides map connection names to timeouts, 0 means no timeout below the cap
+    query_timeout_ms: int = 30_000
+    query_timeout_max_ms: int = 300_000
+    query_timeout_overrides: dict[str, int] = {}
+    # Concurrent identical queries on a connection share one execution
+    query_coalescing_enabled: bool = True
+    # Cancellation of running queries
+    query_cancel_grace_seconds: float = 2.0
+    query_disconnect_poll_seconds: float = 0.5
+
+    # Paged queries: pages are read from a server-side cursor kept open
+    # between requests and closed after the idle timeout
+    paged_query_default_page_size: int = 500
+    paged_query_max_page_size: int = 10_000
+    result_cursor_idle_timeout_seconds: float = 300.0
+    result_cursor_max_open: int = 32
+    # Materialized paged queries: results above the threshold are spilled to
+    # memory-mapped files (default directory: "results" next to the SQLite
+    # database), which together stay within the disk budget
+    result_spill_threshold_bytes: int = 8 * 1024 * 1024
+    result_spill_budget_bytes: int = 1024 * 1024 * 1024
+    result_spill_dir: str = ""
+
+    # Exports: results streamed as CSV (COPY on PostgreSQL) / Parquet / xlsx,
+    # read in batches from a server-side cursor, at most export_max_rows rows;
+    # CSV is gzip-compressed for clients that accept it
+    export_max_rows: int = 1_000_000
+    export_batch_rows: int = 5_000
+    export_gzip_level: int = 6
+
+    # Cost guardrail: EXPLAIN before executing and reject (or "downgrade" to a
+    # shorter timeout) queries estimated over the limits (0 = unlimited);
+    # overrides map connection names to {"max_cost": ..., "max_rows": ...}
+    cost_guard_enabled: bool = False
+    cost_guard_max_cost: float = 10_000_000.0
+    cost_guard_max_rows: float = 10_000_000.0
+    cost_guard_action: str = "reject"
+    cost_guard_downgrade_timeout_ms: int = 5_000
+    cost_guard_overrides: dict[str, dict[str, float]] = {}
+    cost_guard_cache_size: int = 1_000
+    cost_guard_cache_ttl_seconds: float = 300.0
+
+    # Admission control: concurrent queries per connection (0 disables), and a
+    # bounded queue for the rest; overrides map connection names to limits
+    admission_max_concurrency: int = 8
+    admission_max_queue: int = 32
+    admission_queue_timeout_seconds: float = 10.0
+    admission_concurrency_overrides: dict[str, int] = {}
+
+    # Background metadata refresh: every connection is refreshed on the
+    # interval (0 disables), spread by +/- the jitter fraction; at most
+    # max_concurrency refreshes run at once, and unreachable databases are
+    # retried after the backoff, doubled per failure up to the maximum
+    metadata_refresh_interval_seconds: float = 900.0
+    metadata_refresh_jitter: float = 0.1
+    metadata_refresh_max_concurrency: int = 2
+    metadata_refresh_backoff_seconds: float = 30.0
+    metadata_refresh_max_backoff_seconds: float = 3600.0
+    # Tables per LLM call when converting fetched metadata
+    metadata_llm_chunk_tables: int = 50
+    # Structural diffs between metadata versions kept per connection
+    metadata_diff_retention: int = 100
+
+    # Query history: executions are written in batches off the request path
+    query_history_enabled: bool = True
+    query_history_batch_size: int = 100
+    query_history_flush_interval_seconds: float = 1.0
+    query_history_queue_size: int = 10_000
+    query_history_retention_days: int = 30
+
+    # Per-request SQL instrumentation
+    repeated_query_threshold: int = 5
+    query_budget_enforced: bool = False
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
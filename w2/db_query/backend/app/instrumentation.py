@@ -0,0 +1,235 @@
+"""Per-request SQL instrumentation.
+
+Every statement executed while serving a request is recorded into a
+request-scoped :class:`QueryStats` held in a context variable:
+
+- the application's own SQLite engine is hooked through SQLAlchemy's
+  ``before_cursor_execute`` / ``after_cursor_execute`` events;
+- statements sent to user databases are recorded by the instrumented
+  asyncpg/aiomysql wrappers in :mod:`app.adapters.instrumented`.
+
+The middleware reports the totals in a ``Server-Timing`` header and the log,
+flags repeated statement shapes (likely N+1 loops), and - when
+``query_budget_enforced`` is on, as in the test suite - raises
+:class:`QueryBudgetExceeded` for routes that exceed their declared budget.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Source labels used in Server-Timing: the app's SQLite store and user databases
+APP_DB = "appdb"
+TARGET_DB = "targetdb"
+
+_LITERAL_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|:\w+|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so that executions differing only in literals match.
+
+    Args:
+        statement: Raw SQL text
+
+    Returns:
+        SQL with literals and bind markers replaced by ``?`` and IN lists collapsed
+    """
+    shape = statement
+    for pattern, replacement in _LITERAL_PATTERNS:
+        shape = pattern.sub(replacement, shape)
+    return shape.strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in test mode when a route executes more queries than its budget."""
+
+
+@dataclass
+class QueryStats:
+    """Queries executed while serving one request, grouped by source."""
+
+    counts: Counter = field(default_factory=Counter)
+    durations_ms: Counter = field(default_factory=Counter)
+    shapes: Counter = field(default_factory=Counter)
+    budget: int | None = None
+    # Statements of one-off work (e.g. data migrations) not held to the budget
+    exempt: int = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.durations_ms.values())
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count - self.exempt > self.budget
+
+    def record(self, source: str, statement: str, duration_ms: float) -> None:
+        self.counts[source] += 1
+        self.durations_ms[source] += duration_ms
+        self.shapes[(source, statement_shape(statement))] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Return statement shapes executed at least ``threshold`` times."""
+        return {
+            f"{source}: {shape}": n
+            for (source, shape), n in self.shapes.items()
+            if n >= threshold
+        }
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f'{source};dur={self.durations_ms[source]:.2f};desc="{n} queries"'
+            for source, n in sorted(self.counts.items())
+        )
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    """Return the stats of the request being served, if any."""
+    return _current_stats.get()
+
+
+def begin_request() -> tuple[QueryStats, Token]:
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+@contextmanager
+def track_query(source: str, statement: str) -> Iterator[None]:
+    """Time one statement and record it into the current request's stats.
+
+    Args:
+        source: Source label (``APP_DB`` or ``TARGET_DB``)
+        statement: SQL text being executed
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.record(source, statement, (time.perf_counter() - start) * 1000)
+
+
+@contextmanager
+def budget_exempt() -> Iterator[None]:
+    """Keep the statements executed in the block out of the route's budget.
+
+    For one-off work whose size does not depend on the route, like migrating
+    a legacy record on first read; the statements are still recorded.
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    before = stats.count
+    try:
+        yield
+    finally:
+        stats.exempt += stats.count - before
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.record(APP_DB, statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not fire for failed statements
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attach the query counting hooks to a SQLAlchemy async engine."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def query_budget(limit: int):
+    """Route dependency declaring the maximum number of queries per request.
+
+    Args:
+        limit: Allowed number of statements across all sources
+
+    Returns:
+        Dependency callable to use in the route's ``dependencies``
+    """
+
+    async def dependency() -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = limit
+
+    return dependency
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """HTTP middleware reporting per-request query stats."""
+    stats, token = begin_request()
+    try:
+        response = await call_next(request)
+        if stats.counts:
+            response.headers.append("Server-Timing", stats.server_timing())
+        repeated = stats.repeated(settings.repeated_query_threshold)
+        logger.info(
+            f"{request.method} {request.url.path} -> {response.status_code}: "
+            f"{stats.count} queries in {stats.total_ms:.2f}ms"
+        )
+        if repeated or stats.over_budget:
+            logger.warning(
+                f"{request.method} {request.url.path} executed {stats.count} queries "
+                f"(budget {stats.budget}), repeated statements: {repeated}"
+            )
+        if stats.over_budget and settings.query_budget_enforced:
+            raise QueryBudgetExceeded(
+                f"{request.method} {request.url.path} executed {stats.count} queries, "
+                f"budget is {stats.budget}: {dict(stats.shapes)}"
+            )
+        return response
+    finally:
+        end_request(token)
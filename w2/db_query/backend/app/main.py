@@ -5,8 +5,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .db import init_db
+from .db import engine, init_db
+from .instrumentation import instrument_engine, query_stats_middleware
 from .routes import databases
+from .services.metadata_scheduler import metadata_scheduler
+from .services.query_history import history_writer
+from .services.refresh_jobs import refresh_jobs
+from .services.result_cursors import cursor_store
+from .services.result_store import result_store
 
 
 @asynccontextmanager
@@ -14,9 +20,19 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown."""
     # Startup: Initialize database
     await init_db()
+    # Spill files of a previous process are never read again
+    result_store.clear()
+    history_writer.start()
+    cursor_store.start()
+    metadata_scheduler.start()
     yield
-    # Shutdown: Cleanup if needed
-    pass
+    # Shutdown: stop background refreshes, close paged-query cursors, then
+    # write out queued query history
+    await metadata_scheduler.stop()
+    await refresh_jobs.stop()
+    await cursor_store.stop()
+    result_store.clear()
+    await history_writer.stop()
 
 
 app = FastAPI(
@@ -35,6 +51,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query counting (Server-Timing header, N+1 warnings, budgets)
+instrument_engine(engine)
+app.middleware("http")(query_stats_middleware)
+
 # Include routers
 app.include_router(databases.router)
 
@@ -1,8 +1,8 @@
 """Database models."""
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
 
@@ -25,7 +25,13 @@ class DatabaseConnection(Base):
 
 
 class DatabaseMetadata(Base):
-    """Database metadata model (tables and views information)."""
+    """Database metadata snapshot of a connection.
+
+    The tables and columns are stored in ``meta_tables`` / ``meta_columns``;
+    ``metadata_json`` only keeps any other top-level keys of the snapshot.
+    Rows written before the split still hold the whole snapshot there and
+    are normalized when they are first read.
+    """
 
     __tablename__ = "database_metadata"
 
@@ -41,3 +47,157 @@ class DatabaseMetadata(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+
+class MetaTable(Base):
+    """Table or view in a connection's metadata snapshot."""
+
+    __tablename__ = "meta_tables"
+    __table_args__ = (
+        Index("ix_meta_tables_lookup", "connection_name", "schema_name", "table_name"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    connection_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    # Name as it appears in the snapshot ("schema.table"), split for lookups
+    name: Mapped[str] = mapped_column(Text, nullable=False)
+    schema_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    table_name: Mapped[str] = mapped_column(Text, nullable=False)
+    table_type: Mapped[str] = mapped_column(String(50), nullable=False, default="table")
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Any other keys of the table entry, as JSON
+    extra_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    columns: Mapped[list["MetaColumn"]] = relationship(
+        order_by="MetaColumn.position", cascade="all, delete-orphan"
+    )
+
+
+class MetaColumn(Base):
+    """Column of a table in a connection's metadata snapshot."""
+
+    __tablename__ = "meta_columns"
+    __table_args__ = (
+        Index("ix_meta_columns_lookup", "connection_name", "schema_name", "table_name"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    table_id: Mapped[int] = mapped_column(
+        ForeignKey("meta_tables.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    connection_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    schema_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    table_name: Mapped[str] = mapped_column(Text, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    column_name: Mapped[str] = mapped_column(Text, nullable=False)
+    data_type: Mapped[str | None] = mapped_column(Text, nullable=True)
+    nullable: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # Default value as JSON (snapshots may hold numbers or booleans)
+    default_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Any other keys of the column entry, as JSON
+    extra_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class MetaCatalogState(Base):
+    """Catalog change probe state and version of a connection's metadata snapshot."""
+
+    __tablename__ = "meta_catalog_state"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    connection_name: Mapped[str] = mapped_column(
+        String(200), nullable=False, unique=True
+    )
+    # Per-table signatures ("schema.table" -> signature) behind the snapshot, as JSON;
+    # None when the database could not be probed
+    signatures_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Incremented whenever a refresh changes the snapshot
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    changed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    checked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class MetaSnapshotBlob(Base):
+    """A connection's metadata response, rendered once and stored compressed.
+
+    There is one row per content coding (gzip, and zstd where available).
+    Rows are deleted whenever the metadata is saved.
+    """
+
+    __tablename__ = "meta_snapshot_blobs"
+    __table_args__ = (UniqueConstraint("connection_name", "encoding"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    connection_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    encoding: Mapped[str] = mapped_column(String(20), nullable=False)
+    # Layout of the rendered body; rows of another format are rebuilt
+    format_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    # MetaCatalogState.version the body was rendered from (0 if none)
+    snapshot_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    etag: Mapped[str] = mapped_column(String(64), nullable=False)
+    raw_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class MetaSnapshotDiff(Base):
+    """Structural diff of a connection's metadata between two versions.
+
+    Written by a refresh that changed the metadata; ``diff_json`` holds the
+    added, dropped and altered tables and columns (see
+    ``services.metadata.diff_snapshots``).
+    """
+
+    __tablename__ = "meta_snapshot_diffs"
+    __table_args__ = (Index("ix_meta_snapshot_diffs_lookup", "connection_name", "to_version"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    connection_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    from_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    to_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    diff_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class SlowQuery(Base):
+    """Query execution that exceeded the slow-query threshold."""
+
+    __tablename__ = "slow_queries"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    connection_name: Mapped[str] = mapped_column(
+        String(200), nullable=False, index=True
+    )
+    fingerprint: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    normalized_sql: Mapped[str] = mapped_column(Text, nullable=False)
+    sql: Mapped[str] = mapped_column(Text, nullable=False)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    bytes_returned: Mapped[int] = mapped_column(Integer, nullable=False)
+    plan_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    plan_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+
+
+class QueryHistory(Base):
+    """One query execution, written in batches by the query history writer."""
+
+    __tablename__ = "query_history"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    connection_name: Mapped[str] = mapped_column(
+        String(200), nullable=False, index=True
+    )
+    fingerprint: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    sql: Mapped[str] = mapped_column(Text, nullable=False)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
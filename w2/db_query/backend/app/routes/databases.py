@@ -1,41 +1,124 @@
 """Database connection and query routes."""
 import asyncio
-import json
 import logging
-from typing import Any
+from collections.abc import AsyncIterator, Mapping
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from ..db import get_session
+from ..instrumentation import query_budget
 from ..schemas import (
+    AdmissionStatsResponse,
     DatabaseConnectionRequest,
     DatabaseConnectionResponse,
     DatabaseListResponse,
+    ExportRequest,
+    MetadataDiff,
+    MetadataDiffResponse,
     MetadataResponse,
+    MetadataSearchHit,
+    MetadataSearchResponse,
     NaturalLanguageQueryRequest,
+    QueryFingerprintStats,
+    QueryHistoryItem,
+    QueryHistoryResponse,
+    QueryStatsResponse,
     NaturalLanguageQueryResponse,
+    PagedQueryRequest,
+    QueryPageResponse,
+    RefreshJobResponse,
+    RefreshSchedulerStatusResponse,
+    RunningQueryItem,
+    RunningQueryListResponse,
+    SchemaTables,
+    SlowQueryListResponse,
+    SlowQueryStats,
     SqlQueryRequest,
     SqlQueryResponse,
+    TableColumnsResponse,
+    TableListResponse,
+    TableSummary,
     TestConnectionRequest,
     TestConnectionResponse,
 )
-from ..adapters import ConnectionInfo, get_adapter_factory
-from ..services.database import delete_connection, detect_database_type, execute_query, get_connection, list_connections, save_connection, test_connection
+from ..adapters import ColumnarResult, ConnectionInfo, QueryTimeoutError, get_adapter_factory
+from ..services.admission import QueueFullError, QueueWaitTimeoutError, admission_slot, discard_limiter, get_limiter
+from ..services.coalescing import query_coalescer
+from ..services.cost_guard import DOWNGRADE, CostDecision, QueryCostExceededError, check_query_cost, estimate_cache
+from ..services.database import delete_connection, detect_database_type, execute_query, get_connection, list_connections, resolve_query_timeout, save_connection, test_connection
+from ..services.export import (
+    CSV,
+    EXPORT_MEDIA_TYPES,
+    XLSX,
+    XLSX_MAX_ROWS,
+    available_export_formats,
+    gzip_chunks,
+    open_export,
+)
 from ..services.metadata import (
-    get_metadata as get_metadata_service,
+    decompress_snapshot,
+    delete_metadata,
+    get_catalog_state,
+    get_snapshot_diffs,
+    get_table,
+    has_metadata,
+    list_tables,
+    load_metadata,
+    load_snapshot_blobs,
     refresh_metadata,
+    store_snapshot_blobs,
+)
+from ..services.metadata_scheduler import metadata_scheduler
+from ..services.metadata_search import metadata_search
+from ..services.query_history import delete_query_history, get_query_stats, get_recent_queries
+from ..services.refresh_jobs import RefreshJob, RefreshJobNotFoundError, refresh_jobs
+from ..services.result_cursors import (
+    CursorLimitError,
+    CursorNotFoundError,
+    CursorPositionError,
+    CursorSortError,
+    cursor_store,
+)
+from ..services.result_formats import (
+    ARROW_STREAM,
+    JSON,
+    MSGPACK,
+    NotAcceptableError,
+    available_formats,
+    encode_result,
+    negotiate_result_format,
+)
+from ..services.running_queries import (
+    DuplicateQueryIdError,
+    QueryCancelledError,
+    get_running_query,
+    list_running_queries,
+    register_query,
+    run_query,
 )
-from ..services.sql_parser import add_limit_if_needed, validate_sql
+from ..services.slow_queries import aggregate_slow_queries, delete_slow_queries
+from ..services.sql_parser import add_limit_if_needed, cap_limit, normalize_sql, validate_sql
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Idle time after which a refresh event stream sends a keepalive comment
+_SSE_KEEPALIVE_SECONDS = 15.0
+
 
 @router.get(
     "/api/v1/dbs",
     response_model=DatabaseListResponse,
     summary="Get all databases",
+    dependencies=[Depends(query_budget(1))],
     description="Retrieve all stored database connections",
 )
 async def list_dbs(session: AsyncSession = Depends(get_session)) -> DatabaseListResponse:
@@ -97,6 +180,7 @@ async def test_db_connection(
     "/api/v1/dbs/{name}",
     response_model=DatabaseConnectionResponse,
     summary="Add or update database",
+    dependencies=[Depends(query_budget(3))],
     description="Add a new database connection or update an existing one",
 )
 async def put_db(
@@ -116,7 +200,7 @@ async def put_db(
             from ..db import async_session_maker
             async with async_session_maker() as bg_session:
                 try:
-                    await refresh_metadata(bg_session, name)
+                    await refresh_metadata(bg_session, name, full=True)
                 except Exception as e:
                     import logging
                     logger = logging.getLogger(__name__)
@@ -141,6 +225,7 @@ async def put_db(
     "/api/v1/dbs/{name}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete database connection",
+    dependencies=[Depends(query_budget(11))],
     description="Delete a database connection and its metadata",
 )
 async def delete_db(
@@ -158,17 +243,18 @@ async def delete_db(
 
     try:
         # Delete metadata first if exists
-        from ..models import DatabaseMetadata
-        from sqlalchemy import select as sql_select
-        metadata_result = await session.execute(
-            sql_select(DatabaseMetadata).where(DatabaseMetadata.connection_name == name)
-        )
-        metadata_obj = metadata_result.scalar_one_or_none()
-        if metadata_obj:
-            await session.delete(metadata_obj)
+        await delete_metadata(session, name)
+
+        # Drop the connection's slow-query log and query history
+        await delete_slow_queries(session, name)
+        await delete_query_history(session, name)
 
         # Delete connection
         success = await delete_connection(session, name)
+        discard_limiter(name)
+        estimate_cache.discard_connection(name)
+        metadata_search.discard(name)
+        await cursor_store.close_connection(name)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -187,11 +273,16 @@ async def delete_db(
     "/api/v1/dbs/{name}",
     response_model=MetadataResponse,
     summary="Get database metadata",
-    description="Retrieve metadata (tables and views) for a database connection",
+    dependencies=[Depends(query_budget(8))],
+    description=(
+        "Retrieve metadata (tables and views) for a database connection. The "
+        "response is rendered and compressed once per metadata version and sent "
+        "in the content coding negotiated from Accept-Encoding (zstd, gzip)"
+    ),
 )
 async def get_db_metadata(
-    name: str, session: AsyncSession = Depends(get_session)
-) -> MetadataResponse:
+    name: str, raw_request: Request, session: AsyncSession = Depends(get_session)
+) -> Response:
     """Get database metadata."""
     # Check if connection exists
     db_conn = await get_connection(session, name)
@@ -201,29 +292,246 @@ async def get_db_metadata(
             detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
         )
 
-    # Get metadata
-    metadata_obj = await get_metadata_service(session, name)
-    if metadata_obj is None:
+    state = await get_catalog_state(session, name)
+    snapshot_version = state.version if state else 0
+    blobs = await load_snapshot_blobs(session, name, snapshot_version)
+    if not blobs:
+        metadata = await load_metadata(session, name)
+        if metadata is None:
+            raise _metadata_not_found(name)
+        body = MetadataResponse(
+            name=name,
+            metadata=metadata,
+            version=state.version if state else None,
+            changed_at=state.changed_at if state else None,
+        ).model_dump_json(by_alias=True).encode()
+        blobs = await store_snapshot_blobs(session, name, snapshot_version, body)
+
+    blob = next(iter(blobs.values()))
+    headers = {"ETag": f'W/"{blob.etag}"', "Vary": "Accept-Encoding"}
+    if_none_match = raw_request.headers.get("if-none-match", "")
+    if any(tag.strip() in (headers["ETag"], "*") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    encoding = _negotiate_encoding(
+        raw_request.headers.get("accept-encoding", ""),
+        [coding for coding in ("zstd", "gzip") if coding in blobs],
+    )
+    if encoding == "identity":
+        body = await asyncio.to_thread(decompress_snapshot, blobs["gzip"])
+    else:
+        body = blobs[encoding].body
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/api/v1/dbs/{name}/metadata/diff",
+    response_model=MetadataDiffResponse,
+    summary="Get metadata diffs",
+    dependencies=[Depends(query_budget(3))],
+    description=(
+        "Structural diffs (added, dropped and altered tables and columns) written by "
+        "the refreshes that changed the metadata: the latest one, or every diff after "
+        "version `since`"
+    ),
+)
+async def get_db_metadata_diff(
+    name: str,
+    since: int | None = Query(default=None, ge=0, description="Diffs to versions after this one"),
+    session: AsyncSession = Depends(get_session),
+) -> MetadataDiffResponse:
+    """Get the structural diffs of the stored metadata."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+    state = await get_catalog_state(session, name)
+    version = state.version if state else 0
+    rows = await get_snapshot_diffs(session, name, since)
+    # Older diffs are pruned after METADATA_DIFF_RETENTION versions
+    complete = since is None or since >= version or bool(rows and rows[0].from_version <= since)
+    return MetadataDiffResponse(
+        name=name,
+        version=version,
+        complete=complete,
+        diffs=[
+            MetadataDiff(
+                from_version=row.from_version,
+                to_version=row.to_version,
+                created_at=row.created_at,
+                **orjson.loads(row.diff_json),
+            )
+            for row in rows
+        ],
+    )
+
+
+def _metadata_not_found(name: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail={"error": {"code": "metadata_not_found", "message": f"Metadata for database '{name}' not found. Please refresh metadata first.", "details": None}},
+    )
+
+
+@router.get(
+    "/api/v1/dbs/{name}/tables",
+    response_model=TableListResponse,
+    summary="Get database tables",
+    dependencies=[Depends(query_budget(3))],
+    description=(
+        "List the tables and views of a database, grouped by schema: from the stored "
+        "metadata (an indexed lookup), or from the database's catalog if it has not "
+        "been refreshed yet"
+    ),
+)
+async def get_db_tables(
+    name: str,
+    schema: str | None = Query(default=None, description="Only tables in this schema"),
+    session: AsyncSession = Depends(get_session),
+) -> TableListResponse:
+    """Get tables for a database connection."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    schemas: dict[str, list[TableSummary]] = {}
+    if await has_metadata(session, name):
+        for table in await list_tables(session, name, schema):
+            schemas.setdefault(table.schema_name, []).append(
+                TableSummary(name=table.table_name, type=table.table_type, schema_name=table.schema_name)
+            )
+    else:
+        try:
+            adapter = get_adapter_factory().create(db_conn.database_type)
+            tables = await adapter.fetch_tables(ConnectionInfo.from_url(db_conn.url), schema)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={"error": {"code": "fetch_error", "message": str(e), "details": None}},
+            )
+        for table in tables:
+            table_schema = table.get("schema", adapter.default_schema)
+            schemas.setdefault(table_schema, []).append(
+                TableSummary(name=table.get("name", ""), type=table.get("type", "table"), schema_name=table_schema)
+            )
+    return TableListResponse(
+        schemas=[SchemaTables(name=schema_name, tables=tables) for schema_name, tables in schemas.items()],
+    )
+
+
+@router.get(
+    "/api/v1/dbs/{name}/tables/{schema}/{table}/columns",
+    response_model=TableColumnsResponse,
+    summary="Get table columns",
+    dependencies=[Depends(query_budget(5))],
+    description=(
+        "Columns of one table or view: from the stored metadata, or from the "
+        "database's catalog if the table is not in it"
+    ),
+)
+async def get_db_table_columns(
+    name: str,
+    schema: str,
+    table: str,
+    session: AsyncSession = Depends(get_session),
+) -> TableColumnsResponse:
+    """Get columns for a specific table."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    entry = await get_table(session, name, schema, table) if await has_metadata(session, name) else None
+    if entry is not None:
+        columns = [{"position": position, **column} for position, column in enumerate(entry["columns"], 1)]
+    else:
+        try:
+            adapter = get_adapter_factory().create(db_conn.database_type)
+            columns = await adapter.fetch_table_columns(ConnectionInfo.from_url(db_conn.url), schema, table)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail={"error": {"code": "fetch_error", "message": str(e), "details": None}},
+            )
+    return TableColumnsResponse(schema_name=schema, table=table, columns=columns)
+
+
+@router.get(
+    "/api/v1/dbs/{name}/search",
+    response_model=MetadataSearchResponse,
+    summary="Search metadata",
+    dependencies=[Depends(query_budget(8))],
+    description=(
+        "Find schemas, tables and columns by name in the stored metadata, ranked by "
+        "exact name, name prefix, word prefix and substring matches. Served from an "
+        "in-memory index that is rebuilt when the metadata changes"
+    ),
+)
+async def search_db_metadata(
+    name: str,
+    q: str = Query(..., min_length=1, max_length=200, description="Case-insensitive name or part of one; 'schema.table' narrows the match"),
+    kind: list[Literal["schema", "table", "column"]] | None = Query(default=None, description="Only these kinds"),
+    limit: int = Query(default=20, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+) -> MetadataSearchResponse:
+    """Search the names in the stored metadata snapshot."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail={"error": {"code": "metadata_not_found", "message": f"Metadata for database '{name}' not found. Please refresh metadata first.", "details": None}},
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
         )
+    found = await metadata_search.get(session, name)
+    if found is None:
+        raise _metadata_not_found(name)
 
-    return MetadataResponse(
+    index, version = found
+    return MetadataSearchResponse(
         name=name,
-        metadata=json.loads(metadata_obj.metadata_json),
+        query=q,
+        version=version,
+        results=[
+            MetadataSearchHit(
+                kind=hit.entry.kind,
+                schema_name=hit.entry.schema,
+                table=hit.entry.table,
+                column=hit.entry.column,
+                type=hit.entry.type,
+                match=hit.match,
+            )
+            for hit in index.search(q, limit, kind)
+        ],
     )
 
 
 @router.post(
     "/api/v1/dbs/{name}/refresh",
-    response_model=MetadataResponse,
+    response_model=RefreshJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Refresh database metadata",
-    description="Manually refresh metadata for a database connection",
+    dependencies=[Depends(query_budget(1))],
+    description=(
+        "Start refreshing metadata for a database connection in the background. "
+        "Only tables whose catalog signature changed since the last refresh are "
+        "fetched again, unless full=true. Follow the returned job at "
+        "/refresh/{job}/events; while a refresh of the connection is running, "
+        "that job is returned"
+    ),
 )
 async def refresh_db_metadata(
-    name: str, session: AsyncSession = Depends(get_session)
-) -> MetadataResponse:
+    name: str,
+    response: Response,
+    full: bool = Query(False, description="Fetch every table, not only the changed ones"),
+    session: AsyncSession = Depends(get_session),
+) -> RefreshJobResponse:
     """Refresh database metadata."""
     # Check if connection exists
     db_conn = await get_connection(session, name)
@@ -233,37 +541,161 @@ async def refresh_db_metadata(
             detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
         )
 
+    job = refresh_jobs.start(name, full=full)
+    response.headers["Location"] = f"/api/v1/dbs/{name}/refresh/{job.id}"
+    return RefreshJobResponse(**job.snapshot())
+
+
+def _refresh_job(name: str, job_id: str) -> RefreshJob:
     try:
-        # Refresh metadata
-        metadata_obj = await refresh_metadata(session, name)
-        return MetadataResponse(
-            name=name,
-            metadata=json.loads(metadata_obj.metadata_json),
+        return refresh_jobs.get(name, job_id)
+    except RefreshJobNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "refresh_job_not_found", "message": str(e), "details": None}},
         )
-    except ValueError as e:
+
+
+@router.get(
+    "/api/v1/dbs/{name}/refresh/{job_id}",
+    response_model=RefreshJobResponse,
+    summary="Get metadata refresh job",
+    dependencies=[Depends(query_budget(0))],
+    description="Current phase and progress of a background metadata refresh",
+)
+async def get_refresh_job(name: str, job_id: str) -> RefreshJobResponse:
+    """Get metadata refresh job."""
+    return RefreshJobResponse(**_refresh_job(name, job_id).snapshot())
+
+
+@router.get(
+    "/api/v1/dbs/{name}/refresh/{job_id}/events",
+    summary="Follow metadata refresh progress",
+    dependencies=[Depends(query_budget(0))],
+    description=(
+        "Server-Sent Events stream of a metadata refresh: a 'progress' event "
+        "with the job's state on every phase change and converted chunk, then "
+        "'done' or 'error'. Send Last-Event-ID to resume"
+    ),
+    response_class=StreamingResponse,
+)
+async def stream_refresh_events(
+    name: str, job_id: str, raw_request: Request
+) -> StreamingResponse:
+    """Follow metadata refresh progress."""
+    job = _refresh_job(name, job_id)
+    try:
+        after = int(raw_request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after = 0
+
+    async def events() -> AsyncIterator[bytes]:
+        async for event in job.follow(after, keepalive=_SSE_KEEPALIVE_SECONDS):
+            if event is None:
+                # Comment line: keeps proxies from closing an idle stream
+                yield b": keepalive\n\n"
+                continue
+            data = RefreshJobResponse(**event.data).model_dump_json(by_alias=True)
+            yield f"id: {event.id}\nevent: {event.event}\ndata: {data}\n\n".encode()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/api/v1/metadata/refresh-status",
+    response_model=RefreshSchedulerStatusResponse,
+    summary="Get background metadata refresh status",
+    dependencies=[Depends(query_budget(0))],
+    description="Settings of the background metadata refresh scheduler and each connection's last and next refresh",
+)
+async def get_metadata_refresh_status() -> RefreshSchedulerStatusResponse:
+    """Get background metadata refresh status."""
+    return RefreshSchedulerStatusResponse(**metadata_scheduler.status())
+
+
+def _client_identity(raw_request: Request) -> str:
+    """Identify the requesting user for fair admission between users."""
+    return raw_request.headers.get("x-user-id") or (
+        raw_request.client.host if raw_request.client else "anonymous"
+    )
+
+
+@asynccontextmanager
+async def _query_slot(name: str, raw_request: Request) -> AsyncIterator[float]:
+    """Hold a query slot on the connection, mapping admission failures to 429/503."""
+    try:
+        async with admission_slot(name, _client_identity(raw_request)) as wait_ms:
+            yield wait_ms
+    except QueueFullError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": {"code": "metadata_refresh_error", "message": str(e), "details": None}},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={"error": {"code": "query_queue_full", "message": str(e), "details": None}},
+            headers={"Retry-After": str(e.retry_after)},
         )
-    except Exception as e:
+    except QueueWaitTimeoutError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "metadata_refresh_error", "message": str(e), "details": None}},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": {"code": "query_queue_timeout", "message": str(e), "details": None}},
+            headers={"Retry-After": str(e.retry_after)},
         )
 
 
+def _query_json(result: ColumnarResult, query_id: str) -> bytes:
+    """Encode a query result as the ``SqlQueryResponse`` JSON.
+
+    Only the envelope is validated; the rows are written by
+    :meth:`ColumnarResult.to_json` instead of being validated and serialized
+    cell by cell by Pydantic. The output is byte-identical to
+    ``SqlQueryResponse(...).model_dump_json(by_alias=True)``.
+    """
+    SqlQueryResponse(columns=result.columns, rows=[], row_count=result.row_count, query_id=query_id)
+    try:
+        return result.to_json(queryId=query_id)
+    except orjson.JSONEncodeError:
+        # e.g. integers wider than 64 bits, which only Pydantic can write
+        return SqlQueryResponse(**result, query_id=query_id).model_dump_json(by_alias=True).encode()
+
+
 @router.post(
     "/api/v1/dbs/{name}/query",
     response_model=SqlQueryResponse,
     summary="Execute SQL query",
+    dependencies=[Depends(query_budget(3))],
     description="Execute a SQL SELECT query on the specified database",
+    responses={
+        200: {"content": {ARROW_STREAM: {}, MSGPACK: {}}},
+        406: {"description": "None of the accepted result formats is available"},
+    },
 )
 async def query_db(
     name: str,
     request: SqlQueryRequest,
+    raw_request: Request,
     session: AsyncSession = Depends(get_session),
-) -> SqlQueryResponse:
-    """Execute SQL query."""
+) -> Response:
+    """Execute SQL query.
+
+    Concurrent identical queries on the connection share one execution (and
+    its query id). The query is cancelled on the database once every client
+    waiting for it has disconnected, or through
+    ``DELETE /api/v1/dbs/{name}/queries/{query_id}``.
+
+    The result is JSON (encoded by ``_query_json``) unless the ``Accept``
+    header asks for an Arrow IPC stream or MessagePack (see
+    ``app.services.result_formats``).
+    """
+    try:
+        media_type = negotiate_result_format(raw_request.headers.get("accept"))
+    except NotAcceptableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail={"error": {"code": "not_acceptable", "message": str(e), "details": {"available": available_formats()}}},
+        )
+
     # Get database connection
     db_conn = await get_connection(session, name)
     if db_conn is None:
@@ -283,10 +715,86 @@ async def query_db(
     # Add LIMIT if needed
     sql_with_limit = add_limit_if_needed(request.sql, db_conn.database_type)
 
+    timeout_ms = resolve_query_timeout(name, request.timeout_ms)
+
+    async def execute() -> tuple[Mapping[str, Any], str, CostDecision]:
+        decision = await check_query_cost(
+            name, db_conn.url, db_conn.database_type, sql_with_limit
+        )
+        query_timeout_ms = timeout_ms
+        if decision.action == DOWNGRADE:
+            query_timeout_ms = min(
+                timeout_ms or settings.cost_guard_downgrade_timeout_ms,
+                settings.cost_guard_downgrade_timeout_ms,
+            )
+        async with _query_slot(name, raw_request):
+            query = register_query(
+                name,
+                db_conn.url,
+                db_conn.database_type,
+                sql_with_limit,
+                timeout_ms=query_timeout_ms,
+                query_id=request.query_id,
+            )
+            result = await run_query(
+                query,
+                execute_query(
+                    db_conn.url,
+                    db_conn.database_type,
+                    sql_with_limit,
+                    connection_name=name,
+                    timeout_ms=query_timeout_ms,
+                    on_connect=query.set_backend_id,
+                ),
+            )
+            return result, query.id, decision
+
+    # Identical queries running concurrently on this connection with the same
+    # timeout share one execution; a client-chosen query id names its own run
+    coalescing_key = (
+        (name, normalize_sql(sql_with_limit, db_conn.database_type), timeout_ms)
+        if settings.query_coalescing_enabled and request.query_id is None
+        else None
+    )
     try:
-        # Execute query
-        result = await execute_query(db_conn.url, db_conn.database_type, sql_with_limit)
-        return SqlQueryResponse(**result)
+        result, query_id, decision = await query_coalescer.run(
+            coalescing_key, execute, is_disconnected=raw_request.is_disconnected
+        )
+        headers = {"Vary": "Accept"}
+        if decision.action == DOWNGRADE:
+            headers["X-Query-Cost-Guard"] = DOWNGRADE
+        if not isinstance(result, ColumnarResult):
+            result = ColumnarResult.from_records(result["columns"], result["rows"])
+        if media_type != JSON:
+            headers["X-Query-Id"] = query_id
+            return Response(
+                content=encode_result(media_type, result, query_id),
+                media_type=media_type,
+                headers=headers,
+            )
+        return Response(content=_query_json(result, query_id), media_type=JSON, headers=headers)
+    except HTTPException:
+        raise
+    except QueryCostExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "query_cost_exceeded", "message": str(e), "details": e.decision.details()}},
+        )
+    except DuplicateQueryIdError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": {"code": "duplicate_query_id", "message": str(e), "details": None}},
+        )
+    except QueryTimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail={"error": {"code": "query_timeout", "message": str(e), "details": {"timeout_ms": timeout_ms}}},
+        )
+    except QueryCancelledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": {"code": "query_cancelled", "message": str(e), "details": None}},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -294,15 +802,478 @@ async def query_db(
         )
 
 
+def _page_error(e: Exception, timeout_ms: int | None = None) -> HTTPException:
+    """Map a paged query failure to an HTTP error."""
+    if isinstance(e, CursorNotFoundError):
+        return HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail={"error": {"code": "cursor_expired", "message": str(e), "details": None}},
+        )
+    if isinstance(e, CursorPositionError):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"error": {"code": "cursor_position_mismatch", "message": str(e), "details": None}},
+        )
+    if isinstance(e, CursorSortError):
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "invalid_sort", "message": str(e), "details": None}},
+        )
+    if isinstance(e, CursorLimitError):
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={"error": {"code": "too_many_cursors", "message": str(e), "details": None}},
+        )
+    if isinstance(e, QueryCostExceededError):
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "query_cost_exceeded", "message": str(e), "details": e.decision.details()}},
+        )
+    if isinstance(e, QueryTimeoutError):
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail={"error": {"code": "query_timeout", "message": str(e), "details": {"timeout_ms": timeout_ms}}},
+        )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail={"error": {"code": "query_execution_error", "message": str(e), "details": None}},
+    )
+
+
+@router.post(
+    "/api/v1/dbs/{name}/query/paged",
+    response_model=QueryPageResponse,
+    summary="Execute SQL query with paged results",
+    dependencies=[Depends(query_budget(3))],
+    description="Execute a SQL SELECT query on a server-side cursor and return its first page with a continuation token",
+)
+async def query_db_paged(
+    name: str,
+    request: PagedQueryRequest,
+    raw_request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+) -> QueryPageResponse:
+    """Execute SQL query with paged results.
+
+    Unlike ``POST /api/v1/dbs/{name}/query`` no LIMIT is added: the cursor
+    stays open between requests and ``GET .../query/pages/{token}`` reads the
+    next page from it without re-executing the query.
+    """
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    is_valid, error_message = validate_sql(request.sql, db_conn.database_type)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "sql_validation_error", "message": error_message or "Invalid SQL", "details": None}},
+        )
+
+    page_size = min(
+        request.page_size or settings.paged_query_default_page_size,
+        settings.paged_query_max_page_size,
+    )
+    timeout_ms = resolve_query_timeout(name, request.timeout_ms)
+    try:
+        decision = await check_query_cost(name, db_conn.url, db_conn.database_type, request.sql)
+        if decision.action == DOWNGRADE:
+            timeout_ms = min(
+                timeout_ms or settings.cost_guard_downgrade_timeout_ms,
+                settings.cost_guard_downgrade_timeout_ms,
+            )
+            response.headers["X-Query-Cost-Guard"] = DOWNGRADE
+        async with _query_slot(name, raw_request):
+            page = await cursor_store.open(
+                name,
+                db_conn.url,
+                db_conn.database_type,
+                request.sql,
+                page_size=page_size,
+                timeout_ms=timeout_ms,
+                materialize=request.materialize,
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _page_error(e, timeout_ms)
+    return QueryPageResponse(**page.to_dict())
+
+
+@router.get(
+    "/api/v1/dbs/{name}/query/pages/{token}",
+    response_model=QueryPageResponse,
+    summary="Get next page of a paged query",
+    dependencies=[Depends(query_budget(2))],
+    description="Read the page a continuation token points to from the query's open cursor or materialized result",
+)
+async def get_query_page(
+    name: str,
+    token: str,
+    raw_request: Request,
+    sort_by: str | None = Query(default=None, alias="sortBy", description="Sort a materialized result by this column"),
+    descending: bool = Query(default=False),
+    session: AsyncSession = Depends(get_session),
+) -> QueryPageResponse:
+    """Get the next page of a paged query.
+
+    Repeating the request for the page just served returns it again, so a
+    lost response can be retried. Pages of a materialized query can also be
+    read at any offset and sorted.
+    """
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    try:
+        async with _query_slot(name, raw_request):
+            page = await cursor_store.next_page(name, token, sort_by, descending)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _page_error(e)
+    return QueryPageResponse(**page.to_dict())
+
+
+@router.delete(
+    "/api/v1/dbs/{name}/query/pages/{token}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Close paged query",
+    dependencies=[Depends(query_budget(1))],
+    description="Close a paged query's cursor before it has been read to the end",
+)
+async def close_query_pages(
+    name: str,
+    token: str,
+    session: AsyncSession = Depends(get_session),
+):
+    """Close a paged query's cursor."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    try:
+        await cursor_store.close(name, token)
+    except CursorNotFoundError as e:
+        raise _page_error(e)
+
+
+def _negotiate_encoding(accept_encoding: str, available: list[str]) -> str:
+    """Pick a content coding from Accept-Encoding, in the server's order of preference.
+    
+    Returns:
+        One of ``available``, or "identity" if none of them is acceptable
+    """
+    qualities: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        param, _, value = params.partition("=")
+        if param.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = quality
+    best, best_quality = "identity", 0.0
+    for coding in available:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def _accepts_gzip(raw_request: Request) -> bool:
+    return _negotiate_encoding(raw_request.headers.get("accept-encoding", ""), ["gzip"]) == "gzip"
+
+
+@router.post(
+    "/api/v1/dbs/{name}/export",
+    summary="Export query result",
+    dependencies=[Depends(query_budget(3))],
+    description="Stream the full result of a SQL SELECT query as a CSV, Parquet or xlsx file",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}},
+)
+async def export_query(
+    name: str,
+    request: ExportRequest,
+    raw_request: Request,
+    export_format: Literal["csv", "parquet", "xlsx"] = Query(default="csv", alias="format"),
+    session: AsyncSession = Depends(get_session),
+) -> StreamingResponse:
+    """Export a query result as a file.
+
+    The default row limit of ``POST /api/v1/dbs/{name}/query`` does not apply:
+    the query is capped at ``maxRows`` (at most ``EXPORT_MAX_ROWS``) and the
+    file is streamed while the database is read, from ``COPY`` for CSV on
+    PostgreSQL and from a server-side cursor otherwise. CSV is
+    gzip-compressed on the fly when the client accepts it. The query's
+    admission slot is held until the file has been sent.
+    """
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+    if export_format not in available_export_formats():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "export_format_unavailable", "message": f"Export format '{export_format}' is not available on this server", "details": {"available": available_export_formats()}}},
+        )
+
+    is_valid, error_message = validate_sql(request.sql, db_conn.database_type)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "sql_validation_error", "message": error_message or "Invalid SQL", "details": None}},
+        )
+
+    max_rows = min(request.max_rows or settings.export_max_rows, settings.export_max_rows)
+    if export_format == XLSX:
+        max_rows = min(max_rows, XLSX_MAX_ROWS)
+    sql = cap_limit(request.sql, db_conn.database_type, max_rows)
+    timeout_ms = resolve_query_timeout(name, request.timeout_ms)
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}-export.{export_format}"',
+        "X-Export-Max-Rows": str(max_rows),
+        "Vary": "Accept-Encoding",
+    }
+    # Released when the response is finished or the client goes away
+    resources = AsyncExitStack()
+    try:
+        decision = await check_query_cost(name, db_conn.url, db_conn.database_type, sql)
+        if decision.action == DOWNGRADE:
+            timeout_ms = min(
+                timeout_ms or settings.cost_guard_downgrade_timeout_ms,
+                settings.cost_guard_downgrade_timeout_ms,
+            )
+            headers["X-Query-Cost-Guard"] = DOWNGRADE
+        await resources.enter_async_context(_query_slot(name, raw_request))
+        stream = await open_export(
+            db_conn.url,
+            db_conn.database_type,
+            sql,
+            export_format,
+            timeout_ms=timeout_ms,
+            batch_rows=settings.export_batch_rows,
+        )
+        resources.push_async_callback(stream.aclose)
+    except HTTPException:
+        await resources.aclose()
+        raise
+    except Exception as e:
+        await resources.aclose()
+        raise _page_error(e, timeout_ms)
+
+    chunks: AsyncIterator[bytes] = stream
+    if export_format == CSV and _accepts_gzip(raw_request):
+        chunks = gzip_chunks(stream, settings.export_gzip_level)
+        headers["Content-Encoding"] = "gzip"
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            # Too late for an error response: the client sees a truncated file
+            logger.error(f"Export on {name} failed while streaming: {e}")
+            raise
+        finally:
+            await resources.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+        # Also runs when the body was never started (client gone)
+        background=BackgroundTask(resources.aclose),
+    )
+
+
+@router.get(
+    "/api/v1/dbs/{name}/admission",
+    response_model=AdmissionStatsResponse,
+    summary="Get admission control stats",
+    dependencies=[Depends(query_budget(1))],
+    description="Running and queued queries, rejections and queue wait times for a database connection",
+)
+async def get_db_admission_stats(
+    name: str,
+    session: AsyncSession = Depends(get_session),
+) -> AdmissionStatsResponse:
+    """Get admission control stats."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    return AdmissionStatsResponse(name=name, **get_limiter(name).stats())
+
+
+@router.get(
+    "/api/v1/dbs/{name}/queries",
+    response_model=RunningQueryListResponse,
+    summary="List running queries",
+    dependencies=[Depends(query_budget(1))],
+    description="Queries currently executing on a database connection",
+)
+async def list_db_running_queries(
+    name: str,
+    session: AsyncSession = Depends(get_session),
+) -> RunningQueryListResponse:
+    """List running queries."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    return RunningQueryListResponse(
+        name=name,
+        queries=[RunningQueryItem(**query.to_dict()) for query in list_running_queries(name)],
+    )
+
+
+@router.delete(
+    "/api/v1/dbs/{name}/queries/{query_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Cancel running query",
+    dependencies=[Depends(query_budget(2))],
+    description="Cancel a running query on the database (pg_cancel_backend / KILL QUERY)",
+)
+async def cancel_db_query(
+    name: str,
+    query_id: str,
+    session: AsyncSession = Depends(get_session),
+):
+    """Cancel a running query."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    query = get_running_query(name, query_id)
+    if query is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "query_not_found", "message": f"Query '{query_id}' is not running", "details": None}},
+        )
+    await query.cancel("cancelled by request")
+
+
+@router.get(
+    "/api/v1/dbs/{name}/slow-queries",
+    response_model=SlowQueryListResponse,
+    summary="Get slow queries",
+    description="Slow query executions on a database connection, aggregated by query fingerprint",
+    dependencies=[Depends(query_budget(3))],
+)
+async def get_slow_queries(
+    name: str,
+    limit: int = Query(default=20, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+) -> SlowQueryListResponse:
+    """Get slow queries aggregated by fingerprint, most total time first."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    aggregates = await aggregate_slow_queries(session, name, limit=limit)
+    return SlowQueryListResponse(
+        name=name,
+        threshold_ms=settings.slow_query_threshold_ms,
+        queries=[SlowQueryStats(**item) for item in aggregates],
+    )
+
+
+@router.get(
+    "/api/v1/dbs/{name}/query-stats",
+    response_model=QueryStatsResponse,
+    summary="Get query statistics",
+    description="Per-fingerprint execution statistics (calls, mean/p95 time, rows) from the query history",
+    dependencies=[Depends(query_budget(4))],
+)
+async def get_db_query_stats(
+    name: str,
+    limit: int = Query(default=20, ge=1, le=200),
+    since: datetime | None = Query(default=None, description="Only include executions at or after this time"),
+    session: AsyncSession = Depends(get_session),
+) -> QueryStatsResponse:
+    """Get per-fingerprint query statistics, most total time first."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    stats = await get_query_stats(session, name, limit=limit, since=since)
+    return QueryStatsResponse(
+        name=name,
+        queries=[QueryFingerprintStats(**item) for item in stats],
+    )
+
+
+@router.get(
+    "/api/v1/dbs/{name}/history",
+    response_model=QueryHistoryResponse,
+    summary="Get recent queries",
+    description="Most recently executed distinct queries on a database connection",
+    dependencies=[Depends(query_budget(2))],
+)
+async def get_db_history(
+    name: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    session: AsyncSession = Depends(get_session),
+) -> QueryHistoryResponse:
+    """Get recent distinct queries, newest first."""
+    db_conn = await get_connection(session, name)
+    if db_conn is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
+        )
+
+    queries = await get_recent_queries(session, name, limit=limit)
+    return QueryHistoryResponse(
+        name=name,
+        queries=[QueryHistoryItem(**item) for item in queries],
+    )
+
+
 @router.post(
     "/api/v1/dbs/{name}/query/natural",
     response_model=NaturalLanguageQueryResponse,
     summary="Natural language query",
+    dependencies=[Depends(query_budget(9))],
     description="Generate and execute SQL from natural language",
 )
 async def natural_language_query(
     name: str,
     request: NaturalLanguageQueryRequest,
+    raw_request: Request,
     session: AsyncSession = Depends(get_session),
 ) -> NaturalLanguageQueryResponse:
     """Generate SQL from natural language and execute it."""
@@ -315,13 +1286,14 @@ async def natural_language_query(
         )
 
     # Get metadata - try to refresh if not exists
-    metadata_obj = await get_metadata_service(session, name)
-    if metadata_obj is None:
+    metadata_dict = await load_metadata(session, name)
+    if metadata_dict is None:
         # Try to refresh metadata automatically
         logger = logging.getLogger(__name__)
         try:
             logger.info(f"Metadata not found for {name}, attempting to refresh...")
-            metadata_obj = await refresh_metadata(session, name)
+            await refresh_metadata(session, name)
+            metadata_dict = await load_metadata(session, name)
         except Exception as e:
             error_str = str(e)
             logger.error(f"Failed to refresh metadata for {name}: {error_str}", exc_info=True)
@@ -342,8 +1314,6 @@ async def natural_language_query(
 
     try:
         # Generate SQL using LLM
-        metadata_dict = json.loads(metadata_obj.metadata_json)
-        
         try:
             sql, explanation = await generate_sql_from_natural_language(
                 request.prompt, metadata_dict, db_conn.database_type
@@ -374,7 +1344,10 @@ async def natural_language_query(
         sql_with_limit = add_limit_if_needed(sql, db_conn.database_type)
 
         # Execute query
-        result = await execute_query(db_conn.url, db_conn.database_type, sql_with_limit)
+        async with _query_slot(name, raw_request):
+            result = await execute_query(
+                db_conn.url, db_conn.database_type, sql_with_limit, connection_name=name
+            )
 
         return NaturalLanguageQueryResponse(
             sql=sql_with_limit,
@@ -387,101 +1360,3 @@ async def natural_language_query(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"error": {"code": "llm_error", "message": str(e), "details": None}},
         )
-
-
-@router.get(
-    "/api/v1/dbs/{name}/tables",
-    summary="Get database tables",
-    description="Get list of tables for a database connection (on-demand loading)",
-)
-async def get_db_tables(
-    name: str,
-    schema: str | None = None,
-    session: AsyncSession = Depends(get_session),
-) -> dict[str, Any]:
-    """Get tables for a database connection."""
-    # Check if connection exists
-    db_conn = await get_connection(session, name)
-    if db_conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
-        )
-
-    try:
-        # Use adapter factory to get appropriate adapter
-        factory = get_adapter_factory()
-        adapter = factory.create(db_conn.database_type)
-        connection_info = ConnectionInfo.from_url(db_conn.url)
-        
-        # Fetch tables using adapter
-        tables = await adapter.fetch_tables(connection_info, schema)
-        
-        # Group by schema
-        schema_map: dict[str, list[dict[str, Any]]] = {}
-        for table in tables:
-            table_schema = table.get("schema", adapter.default_schema)
-            if table_schema not in schema_map:
-                schema_map[table_schema] = []
-            schema_map[table_schema].append({
-                "name": table.get("name", ""),
-                "type": table.get("type", "table"),
-                "schema": table_schema,
-            })
-        
-        return {
-            "schemas": [
-                {
-                    "name": schema_name,
-                    "tables": tables_list,
-                }
-                for schema_name, tables_list in schema_map.items()
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "fetch_error", "message": str(e), "details": None}},
-        )
-
-
-@router.get(
-    "/api/v1/dbs/{name}/tables/{schema}/{table}/columns",
-    summary="Get table columns",
-    description="Get column information for a specific table (on-demand loading)",
-)
-async def get_table_columns(
-    name: str,
-    schema: str,
-    table: str,
-    session: AsyncSession = Depends(get_session),
-) -> dict[str, Any]:
-    """Get columns for a specific table."""
-    # Check if connection exists
-    db_conn = await get_connection(session, name)
-    if db_conn is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"error": {"code": "connection_not_found", "message": f"Database connection '{name}' not found", "details": None}},
-        )
-
-    try:
-        # Use adapter factory to get appropriate adapter
-        factory = get_adapter_factory()
-        adapter = factory.create(db_conn.database_type)
-        connection_info = ConnectionInfo.from_url(db_conn.url)
-        
-        # Fetch columns using adapter
-        columns = await adapter.fetch_table_columns(connection_info, schema, table)
-        
-        return {
-            "schema": schema,
-            "table": table,
-            "columns": columns,
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "fetch_error", "message": str(e), "details": None}},
-        )
-
@@ -1,6 +1,6 @@
 """Pydantic schemas for request/response models."""
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -67,15 +67,127 @@ class MetadataResponse(CamelCaseModel):
 
     name: str
     metadata: dict[str, Any]
+    version: int | None = Field(None, description="Incremented whenever a refresh changed the metadata")
+    changed_at: datetime | None = Field(None, description="When a refresh last changed the metadata")
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class MetadataColumnDiff(CamelCaseModel):
+    """Schema for a column altered between two metadata versions."""
+
+    name: str
+    changes: dict[str, dict[str, Any]] = Field(..., description="Changed fields, as {from, to}")
+
+
+class MetadataTableDiff(CamelCaseModel):
+    """Schema for a table altered between two metadata versions."""
+
+    name: str
+    changes: dict[str, dict[str, Any]] = Field(..., description="Changed table fields (e.g. type), as {from, to}")
+    columns_added: list[str]
+    columns_dropped: list[str]
+    columns_altered: list[MetadataColumnDiff]
+
+
+class MetadataDiff(CamelCaseModel):
+    """Schema for the structural diff between two metadata versions."""
+
+    from_version: int
+    to_version: int
+    created_at: datetime
+    tables_added: list[str]
+    tables_dropped: list[str]
+    tables_altered: list[MetadataTableDiff]
+
+
+class MetadataDiffResponse(CamelCaseModel):
+    """Schema for metadata diffs."""
+
+    name: str
+    version: int = Field(..., description="Current metadata version")
+    complete: bool = Field(
+        ..., description="False when diffs after the requested version are no longer kept"
+    )
+    diffs: list[MetadataDiff]
+
+
+class RefreshJobResponse(CamelCaseModel):
+    """Schema for a background metadata refresh job and its progress."""
+
+    job_id: str
+    name: str
+    full: bool
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    phase: str = Field(..., description="queued, probing, fetching, converting, saving or done")
+    tables_total: int | None = Field(None, description="Tables being converted, once fetched")
+    tables_done: int
+    llm_chunks_total: int | None = None
+    llm_chunks_done: int
+    version: int | None = Field(None, description="Metadata version after a successful refresh")
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+class TableSummary(CamelCaseModel):
+    """Schema for a table in a table listing."""
+
+    name: str = Field(..., description="Table name, without the schema")
+    type: str
+    schema_name: str = Field(..., alias="schema")
+
+
+class SchemaTables(CamelCaseModel):
+    """Schema for the tables of one schema."""
+
+    name: str
+    tables: list[TableSummary]
+
+
+class TableListResponse(CamelCaseModel):
+    """Schema for table listing response."""
+
+    schemas: list[SchemaTables]
+
+
+class TableColumnsResponse(CamelCaseModel):
+    """Schema for one table's columns."""
+
+    schema_name: str = Field(..., alias="schema")
+    table: str
+    columns: list[dict[str, Any]]
+
+
+class MetadataSearchHit(CamelCaseModel):
+    """Schema for a schema, table or column matched by a metadata search."""
+
+    kind: Literal["schema", "table", "column"]
+    schema_name: str = Field(..., alias="schema", description="Schema name (empty for tables stored without one)")
+    table: str | None = None
+    column: str | None = None
+    type: str | None = Field(None, description="Table type, or the column's data type")
+    match: Literal["exact", "prefix", "word", "substring"] = Field(
+        ..., description="How the name matched, best first: whole name, name prefix, prefix of a word in it, substring"
+    )
+
+
+class MetadataSearchResponse(CamelCaseModel):
+    """Schema for metadata search results."""
+
+    name: str
+    query: str
+    version: int = Field(..., description="Metadata version the results were found in")
+    results: list[MetadataSearchHit]
+
+
 # SQL Query Schemas
 class SqlQueryRequest(CamelCaseModel):
     """Schema for SQL query request."""
 
     sql: str = Field(..., description="SQL query string")
+    query_id: str | None = Field(None, max_length=64, description="Client-chosen id used to cancel the running query. Generated if not provided.")
+    timeout_ms: int | None = Field(None, gt=0, description="Statement timeout in milliseconds. Defaults to the connection's timeout.")
 
 
 class SqlQueryResponse(CamelCaseModel):
@@ -84,6 +196,166 @@ class SqlQueryResponse(CamelCaseModel):
     columns: list[str]
     rows: list[list[Any]]
     row_count: int
+    query_id: str | None = None
+
+
+class PagedQueryRequest(CamelCaseModel):
+    """Schema for paged SQL query request."""
+
+    sql: str = Field(..., description="SQL query string")
+    page_size: int | None = Field(None, gt=0, description="Rows per page. Defaults to the server's page size, capped at its maximum.")
+    timeout_ms: int | None = Field(None, gt=0, description="Timeout for opening the cursor and for each page fetch in milliseconds.")
+    materialize: bool = Field(False, description="Read the whole result on the server (spilled to disk when large) so the database connection is released and pages can be read at any offset and sorted.")
+
+
+class ExportRequest(CamelCaseModel):
+    """Schema for query result export request."""
+
+    sql: str = Field(..., description="SQL query string")
+    max_rows: int | None = Field(None, gt=0, description="Maximum rows to export. Defaults to, and is capped at, the server's export limit.")
+    timeout_ms: int | None = Field(None, gt=0, description="Statement timeout in milliseconds (per batch when read through a cursor).")
+
+
+class QueryPageResponse(CamelCaseModel):
+    """Schema for one page of a paged query result."""
+
+    columns: list[str]
+    rows: list[list[Any]]
+    row_count: int
+    offset: int
+    has_more: bool
+    continuation_token: str | None = None
+    truncated: bool = False
+
+
+# Admission Control Schemas
+class AdmissionStatsResponse(CamelCaseModel):
+    """Schema for admission control stats of a database connection."""
+
+    name: str
+    max_concurrency: int
+    max_queue: int
+    queue_timeout_seconds: float
+    active: int
+    queued: int
+    admitted: int
+    rejected: int
+    timed_out: int
+    mean_wait_ms: float
+    max_wait_ms: float
+
+
+# Metadata Refresh Scheduler Schemas
+class ScheduledRefreshItem(CamelCaseModel):
+    """Background metadata refresh schedule of a database connection."""
+
+    name: str
+    state: str = Field(..., description="scheduled, running or backing_off")
+    runs: int
+    consecutive_failures: int
+    last_error: str | None = None
+    last_success_at: datetime | None = None
+    last_finished_at: datetime | None = None
+    last_duration_ms: float | None = None
+    next_run_at: datetime | None = Field(None, description="None while a refresh is running")
+
+
+class RefreshSchedulerStatusResponse(CamelCaseModel):
+    """Schema for the background metadata refresh scheduler status."""
+
+    enabled: bool
+    interval_seconds: float
+    jitter: float
+    max_concurrency: int
+    running: int
+    connections: list[ScheduledRefreshItem]
+
+
+# Running Query Schemas
+class RunningQueryItem(CamelCaseModel):
+    """A query currently executing on a target database."""
+
+    id: str
+    sql: str
+    started_at: datetime
+    elapsed_ms: float
+    timeout_ms: int | None = None
+    cancelling: bool
+
+
+class RunningQueryListResponse(CamelCaseModel):
+    """Schema for running queries response."""
+
+    name: str
+    queries: list[RunningQueryItem]
+
+
+# Slow Query Log Schemas
+class SlowQueryStats(CamelCaseModel):
+    """Aggregated slow-query statistics for one query fingerprint."""
+
+    fingerprint: str
+    normalized_sql: str
+    sample_sql: str
+    calls: int
+    total_duration_ms: float
+    mean_duration_ms: float
+    max_duration_ms: float
+    total_rows: int
+    max_bytes_returned: int
+    last_seen_at: datetime
+    plan: Any | None = None
+    plan_error: str | None = None
+
+
+class SlowQueryListResponse(CamelCaseModel):
+    """Schema for slow-query log response."""
+
+    name: str
+    threshold_ms: float
+    queries: list[SlowQueryStats]
+
+
+# Query History Schemas
+class QueryFingerprintStats(CamelCaseModel):
+    """Execution statistics for one query fingerprint."""
+
+    fingerprint: str
+    sample_sql: str
+    calls: int
+    errors: int
+    total_duration_ms: float
+    mean_duration_ms: float
+    p95_duration_ms: float
+    max_duration_ms: float
+    total_rows: int
+    mean_rows: float
+    last_seen_at: datetime
+
+
+class QueryStatsResponse(CamelCaseModel):
+    """Schema for per-fingerprint query statistics response."""
+
+    name: str
+    queries: list[QueryFingerprintStats]
+
+
+class QueryHistoryItem(CamelCaseModel):
+    """A recently executed query."""
+
+    sql: str
+    duration_ms: float
+    row_count: int
+    status: str
+    error_message: str | None = None
+    executed_at: datetime
+
+
+class QueryHistoryResponse(CamelCaseModel):
+    """Schema for recent query history response."""
+
+    name: str
+    queries: list[QueryHistoryItem]
 
 
 # Natural Language Query Schemas
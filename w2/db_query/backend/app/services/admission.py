@@ -0,0 +1,215 @@
+"""Admission control for queries sent to target databases.
+
+Each stored connection gets a :class:`ConnectionLimiter` that allows at most
+``max_concurrency`` queries to run at once. Further queries wait in a bounded
+queue; waiting queries are admitted round-robin between users, so one user
+submitting a burst cannot starve the others. A query is rejected straight away
+when the queue is full, and gives up when it has waited longer than the queue
+timeout, so a saturated database sheds load instead of every request timing
+out together.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionError(Exception):
+    """Raised when a query is not admitted to its database."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(AdmissionError):
+    """The connection's wait queue is full."""
+
+
+class QueueWaitTimeoutError(AdmissionError):
+    """The query waited longer than the queue timeout."""
+
+
+class ConnectionLimiter:
+    """Concurrency limit with a fair, bounded wait queue for one connection."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        # Waiters per user; users are served round-robin in insertion order
+        self._waiters: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    @asynccontextmanager
+    async def slot(self, user: str) -> AsyncIterator[float]:
+        """Hold one of the connection's query slots.
+
+        Args:
+            user: Identity used for fair scheduling between users
+
+        Yields:
+            Time spent waiting for the slot in milliseconds
+
+        Raises:
+            QueueFullError: If the query cannot even be queued
+            QueueWaitTimeoutError: If no slot became free within the queue timeout
+        """
+        wait_ms = await self._acquire(user)
+        try:
+            yield wait_ms
+        finally:
+            self._release()
+
+    async def _acquire(self, user: str) -> float:
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(
+                f"Too many queries waiting for '{self.name}' "
+                f"({self.active} running, {self.queued} queued)",
+                retry_after=max(1, round(self.queue_timeout)),
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user, deque()).append(waiter)
+        self.queued += 1
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: pass it on
+                self._release()
+            else:
+                waiter.cancel()
+                self._remove_waiter(user, waiter)
+            if isinstance(e, TimeoutError):
+                self.timed_out += 1
+                raise QueueWaitTimeoutError(
+                    f"Timed out after {self.queue_timeout}s waiting for a query slot on '{self.name}'",
+                    retry_after=max(1, round(self.queue_timeout)),
+                ) from e
+            raise
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.admitted += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        return wait_ms
+
+    def _remove_waiter(self, user: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(user)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        self.queued -= 1
+        if not waiters:
+            del self._waiters[user]
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self.active < self.max_concurrency and self._waiters:
+            user, waiters = self._waiters.popitem(last=False)
+            waiter = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                # Back of the line: other users' waiters go first
+                self._waiters[user] = waiters
+            if waiter.done():
+                continue
+            self.active += 1
+            waiter.set_result(None)
+
+    def stats(self) -> dict[str, Any]:
+        waited = self.admitted or 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "mean_wait_ms": round(self.total_wait_ms / waited, 2),
+            "max_wait_ms": round(self.max_wait_ms, 2),
+        }
+
+
+_limiters: dict[str, ConnectionLimiter] = {}
+
+
+def get_limiter(connection_name: str) -> ConnectionLimiter:
+    """Get (or create) the limiter of a connection from the current settings."""
+    limiter = _limiters.get(connection_name)
+    if limiter is None:
+        limiter = ConnectionLimiter(
+            connection_name,
+            max_concurrency=settings.admission_concurrency_overrides.get(
+                connection_name, settings.admission_max_concurrency
+            ),
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+        )
+        _limiters[connection_name] = limiter
+    return limiter
+
+
+def discard_limiter(connection_name: str) -> None:
+    """Forget a connection's limiter (e.g. after the connection is deleted)."""
+    _limiters.pop(connection_name, None)
+
+
+@asynccontextmanager
+async def admission_slot(connection_name: str, user: str) -> AsyncIterator[float]:
+    """Wait for a query slot on a connection.
+
+    A max concurrency of 0 for the connection turns admission control off.
+
+    Args:
+        connection_name: Connection the query will run on
+        user: Identity used for fair scheduling between users
+
+    Yields:
+        Time spent waiting for the slot in milliseconds
+    """
+    limiter = get_limiter(connection_name)
+    if limiter.max_concurrency <= 0:
+        yield 0.0
+        return
+    try:
+        async with limiter.slot(user) as wait_ms:
+            if wait_ms:
+                logger.info(
+                    f"Query on {connection_name} for {user} waited {wait_ms:.0f}ms for a slot"
+                )
+            yield wait_ms
+    except AdmissionError as e:
+        logger.warning(f"Query on {connection_name} for {user} not admitted: {e}")
+        raise
@@ -0,0 +1,89 @@
+"""Coalescing of identical in-flight queries.
+
+When several requests run the same query on the same connection at the same
+time - typically a shared dashboard being opened by several users - only the
+first one executes it; the others wait for that execution and receive the same
+result. Queries are identified by connection name and normalized SQL (see
+``sql_parser.normalize_sql``), and nothing is kept once the execution finishes:
+this is not a result cache.
+
+The shared execution keeps running while any of its requests still waits for
+it and is cancelled when the last one has gone away.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from ..config import settings
+from .running_queries import QueryCancelledError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class QueryCoalescer:
+    """Shares one execution between concurrent callers using the same key."""
+
+    def __init__(self) -> None:
+        self._flights: dict[Any, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: Any | None,
+        execute: Callable[[], Awaitable[T]],
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    ) -> T:
+        """Run ``execute`` or join the execution already in flight for ``key``.
+
+        Args:
+            key: Identity of the execution; None never coalesces
+            execute: Starts the execution (only called if nothing is in flight)
+            is_disconnected: Polled while waiting; the caller stops waiting once
+                it returns True
+
+        Returns:
+            The result of the shared execution
+
+        Raises:
+            QueryCancelledError: If the caller disconnected while waiting
+        """
+        flight = self._flights.get(key) if key is not None else None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(execute()))
+            self.executions += 1
+            if key is not None:
+                self._flights[key] = flight
+                flight.task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Joined in-flight execution ({flight.waiters} waiting)")
+
+        flight.waiters += 1
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {flight.task}, timeout=settings.query_disconnect_poll_seconds
+                )
+                if done:
+                    return flight.task.result()
+                if is_disconnected is not None and await is_disconnected():
+                    raise QueryCancelledError("Query was cancelled: client disconnected")
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+
+query_coalescer = QueryCoalescer()
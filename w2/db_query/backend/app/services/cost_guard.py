@@ -0,0 +1,205 @@
+"""Cost-based guardrail for user queries.
+
+Before a query runs, its planner estimate (EXPLAIN, without executing it) is
+compared with the connection's limits. A query whose estimated cost or rows
+exceed a limit is rejected, or - with ``cost_guard_action = "downgrade"`` -
+run with the shorter ``cost_guard_downgrade_timeout_ms`` statement timeout.
+
+Estimates are cached per connection and query fingerprint, so queries that
+differ only in literals share one EXPLAIN and the check adds a round trip
+only the first time a query shape is seen. LIMIT / OFFSET values are part of
+the cache key (``LIMIT 10`` must not vouch for ``LIMIT 10000000``). Since
+other literals can change a plan's estimate, only estimates far below the
+limits (under half of each) are reused, to allow a query; a query is never
+rejected or downgraded on a cached estimate. A connection's estimates are
+dropped when a metadata refresh reports dropped or altered tables. If the
+plan cannot be obtained the query is allowed: the guard never blocks queries
+it cannot judge.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from ..adapters import ConnectionInfo, QueryEstimate, get_adapter_factory
+from ..config import settings
+from .events import event_bus
+from .metadata import METADATA_CHANGED, MetadataChanged
+from .sql_parser import fingerprint_sql, row_limit_values
+
+logger = logging.getLogger(__name__)
+
+ALLOW = "allow"
+REJECT = "reject"
+DOWNGRADE = "downgrade"
+
+# Only estimates below this fraction of every limit are cached and reused
+_REUSE_MARGIN = 0.5
+
+
+@dataclass(frozen=True)
+class CostLimits:
+    """Estimate limits of a connection; None means unlimited."""
+
+    max_cost: float | None
+    max_rows: float | None
+
+
+@dataclass(frozen=True)
+class CostDecision:
+    """Outcome of the cost check for one query."""
+
+    action: str
+    estimate: QueryEstimate | None = None
+    limits: CostLimits | None = None
+    reason: str | None = None
+
+    def details(self) -> dict[str, Any]:
+        return {
+            "estimated_cost": self.estimate.cost if self.estimate else None,
+            "estimated_rows": self.estimate.rows if self.estimate else None,
+            "max_cost": self.limits.max_cost if self.limits else None,
+            "max_rows": self.limits.max_rows if self.limits else None,
+        }
+
+
+class QueryCostExceededError(ValueError):
+    """Raised when a query's estimate exceeds the connection's limits."""
+
+    def __init__(self, decision: CostDecision) -> None:
+        super().__init__(decision.reason)
+        self.decision = decision
+
+
+class EstimateCache:
+    """TTL + LRU cache of query estimates keyed by connection and fingerprint."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, ...], tuple[float, QueryEstimate]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, ...]) -> QueryEstimate | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple[str, ...], estimate: QueryEstimate) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, estimate)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard_connection(self, connection_name: str) -> None:
+        for key in [key for key in self._entries if key[0] == connection_name]:
+            del self._entries[key]
+
+
+estimate_cache = EstimateCache(
+    settings.cost_guard_cache_size, settings.cost_guard_cache_ttl_seconds
+)
+
+
+def _on_metadata_changed(event: MetadataChanged) -> None:
+    # Plans of existing queries only change when tables they may read were
+    # dropped or altered, not when tables were added
+    if event.diff["tables_dropped"] or event.diff["tables_altered"]:
+        estimate_cache.discard_connection(event.connection_name)
+
+
+event_bus.subscribe(METADATA_CHANGED, _on_metadata_changed)
+
+
+def get_cost_limits(connection_name: str) -> CostLimits:
+    """Get the estimate limits of a connection.
+
+    Entries in ``settings.cost_guard_overrides`` (``max_cost`` / ``max_rows``)
+    replace the global limits for that connection; 0 means unlimited.
+    """
+    override = settings.cost_guard_overrides.get(connection_name, {})
+    max_cost = override.get("max_cost", settings.cost_guard_max_cost)
+    max_rows = override.get("max_rows", settings.cost_guard_max_rows)
+    return CostLimits(max_cost=max_cost or None, max_rows=max_rows or None)
+
+
+def _far_below_limits(estimate: QueryEstimate, limits: CostLimits) -> bool:
+    """Whether an estimate allows its query by a margin other literals are unlikely to cross."""
+    return all(
+        limit is None or value <= limit * _REUSE_MARGIN
+        for value, limit in ((estimate.cost, limits.max_cost), (estimate.rows, limits.max_rows))
+    )
+
+
+async def estimate_query(
+    connection_name: str, url: str, database_type: str, sql: str, limits: CostLimits
+) -> QueryEstimate | None:
+    """Get a query's estimate, from the cache when its fingerprint was seen far below the limits.
+
+    Returns:
+        The estimate, or None if the plan could not be obtained
+    """
+    fingerprint, _ = fingerprint_sql(sql, database_type)
+    key = (connection_name, fingerprint, *row_limit_values(sql, database_type))
+    estimate = estimate_cache.get(key)
+    if estimate is not None and _far_below_limits(estimate, limits):
+        return estimate
+    try:
+        adapter = get_adapter_factory().create(database_type)
+        estimate = await adapter.estimate_query(ConnectionInfo.from_url(url), sql)
+    except Exception as e:
+        logger.warning(f"Cost estimate failed on {connection_name}, allowing query: {e}")
+        return None
+    if _far_below_limits(estimate, limits):
+        estimate_cache.put(key, estimate)
+    return estimate
+
+
+async def check_query_cost(
+    connection_name: str, url: str, database_type: str, sql: str
+) -> CostDecision:
+    """Decide whether a query may run, based on its planner estimate.
+
+    Args:
+        connection_name: Connection the query will run on
+        url: Database connection URL
+        database_type: Database type identifier
+        sql: SQL to check
+
+    Returns:
+        The decision (allow, or downgrade)
+
+    Raises:
+        QueryCostExceededError: If the query is over a limit and the action is reject
+    """
+    limits = get_cost_limits(connection_name)
+    if not settings.cost_guard_enabled or (
+        limits.max_cost is None and limits.max_rows is None
+    ):
+        return CostDecision(ALLOW)
+
+    estimate = await estimate_query(connection_name, url, database_type, sql, limits)
+    if estimate is None:
+        return CostDecision(ALLOW)
+
+    if limits.max_cost is not None and estimate.cost > limits.max_cost:
+        reason = f"Estimated cost {estimate.cost:,.0f} exceeds the limit of {limits.max_cost:,.0f}"
+    elif limits.max_rows is not None and estimate.rows > limits.max_rows:
+        reason = f"Estimated {estimate.rows:,.0f} rows exceeds the limit of {limits.max_rows:,.0f}"
+    else:
+        return CostDecision(ALLOW, estimate, limits)
+
+    action = DOWNGRADE if settings.cost_guard_action == DOWNGRADE else REJECT
+    decision = CostDecision(action, estimate, limits, reason)
+    logger.warning(f"Query on {connection_name} over cost limits ({action}): {reason}")
+    if action == REJECT:
+        raise QueryCostExceededError(decision)
+    return decision
@@ -5,14 +5,20 @@ following the Dependency Inversion Principle - it depends on abstractions
 (DatabaseAdapter) rather than concrete implementations.
 """
 
+import asyncio
+import time
+from collections.abc import Callable, Mapping
 from typing import Any
 from urllib.parse import urlparse
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..adapters import ConnectionInfo, DatabaseAdapter, get_adapter_factory
+from ..adapters import ColumnarResult, ConnectionInfo, DatabaseAdapter, get_adapter_factory
+from ..config import settings
 from ..models import DatabaseConnection
+from .query_history import QueryHistoryEntry, history_writer
+from .slow_queries import result_size_bytes, schedule_slow_query_log
 
 
 def detect_database_type(url: str) -> str:
@@ -160,25 +166,110 @@ async def delete_connection(session: AsyncSession, name: str) -> bool:
     return True
 
 
+def resolve_query_timeout(
+    connection_name: str | None, requested_ms: int | None = None
+) -> int | None:
+    """Work out the statement timeout for a query.
+    
+    The requested timeout (per request) takes precedence over the connection's
+    entry in ``settings.query_timeout_overrides``, which takes precedence over
+    ``settings.query_timeout_ms``. The result is capped at
+    ``settings.query_timeout_max_ms``; a timeout of 0 means "up to the cap",
+    and with the cap also 0 the query runs without a timeout.
+    
+    Args:
+        connection_name: Name of the stored connection, if any
+        requested_ms: Timeout requested by the caller in milliseconds
+        
+    Returns:
+        Timeout in milliseconds, or None for no timeout
+    """
+    timeout_ms = requested_ms
+    if timeout_ms is None:
+        timeout_ms = settings.query_timeout_overrides.get(
+            connection_name or "", settings.query_timeout_ms
+        )
+    if settings.query_timeout_max_ms > 0:
+        if timeout_ms <= 0:
+            timeout_ms = settings.query_timeout_max_ms
+        timeout_ms = min(timeout_ms, settings.query_timeout_max_ms)
+    return timeout_ms if timeout_ms > 0 else None
+
+
 async def execute_query(
-    url: str, database_type: str, sql: str
-) -> dict[str, Any]:
+    url: str,
+    database_type: str,
+    sql: str,
+    connection_name: str | None = None,
+    timeout_ms: int | None = None,
+    on_connect: Callable[[int], None] | None = None,
+) -> Mapping[str, Any]:
     """Execute a SQL query and return results using appropriate adapter.
     
+    Every execution on a named connection is timed and queued for the query
+    history; when it takes at least ``settings.slow_query_threshold_ms`` it is
+    also recorded in the slow-query log (with its EXPLAIN plan) in the background.
+    
     Args:
         url: Database connection URL
         database_type: Database type identifier
         sql: SQL SELECT query to execute
+        connection_name: Name of the stored connection, used for history and slow-query log
+        timeout_ms: Requested statement timeout (see ``resolve_query_timeout``)
+        on_connect: Called with the server-side session id once connected
         
     Returns:
-        Dictionary with columns, rows, and row_count
+        Mapping with columns, rows, and row_count (a ColumnarResult)
         
     Raises:
+        QueryTimeoutError: If the query exceeds its statement timeout
         ValueError: If database type is unsupported or query execution fails
     """
     factory = get_adapter_factory()
     adapter = factory.create(database_type)
     connection_info = ConnectionInfo.from_url(url)
+    timeout_ms = resolve_query_timeout(connection_name, timeout_ms)
+    
+    start = time.perf_counter()
+    try:
+        result = await adapter.execute_query(
+            connection_info, sql, timeout_ms=timeout_ms, on_connect=on_connect
+        )
+    except (Exception, asyncio.CancelledError) as e:
+        if connection_name and settings.query_history_enabled:
+            history_writer.enqueue(
+                QueryHistoryEntry(
+                    connection_name=connection_name,
+                    database_type=database_type,
+                    sql=sql,
+                    duration_ms=(time.perf_counter() - start) * 1000,
+                    error_message=str(e) or type(e).__name__,
+                )
+            )
+        raise
+    duration_ms = (time.perf_counter() - start) * 1000
     
-    result = await adapter.execute_query(connection_info, sql)
-    return result.to_dict()
+    # Adapters return a ColumnarResult, which already is the result mapping;
+    # its row lists are only built if a caller asks for them
+    result_dict = result if isinstance(result, ColumnarResult) else result.to_dict()
+    if connection_name and settings.query_history_enabled:
+        history_writer.enqueue(
+            QueryHistoryEntry(
+                connection_name=connection_name,
+                database_type=database_type,
+                sql=sql,
+                duration_ms=duration_ms,
+                row_count=result.row_count,
+            )
+        )
+    if connection_name and duration_ms >= settings.slow_query_threshold_ms:
+        schedule_slow_query_log(
+            url=url,
+            connection_name=connection_name,
+            database_type=database_type,
+            sql=sql,
+            duration_ms=duration_ms,
+            row_count=result.row_count,
+            bytes_returned=result_size_bytes(result_dict),
+        )
+    return result_dict
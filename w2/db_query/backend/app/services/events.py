@@ -0,0 +1,54 @@
+"""In-process event bus.
+
+Services publish events to :data:`event_bus` under a topic, and other
+services subscribe handlers to the topics they care about, so a producer
+does not need to know its consumers (e.g. caches that must be invalidated
+when a connection's metadata changes). Handlers may be plain functions or
+coroutine functions; they run in subscription order, awaited by the
+publisher, and an exception in one handler is logged without affecting the
+others or the publisher.
+"""
+
+import inspect
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[Any], Awaitable[None] | None]
+
+
+class EventBus:
+    """Topic-based publish/subscribe within the process."""
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[EventHandler]] = {}
+
+    def subscribe(self, topic: str, handler: EventHandler) -> Callable[[], None]:
+        """Call ``handler`` with every event published under ``topic``.
+
+        Returns:
+            A function that unsubscribes the handler
+        """
+        self._handlers.setdefault(topic, []).append(handler)
+
+        def unsubscribe() -> None:
+            handlers = self._handlers.get(topic, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+        return unsubscribe
+
+    async def publish(self, topic: str, event: Any) -> None:
+        """Deliver an event to the topic's handlers."""
+        for handler in list(self._handlers.get(topic, ())):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception(f"Event handler {handler!r} failed for {topic}")
+
+
+event_bus = EventBus()
@@ -0,0 +1,366 @@
+"""Streaming export of query results as CSV, Parquet or xlsx files.
+
+CSV from PostgreSQL is written by the server itself (``COPY (query) TO
+STDOUT``). Every other export reads the query through a server-side cursor
+in batches and encodes each batch as it arrives, so only one batch is held in
+memory. CSV can be gzip-compressed on the fly with :func:`gzip_chunks`;
+Parquet column chunks are compressed by the writer and xlsx files are zip
+archives already.
+
+Parquet needs ``pyarrow`` and xlsx needs ``openpyxl`` (the ``formats``
+extra). A format whose package is missing is not available.
+"""
+
+import asyncio
+import csv
+import io
+import tempfile
+import zlib
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from pydantic_core import to_jsonable_python
+
+from ..adapters import ConnectionInfo, CsvCopyAdapter, ResultCursor, get_adapter_factory
+from . import result_formats
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional: the "formats" extra
+    pq = None
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except ImportError:  # optional: the "formats" extra
+    Workbook = None
+
+CSV = "csv"
+PARQUET = "parquet"
+XLSX = "xlsx"
+
+EXPORT_MEDIA_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    PARQUET: "application/vnd.apache.parquet",
+    XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Worksheet rows below the header row
+XLSX_MAX_ROWS = 1_048_575
+
+# COPY chunks buffered ahead of a slow client before the COPY is paused
+_COPY_QUEUE_CHUNKS = 64
+_FILE_CHUNK_BYTES = 64 * 1024
+
+
+class ExportFormatError(ValueError):
+    """The export format is unknown or its package is not installed."""
+
+
+def available_export_formats() -> list[str]:
+    """Export formats that can be produced with the installed packages."""
+    formats = [CSV]
+    if pq is not None:
+        formats.append(PARQUET)
+    if Workbook is not None:
+        formats.append(XLSX)
+    return formats
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        try:
+            return value.decode()
+        except UnicodeDecodeError:
+            return "\\x" + value.hex()
+    value = to_jsonable_python(value)
+    return value if isinstance(value, str) else orjson.dumps(value).decode()
+
+
+class _CsvEncoder:
+    """Rows to CSV text with a header row; NULL is an empty field."""
+
+    def __init__(self, columns: list[str]) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._writer.writerow(columns)
+
+    def write(self, rows: list[list[Any]]) -> bytes:
+        self._writer.writerows(
+            [
+                value if value is None or isinstance(value, (str, int, float)) else _text(value)
+                for value in row
+            ]
+            for row in rows
+        )
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    async def close(self) -> AsyncIterator[bytes]:
+        yield b""
+
+
+class _ChunkSink:
+    """Write-only file that hands out what was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ParquetEncoder:
+    """Rows to a Parquet file, one row group per batch.
+
+    The schema is taken from the first batch; columns that are all NULL there
+    are written as strings.
+    """
+
+    def __init__(self, columns: list[str]) -> None:
+        self._columns = columns
+        self._sink = _ChunkSink()
+        self._writer = None
+
+    def _array(self, values: tuple[Any, ...], field: Any) -> Any:
+        pa = result_formats.pa
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            if not pa.types.is_string(field.type):
+                raise ValueError(f"Column {field.name!r} does not match its type {field.type}")
+            return pa.array([None if value is None else _text(value) for value in values], type=pa.string())
+
+    def write(self, rows: list[list[Any]]) -> bytes:
+        pa = result_formats.pa
+        columns = list(zip(*rows)) if rows else [() for _ in self._columns]
+        if self._writer is None:
+            arrays = [result_formats.arrow_array(values) for values in columns]
+            arrays = [
+                pa.array(values, type=pa.string()) if pa.types.is_null(array.type) else array
+                for values, array in zip(columns, arrays)
+            ]
+            table = pa.Table.from_arrays(arrays, names=self._columns)
+            self._writer = pq.ParquetWriter(self._sink, table.schema, compression="zstd")
+        else:
+            schema = self._writer.schema_arrow
+            table = pa.Table.from_arrays(
+                [self._array(values, field) for values, field in zip(columns, schema)], schema=schema
+            )
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    async def close(self) -> AsyncIterator[bytes]:
+        if self._writer is None:
+            self.write([])
+        self._writer.close()
+        yield self._sink.drain()
+
+
+def _cell(value: Any) -> Any:
+    if value is None or isinstance(value, (int, float, Decimal, date, timedelta)):
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            # Excel has no time zones: write UTC
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, time):
+        return value.replace(tzinfo=None)
+    return ILLEGAL_CHARACTERS_RE.sub("", _text(value))
+
+
+class _XlsxEncoder:
+    """Rows to a single-sheet xlsx workbook.
+
+    openpyxl's write-only mode keeps rows in a temporary file; the workbook
+    is only zipped (and sent) once every row has been written.
+    """
+
+    def __init__(self, columns: list[str]) -> None:
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Result")
+        self._sheet.append(columns)
+
+    def write(self, rows: list[list[Any]]) -> bytes:
+        for row in rows:
+            self._sheet.append([_cell(value) for value in row])
+        return b""
+
+    async def close(self) -> AsyncIterator[bytes]:
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as file:
+            await asyncio.to_thread(self._workbook.save, file)
+            file.seek(0)
+            while chunk := file.read(_FILE_CHUNK_BYTES):
+                yield chunk
+
+
+_ENCODERS = {CSV: _CsvEncoder, PARQUET: _ParquetEncoder, XLSX: _XlsxEncoder}
+
+
+class ExportStream:
+    """The file's bytes in chunks, while the export is running.
+
+    :meth:`aclose` stops the query and releases its connection; it is safe
+    to call more than once, and before or after the chunks were read.
+    """
+
+    def __init__(
+        self, chunks: AsyncIterator[bytes], release: Callable[[], Awaitable[None]]
+    ) -> None:
+        self._chunks = chunks
+        self._release = release
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._chunks
+
+    async def aclose(self) -> None:
+        await self._chunks.aclose()
+        # Shielded: runs to completion even when the request is being cancelled
+        await asyncio.shield(self._release())
+
+
+async def _copy_export(
+    adapter: CsvCopyAdapter, info: ConnectionInfo, sql: str, timeout_ms: int | None
+) -> ExportStream:
+    """Run the COPY in a task; its chunks are passed on through a bounded queue."""
+    queue: asyncio.Queue[bytes | Exception | None] = asyncio.Queue(maxsize=_COPY_QUEUE_CHUNKS)
+
+    async def run() -> None:
+        try:
+            await adapter.copy_query_csv(info, sql, queue.put, timeout_ms=timeout_ms)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    task = asyncio.create_task(run())
+    first = await queue.get()
+    if isinstance(first, Exception):
+        raise first
+
+    async def chunks() -> AsyncIterator[bytes]:
+        item = first
+        while item is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            item = await queue.get()
+
+    async def release() -> None:
+        # Cancelling the task aborts the COPY and closes its connection
+        task.cancel()
+
+    return ExportStream(chunks(), release)
+
+
+async def _cursor_export(
+    cursor: ResultCursor, export_format: str, batch_rows: int
+) -> ExportStream:
+    """Read the cursor in batches, encoding each one as it arrives."""
+    closed = False
+
+    async def release() -> None:
+        nonlocal closed
+        if not closed:
+            closed = True
+            await cursor.close()
+
+    try:
+        rows = await cursor.fetch(batch_rows)
+    except BaseException:
+        await release()
+        raise
+    encoder = _ENCODERS[export_format](cursor.columns)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        batch = rows
+        while True:
+            chunk = await asyncio.to_thread(encoder.write, batch)
+            if chunk:
+                yield chunk
+            if len(batch) < batch_rows:
+                break
+            batch = await cursor.fetch(batch_rows)
+        # Every row is read: free the connection before the file is finished
+        await release()
+        async for chunk in encoder.close():
+            if chunk:
+                yield chunk
+
+    return ExportStream(chunks(), release)
+
+
+async def open_export(
+    url: str,
+    database_type: str,
+    sql: str,
+    export_format: str,
+    timeout_ms: int | None = None,
+    batch_rows: int = 5_000,
+) -> ExportStream:
+    """Start exporting a query's result.
+
+    The query is started before this returns, so connection and SQL errors
+    are raised here rather than in the middle of the response.
+
+    Args:
+        url: Database connection URL
+        database_type: Database type identifier
+        sql: SQL SELECT query, already validated and capped
+        export_format: One of ``CSV``, ``PARQUET``, ``XLSX``
+        timeout_ms: Statement timeout (per fetch when read through a cursor,
+            until the first chunk for a COPY)
+        batch_rows: Rows fetched and encoded at a time
+
+    Returns:
+        ExportStream with the file's bytes; close it to stop the query early
+
+    Raises:
+        ExportFormatError: If the format is not available
+        QueryTimeoutError: If the query times out before the first chunk
+        ValueError: If the query fails
+    """
+    if export_format not in available_export_formats():
+        raise ExportFormatError(
+            f"Export format '{export_format}' is not available; "
+            f"available: {', '.join(available_export_formats())}"
+        )
+    adapter = get_adapter_factory().create(database_type)
+    info = ConnectionInfo.from_url(url)
+    if export_format == CSV and isinstance(adapter, CsvCopyAdapter):
+        return await _copy_export(adapter, info, sql, timeout_ms)
+    cursor = await adapter.open_cursor(info, sql, timeout_ms=timeout_ms)
+    return await _cursor_export(cursor, export_format, batch_rows)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip-compress a stream of chunks as they pass through."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
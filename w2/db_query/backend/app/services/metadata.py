@@ -4,19 +4,60 @@ This module has been refactored to use the DatabaseAdapter pattern,
 eliminating database-specific if/elif chains and following the Open-Closed Principle.
 """
 
+import asyncio
+import gzip
+import hashlib
 import json
 import logging
+import weakref
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from ..adapters import ConnectionInfo, get_adapter_factory
-from ..models import DatabaseConnection, DatabaseMetadata
+from ..adapters import CatalogProbeAdapter, ConnectionInfo, get_adapter_factory
+from ..config import settings
+from ..instrumentation import budget_exempt
+from ..models import (
+    DatabaseConnection,
+    DatabaseMetadata,
+    MetaCatalogState,
+    MetaColumn,
+    MetaSnapshotBlob,
+    MetaSnapshotDiff,
+    MetaTable,
+)
+from .events import event_bus
 from .llm import convert_metadata_to_json
 
+try:
+    import zstandard
+except ImportError:  # optional: the "zstd" extra
+    zstandard = None
+
 logger = logging.getLogger(__name__)
 
+# Layout of stored snapshot blobs; bump when the rendered response changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Event bus topic of :class:`MetadataChanged` events
+METADATA_CHANGED = "metadata.changed"
+
+
+@dataclass(frozen=True)
+class MetadataChanged:
+    """Published after a refresh changed a connection's metadata."""
+
+    connection_name: str
+    from_version: int
+    to_version: int
+    # See diff_snapshots
+    diff: dict[str, Any]
+
 
 async def get_metadata(
     session: AsyncSession, connection_name: str
@@ -38,10 +79,106 @@ async def get_metadata(
     return result.scalar_one_or_none()
 
 
+def _json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _split_name(name: str) -> tuple[str, str]:
+    """Split a snapshot table name into schema and table ("" for no schema)."""
+    schema, dot, table = name.partition(".")
+    return (schema, table) if dot else ("", name)
+
+
+def _extra_json(entry: dict[str, Any], stored: dict[str, Any]) -> str | None:
+    """Keys of a snapshot entry that are not held in their own column, as JSON."""
+    extra = {
+        key: value
+        for key, value in entry.items()
+        if key not in stored or stored[key] is not value
+    }
+    return _json(extra) if extra else None
+
+
+def _table_fields(position: int, entry: dict[str, Any]) -> dict[str, Any]:
+    name = entry.get("name")
+    table_type = entry.get("type")
+    stored = {"columns": entry.get("columns")}
+    if isinstance(name, str):
+        stored["name"] = name
+    if isinstance(table_type, str):
+        stored["type"] = table_type
+    name = name if isinstance(name, str) else str(name or "")
+    schema_name, table_name = _split_name(name)
+    return {
+        "name": name,
+        "schema_name": schema_name,
+        "table_name": table_name,
+        "table_type": table_type if isinstance(table_type, str) else "table",
+        "position": position,
+        "extra_json": _extra_json(entry, stored),
+    }
+
+
+def _column_fields(position: int, entry: dict[str, Any]) -> dict[str, Any]:
+    name = entry.get("name")
+    data_type = entry.get("type")
+    nullable = entry.get("nullable")
+    stored = {"default": entry.get("default")}
+    if isinstance(name, str):
+        stored["name"] = name
+    if data_type is None or isinstance(data_type, str):
+        stored["type"] = data_type
+    if nullable is None or isinstance(nullable, bool):
+        stored["nullable"] = nullable
+    return {
+        "position": position,
+        "column_name": name if isinstance(name, str) else str(name or ""),
+        "data_type": data_type if isinstance(data_type, str) else None,
+        "nullable": nullable if isinstance(nullable, bool) else None,
+        "default_json": _json(entry.get("default")),
+        "extra_json": _extra_json(entry, stored),
+    }
+
+
+def _table_entry(table: MetaTable, columns: list[MetaColumn]) -> dict[str, Any]:
+    """Rebuild a snapshot table entry from its rows."""
+    entry = {
+        "name": table.name,
+        "type": table.table_type,
+        "columns": [_column_entry(column) for column in columns],
+    }
+    if table.extra_json:
+        entry.update(json.loads(table.extra_json))
+    return entry
+
+
+def _column_entry(column: MetaColumn) -> dict[str, Any]:
+    entry = {
+        "name": column.column_name,
+        "type": column.data_type,
+        "nullable": column.nullable,
+        "default": json.loads(column.default_json) if column.default_json else None,
+    }
+    if column.extra_json:
+        entry.update(json.loads(column.extra_json))
+    return entry
+
+
+def _apply(row: Any, fields: dict[str, Any]) -> None:
+    # Unchanged values do not mark the row dirty, so only real changes are written
+    for key, value in fields.items():
+        setattr(row, key, value)
+
+
 async def save_metadata(
     session: AsyncSession, connection_name: str, metadata_json: dict[str, Any]
 ) -> DatabaseMetadata:
-    """Save metadata to database.
+    """Save a metadata snapshot to database.
+    
+    Tables and columns are stored as rows of ``meta_tables`` /
+    ``meta_columns`` and updated as a diff against the stored snapshot: only
+    added, removed and changed rows are written. Stored snapshot blobs of
+    the connection are deleted.
     
     Args:
         session: Database session
@@ -51,35 +188,526 @@ async def save_metadata(
     Returns:
         DatabaseMetadata instance
     """
-    # Check if metadata exists
+    extras = {key: value for key, value in metadata_json.items() if key != "tables"}
     existing = await get_metadata(session, connection_name)
-    if existing:
-        existing.metadata_json = json.dumps(metadata_json)
-        await session.commit()
-        await session.refresh(existing)
-        return existing
+    if existing is None:
+        existing = DatabaseMetadata(connection_name=connection_name, metadata_json=_json(extras))
+        session.add(existing)
     else:
-        new_metadata = DatabaseMetadata(
+        existing.metadata_json = _json(extras)
+        existing.updated_at = func.now()
+
+    stored: dict[str, list[MetaTable]] = {}
+    result = await session.execute(
+        select(MetaTable)
+        .where(MetaTable.connection_name == connection_name)
+        .options(selectinload(MetaTable.columns))
+        .order_by(MetaTable.position)
+    )
+    for table in result.scalars():
+        stored.setdefault(table.name, []).append(table)
+
+    for position, entry in enumerate(metadata_json.get("tables") or []):
+        fields = _table_fields(position, entry)
+        matches = stored.get(fields["name"])
+        table = matches.pop(0) if matches else None
+        if table is None:
+            table = MetaTable(connection_name=connection_name, columns=[], **fields)
+            session.add(table)
+        else:
+            _apply(table, fields)
+
+        columns = list(table.columns)
+        for column_position, column_entry in enumerate(entry.get("columns") or []):
+            column_fields = _column_fields(column_position, column_entry)
+            column_fields.update(
+                connection_name=connection_name,
+                schema_name=fields["schema_name"],
+                table_name=fields["table_name"],
+            )
+            if column_position < len(columns):
+                _apply(columns[column_position], column_fields)
+            else:
+                table.columns.append(MetaColumn(**column_fields))
+        # Columns dropped from the table
+        del table.columns[len(entry.get("columns") or []):]
+
+    # Tables no longer in the snapshot
+    for tables in stored.values():
+        for table in tables:
+            await session.delete(table)
+
+    await session.execute(
+        delete(MetaSnapshotBlob).where(MetaSnapshotBlob.connection_name == connection_name)
+    )
+    await session.commit()
+    await session.refresh(existing)
+    return existing
+
+
+async def load_metadata(
+    session: AsyncSession, connection_name: str
+) -> dict[str, Any] | None:
+    """Load a connection's full metadata snapshot.
+    
+    A snapshot still stored as a single JSON document (written before
+    tables and columns had their own rows) is normalized on the way.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        
+    Returns:
+        Metadata dictionary, or None if no metadata was saved
+    """
+    header = await get_metadata(session, connection_name)
+    if header is None:
+        return None
+    extras = json.loads(header.metadata_json)
+    if "tables" in extras:
+        await _normalize_legacy(session, connection_name, extras)
+        return extras
+
+    tables = (
+        await session.execute(
+            select(MetaTable)
+            .where(MetaTable.connection_name == connection_name)
+            .order_by(MetaTable.position)
+            .execution_options(populate_existing=True)
+        )
+    ).scalars().all()
+    columns: dict[int, list[MetaColumn]] = {}
+    for column in (
+        await session.execute(
+            select(MetaColumn)
+            .where(MetaColumn.connection_name == connection_name)
+            .order_by(MetaColumn.table_id, MetaColumn.position)
+            .execution_options(populate_existing=True)
+        )
+    ).scalars():
+        columns.setdefault(column.table_id, []).append(column)
+    return {
+        "tables": [_table_entry(table, columns.get(table.id, [])) for table in tables],
+        **extras,
+    }
+
+
+async def has_metadata(session: AsyncSession, connection_name: str) -> bool:
+    """Check whether a connection has a stored metadata snapshot.
+    
+    Only the snapshot header is read; a snapshot still stored as a single
+    JSON document is normalized into table and column rows first.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        
+    Returns:
+        True if metadata was saved
+    """
+    header = await get_metadata(session, connection_name)
+    if header is None:
+        return False
+    extras = json.loads(header.metadata_json)
+    if "tables" in extras:
+        await _normalize_legacy(session, connection_name, extras)
+    return True
+
+
+async def _normalize_legacy(
+    session: AsyncSession, connection_name: str, metadata_json: dict[str, Any]
+) -> None:
+    """Store a single-document snapshot as table and column rows.
+    
+    A one-off migration sized by the snapshot, so it is kept out of the
+    query budget of the route that happens to trigger it.
+    """
+    with budget_exempt():
+        await save_metadata(session, connection_name, metadata_json)
+
+
+async def list_tables(
+    session: AsyncSession, connection_name: str, schema: str | None = None
+) -> list[MetaTable]:
+    """List the tables of a connection's snapshot, optionally in one schema.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        schema: Only tables in this schema
+        
+    Returns:
+        MetaTable rows in snapshot order
+    """
+    query = select(MetaTable).where(MetaTable.connection_name == connection_name)
+    if schema is not None:
+        query = query.where(MetaTable.schema_name == schema)
+    result = await session.execute(query.order_by(MetaTable.position))
+    return list(result.scalars())
+
+
+async def get_table(
+    session: AsyncSession, connection_name: str, schema: str, table: str
+) -> dict[str, Any] | None:
+    """Get one table of a connection's snapshot with its columns.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        schema: Schema name ("" for tables stored without one)
+        table: Table name
+        
+    Returns:
+        Snapshot table entry, or None if the table is not in the snapshot
+    """
+    result = await session.execute(
+        select(MetaTable)
+        .where(
+            MetaTable.connection_name == connection_name,
+            MetaTable.schema_name == schema,
+            MetaTable.table_name == table,
+        )
+        .options(selectinload(MetaTable.columns))
+        .limit(1)
+    )
+    row = result.scalar_one_or_none()
+    return _table_entry(row, list(row.columns)) if row is not None else None
+
+
+async def delete_metadata(session: AsyncSession, connection_name: str) -> None:
+    """Delete a connection's metadata snapshot (committed by the caller).
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+    """
+    for model in (
+        MetaColumn, MetaTable, DatabaseMetadata, MetaCatalogState, MetaSnapshotBlob, MetaSnapshotDiff
+    ):
+        await session.execute(delete(model).where(model.connection_name == connection_name))
+
+
+def _compress_snapshot(body: bytes) -> dict[str, bytes]:
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if zstandard is not None:
+        encoded["zstd"] = zstandard.ZstdCompressor(level=19).compress(body)
+    return encoded
+
+
+async def load_snapshot_blobs(
+    session: AsyncSession, connection_name: str, snapshot_version: int
+) -> dict[str, MetaSnapshotBlob]:
+    """Load a connection's stored snapshot blobs.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        snapshot_version: Current metadata version (0 if never refreshed)
+        
+    Returns:
+        Blobs by content coding; empty if none match the version and format
+    """
+    result = await session.execute(
+        select(MetaSnapshotBlob).where(
+            MetaSnapshotBlob.connection_name == connection_name,
+            MetaSnapshotBlob.format_version == SNAPSHOT_FORMAT_VERSION,
+            MetaSnapshotBlob.snapshot_version == snapshot_version,
+        )
+    )
+    return {blob.encoding: blob for blob in result.scalars()}
+
+
+async def store_snapshot_blobs(
+    session: AsyncSession, connection_name: str, snapshot_version: int, body: bytes
+) -> dict[str, MetaSnapshotBlob]:
+    """Compress a rendered metadata response and store it for later requests.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        snapshot_version: Metadata version the body was rendered from
+        body: Uncompressed response body
+        
+    Returns:
+        The stored blobs by content coding
+    """
+    encoded = await asyncio.to_thread(_compress_snapshot, body)
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    blobs = {
+        encoding: MetaSnapshotBlob(
             connection_name=connection_name,
-            metadata_json=json.dumps(metadata_json),
+            encoding=encoding,
+            format_version=SNAPSHOT_FORMAT_VERSION,
+            snapshot_version=snapshot_version,
+            etag=etag,
+            raw_size=len(body),
+            body=data,
         )
-        session.add(new_metadata)
-        await session.commit()
-        await session.refresh(new_metadata)
-        return new_metadata
+        for encoding, data in encoded.items()
+    }
+    await session.execute(
+        delete(MetaSnapshotBlob).where(MetaSnapshotBlob.connection_name == connection_name)
+    )
+    session.add_all(blobs.values())
+    await session.commit()
+    return blobs
 
 
-async def refresh_metadata(
+def decompress_snapshot(blob: MetaSnapshotBlob) -> bytes:
+    """The uncompressed body of a snapshot blob."""
+    if blob.encoding == "gzip":
+        return gzip.decompress(blob.body)
+    return zstandard.ZstdDecompressor().decompress(blob.body, max_output_size=blob.raw_size)
+
+
+# Called with the phase of a refresh and any counters that changed
+# (tables_total, tables_done, llm_chunks_total, llm_chunks_done)
+RefreshProgress = Callable[..., None]
+
+
+def _no_progress(phase: str, **counters: int) -> None:
+    pass
+
+
+async def get_catalog_state(
     session: AsyncSession, connection_name: str
+) -> MetaCatalogState | None:
+    """Get the catalog change probe state and version of a connection's snapshot.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        
+    Returns:
+        MetaCatalogState instance or None if metadata was never refreshed
+    """
+    result = await session.execute(
+        select(MetaCatalogState)
+        .where(MetaCatalogState.connection_name == connection_name)
+        # Another session (e.g. a refresh this one waited for) may have changed it
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _probe_catalog(
+    adapter: Any, connection_info: ConnectionInfo
+) -> dict[str, str] | None:
+    """Per-table catalog signatures, or None if the database cannot be probed."""
+    if not isinstance(adapter, CatalogProbeAdapter):
+        return None
+    try:
+        return await adapter.fetch_catalog_signatures(connection_info)
+    except Exception as e:
+        logger.warning(f"Catalog change probe failed, refreshing all metadata: {str(e)}")
+        return None
+
+
+async def _structure_metadata(
+    raw_metadata: list[dict[str, Any]],
+    default_schema: str,
+    progress: RefreshProgress = _no_progress,
+) -> dict[str, Any]:
+    """Convert raw adapter metadata to a snapshot, with the LLM if it is available.
+    
+    Tables are sent to the LLM in chunks of ``metadata_llm_chunk_tables``.
+    Once a chunk fails, it and the remaining chunks use the raw format.
+    """
+    chunk_size = max(1, settings.metadata_llm_chunk_tables)
+    chunks = [raw_metadata[i:i + chunk_size] for i in range(0, len(raw_metadata), chunk_size)]
+    progress(
+        "converting",
+        tables_total=len(raw_metadata),
+        tables_done=0,
+        llm_chunks_total=len(chunks),
+        llm_chunks_done=0,
+    )
+    structured_metadata: dict[str, Any] = {"tables": []}
+    use_llm = True
+    tables_done = 0
+    for index, chunk in enumerate(chunks):
+        converted = None
+        # Try to convert to structured JSON using LLM
+        # If LLM conversion fails (e.g., insufficient balance), use raw metadata as fallback
+        if use_llm:
+            try:
+                logger.info(f"Converting metadata using LLM (chunk {index + 1} of {len(chunks)})")
+                converted = await convert_metadata_to_json(chunk)
+            except Exception as llm_error:
+                error_str = str(llm_error)
+                # Check if it's a balance/API error
+                if "402" in error_str or "Insufficient Balance" in error_str or "balance" in error_str.lower():
+                    logger.warning(
+                        f"LLM conversion failed due to API balance issue, using raw metadata format: {error_str}"
+                    )
+                else:
+                    # For other errors, still try to use raw metadata format
+                    logger.warning(f"LLM conversion failed, using raw metadata format: {error_str}")
+                use_llm = False
+        if converted is None:
+            # Use raw metadata in a compatible format
+            converted = _convert_raw_metadata_to_structured(chunk, default_schema)
+        structured_metadata["tables"].extend(converted.get("tables") or [])
+        structured_metadata.update((key, value) for key, value in converted.items() if key != "tables")
+        tables_done += len(chunk)
+        progress("converting", tables_done=tables_done, llm_chunks_done=index + 1)
+    return structured_metadata
+
+
+def _table_key(name: str, default_schema: str) -> str:
+    """Canonical ``schema.table`` key of a snapshot or catalog table name.
+    
+    Names written by the LLM may leave out the default schema, quote
+    identifiers or change their case.
+    """
+    schema, table = _split_name(name.replace('"', "").replace("`", ""))
+    return f"{schema or default_schema}.{table}".lower()
+
+
+def _merge_tables(
+    snapshot: dict[str, Any],
+    fetched: list[dict[str, Any]],
+    changed: set[str],
+    default_schema: str,
+) -> dict[str, Any] | None:
+    """Replace the changed tables of a snapshot with freshly fetched entries.
+    
+    Names are matched by their :func:`_table_key`. Changed tables that were
+    not fetched again (dropped ones) are removed.
+    
+    Returns:
+        The merged snapshot, or None if a fetched entry matches none of the
+        changed tables (it would be added as a duplicate)
+    """
+    changed_keys = {_table_key(name, default_schema) for name in changed}
+    fresh: dict[str, dict[str, Any]] = {}
+    for entry in fetched:
+        key = _table_key(entry.get("name") or "", default_schema)
+        if key not in changed_keys:
+            return None
+        fresh[key] = entry
+    tables = []
+    for entry in snapshot.get("tables") or []:
+        key = _table_key(entry.get("name") or "", default_schema)
+        if key not in changed_keys:
+            tables.append(entry)
+        elif key in fresh:
+            tables.append(fresh.pop(key))
+    tables.extend(fresh.values())
+    return {**snapshot, "tables": tables}
+
+
+def _changed_fields(old: dict[str, Any], new: dict[str, Any], skip: set[str]) -> dict[str, Any]:
+    """Fields that differ between two snapshot entries, as {"from", "to"}."""
+    return {
+        key: {"from": old.get(key), "to": new.get(key)}
+        for key in sorted((old.keys() | new.keys()) - skip)
+        if old.get(key) != new.get(key)
+    }
+
+
+def diff_snapshots(old: dict[str, Any] | None, new: dict[str, Any]) -> dict[str, Any]:
+    """Structural diff between two metadata snapshots.
+    
+    Tables are matched by name and columns by name within their table;
+    column order is ignored.
+    
+    Args:
+        old: Previous snapshot (None for the first one)
+        new: New snapshot
+        
+    Returns:
+        ``tables_added`` / ``tables_dropped``: table names;
+        ``tables_altered``: for each changed table its ``name``, ``changes``
+        to table fields (e.g. ``type``) as ``{"from", "to"}``,
+        ``columns_added`` / ``columns_dropped`` (column names) and
+        ``columns_altered`` (``name`` and ``changes`` of each column)
+    """
+    old_tables = {entry.get("name"): entry for entry in (old or {}).get("tables") or []}
+    new_tables = {entry.get("name"): entry for entry in new.get("tables") or []}
+    altered = []
+    for name, entry in new_tables.items():
+        previous = old_tables.get(name)
+        if previous is None or previous == entry:
+            continue
+        old_columns = {column.get("name"): column for column in previous.get("columns") or []}
+        new_columns = {column.get("name"): column for column in entry.get("columns") or []}
+        columns_altered = [
+            {"name": column_name, "changes": changes}
+            for column_name, column in new_columns.items()
+            if column_name in old_columns
+            and (changes := _changed_fields(old_columns[column_name], column, {"name"}))
+        ]
+        table_diff = {
+            "name": name,
+            "changes": _changed_fields(previous, entry, {"name", "columns"}),
+            "columns_added": [column for column in new_columns if column not in old_columns],
+            "columns_dropped": [column for column in old_columns if column not in new_columns],
+            "columns_altered": columns_altered,
+        }
+        # Entries can differ in column order only
+        if table_diff["changes"] or table_diff["columns_added"] or table_diff["columns_dropped"] or columns_altered:
+            altered.append(table_diff)
+    return {
+        "tables_added": [name for name in new_tables if name not in old_tables],
+        "tables_dropped": [name for name in old_tables if name not in new_tables],
+        "tables_altered": altered,
+    }
+
+
+async def get_snapshot_diffs(
+    session: AsyncSession, connection_name: str, since: int | None = None
+) -> list[MetaSnapshotDiff]:
+    """Get the stored diffs of a connection's metadata.
+    
+    Args:
+        session: Database session
+        connection_name: Connection name
+        since: Diffs to versions after this one; the latest diff if None
+        
+    Returns:
+        MetaSnapshotDiff rows, oldest first
+    """
+    query = select(MetaSnapshotDiff).where(MetaSnapshotDiff.connection_name == connection_name)
+    if since is None:
+        query = query.order_by(MetaSnapshotDiff.to_version.desc()).limit(1)
+    else:
+        query = query.where(MetaSnapshotDiff.to_version > since).order_by(MetaSnapshotDiff.to_version)
+    result = await session.execute(query)
+    return sorted(result.scalars(), key=lambda row: row.to_version)
+
+
+# Held while a connection is refreshed; an entry lives as long as a refresh
+# holds or waits for it
+_refresh_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+async def refresh_metadata(
+    session: AsyncSession,
+    connection_name: str,
+    full: bool = False,
+    progress: RefreshProgress = _no_progress,
 ) -> DatabaseMetadata:
     """Refresh metadata for a connection using appropriate adapter.
     
-    This function now uses the DatabaseAdapter pattern, making it easy
-    to add new database types without modifying this code.
+    Refreshes of one connection (refresh jobs, the background scheduler,
+    natural-language queries) run one at a time; a refresh that had to wait
+    compares against the snapshot the previous one saved.
+    
+    Databases whose adapter can probe the catalog (see
+    :class:`~app.adapters.CatalogProbeAdapter`) are refreshed incrementally:
+    the per-table signatures are compared with those of the last refresh and
+    only added or changed tables are fetched and merged into the stored
+    snapshot. The snapshot's version is incremented whenever it changes; the
+    structural diff to the previous version is stored with it and published
+    to the event bus as :class:`MetadataChanged` under ``METADATA_CHANGED``.
     
     Args:
         session: Database session
         connection_name: Connection name
+        full: Fetch every table even if the catalog reports no changes
+        progress: Called with each phase ("probing", "fetching", "converting",
+            "saving") and updated counters as the refresh goes on
         
     Returns:
         DatabaseMetadata instance
@@ -87,6 +715,19 @@ async def refresh_metadata(
     Raises:
         ValueError: If connection not found or database type unsupported
     """
+    lock = _refresh_locks.get(connection_name)
+    if lock is None:
+        lock = _refresh_locks[connection_name] = asyncio.Lock()
+    async with lock:
+        return await _refresh_metadata(session, connection_name, full, progress)
+
+
+async def _refresh_metadata(
+    session: AsyncSession,
+    connection_name: str,
+    full: bool,
+    progress: RefreshProgress,
+) -> DatabaseMetadata:
     db_conn_result = await session.execute(
         select(DatabaseConnection).where(
             DatabaseConnection.name == connection_name
@@ -102,31 +743,82 @@ async def refresh_metadata(
         adapter = factory.create(db_conn.database_type)
         connection_info = ConnectionInfo.from_url(db_conn.url)
         
-        logger.info(f"Fetching {adapter.database_type} metadata for {connection_name}")
-        raw_metadata = await adapter.fetch_metadata(connection_info)
+        # Probe before fetching: a change made in between is seen next time
+        progress("probing")
+        signatures = await _probe_catalog(adapter, connection_info)
+        state = await get_catalog_state(session, connection_name)
+        known = json.loads(state.signatures_json) if state and state.signatures_json else None
+        previous = await load_metadata(session, connection_name)
+
+        structured_metadata = None
+        if not (full or signatures is None or known is None or previous is None):
+            changed = {name for name, signature in signatures.items() if known.get(name) != signature}
+            changed |= known.keys() - signatures.keys()
+            logger.info(
+                f"{len(changed)} of {len(signatures)} tables/views changed in {connection_name}"
+            )
+            structured_metadata = previous
+            if changed:
+                tables = [_split_name(name) for name in sorted(changed) if name in signatures]
+                progress("fetching")
+                raw_metadata = await adapter.fetch_metadata(connection_info, tables)
+                fetched = await _structure_metadata(
+                    raw_metadata, adapter.default_schema, progress
+                )
+                structured_metadata = _merge_tables(
+                    previous, fetched.get("tables") or [], changed, adapter.default_schema
+                )
+                if structured_metadata is None:
+                    logger.warning(
+                        f"Fetched tables of {connection_name} do not match its snapshot, "
+                        "refreshing all metadata"
+                    )
+
+        if structured_metadata is None:
+            logger.info(f"Fetching {adapter.database_type} metadata for {connection_name}")
+            progress("fetching")
+            raw_metadata = await adapter.fetch_metadata(connection_info)
             logger.info(f"Fetched {len(raw_metadata)} tables/views")
-            
-            # Try to convert to structured JSON using LLM
-            # If LLM conversion fails (e.g., insufficient balance), use raw metadata as fallback
-            try:
-                logger.info("Converting metadata using LLM")
-                structured_metadata = await convert_metadata_to_json(raw_metadata)
-                logger.info("Metadata conversion successful")
-            except Exception as llm_error:
-                error_str = str(llm_error)
-                # Check if it's a balance/API error
-                if "402" in error_str or "Insufficient Balance" in error_str or "balance" in error_str.lower():
-                logger.warning(
-                    f"LLM conversion failed due to API balance issue, using raw metadata format: {error_str}"
+            structured_metadata = await _structure_metadata(
+                raw_metadata, adapter.default_schema, progress
+            )
+
+        progress("saving")
+        snapshot_changed = structured_metadata != previous
+        now = datetime.now(timezone.utc)
+        if state is None:
+            state = MetaCatalogState(connection_name=connection_name, version=0)
+            session.add(state)
+        state.signatures_json = _json(signatures) if signatures is not None else None
+        state.checked_at = now
+        if snapshot_changed:
+            state.version = version = state.version + 1
+            state.changed_at = now
+            diff = diff_snapshots(previous, structured_metadata)
+            session.add(
+                MetaSnapshotDiff(
+                    connection_name=connection_name,
+                    from_version=version - 1,
+                    to_version=version,
+                    diff_json=_json(diff),
                 )
-                    # Use raw metadata in a compatible format
-                structured_metadata = _convert_raw_metadata_to_structured(raw_metadata, adapter.default_schema)
-                else:
-                    # For other errors, still try to use raw metadata format
-                    logger.warning(f"LLM conversion failed, using raw metadata format: {error_str}")
-                structured_metadata = _convert_raw_metadata_to_structured(raw_metadata, adapter.default_schema)
-        
-        return await save_metadata(session, connection_name, structured_metadata)
+            )
+            await session.execute(
+                delete(MetaSnapshotDiff).where(
+                    MetaSnapshotDiff.connection_name == connection_name,
+                    MetaSnapshotDiff.to_version <= version - settings.metadata_diff_retention,
+                )
+            )
+            # Committed together with the snapshot
+            metadata = await save_metadata(session, connection_name, structured_metadata)
+            await event_bus.publish(
+                METADATA_CHANGED,
+                MetadataChanged(connection_name, version - 1, version, diff),
+            )
+        else:
+            await session.commit()
+            metadata = await get_metadata(session, connection_name)
+        return metadata
     except Exception as e:
         logger.error(f"Error refreshing metadata for {connection_name}: {str(e)}", exc_info=True)
         raise
@@ -145,20 +837,20 @@ def _convert_raw_metadata_to_structured(
         Structured metadata dictionary
     """
     return {
-                        "tables": [
-                            {
+        "tables": [
+            {
                 "name": f"{item.get('schema', default_schema)}.{item.get('name', '')}",
-                                "type": item.get("type", "table"),
-                                "columns": [
-                                    {
-                                        "name": col.get("column_name", ""),
-                                        "type": col.get("data_type", ""),
-                                        "nullable": col.get("is_nullable", "NO") == "YES",
-                                        "default": col.get("column_default"),
-                                    }
-                                    for col in (item.get("columns") or [])
-                                ],
-                            }
-                            for item in raw_metadata
-                        ]
+                "type": item.get("type", "table"),
+                "columns": [
+                    {
+                        "name": col.get("column_name", ""),
+                        "type": col.get("data_type", ""),
+                        "nullable": col.get("is_nullable", "NO") == "YES",
+                        "default": col.get("column_default"),
                     }
+                    for col in (item.get("columns") or [])
+                ],
+            }
+            for item in raw_metadata
+        ]
+    }
@@ -0,0 +1,251 @@
+"""Periodic background refresh of database metadata.
+
+:data:`metadata_scheduler` refreshes the metadata of every connection on an
+interval from a background task, so schema changes reach the stored metadata
+(and natural-language queries) without a request having to wait for a
+refresh. Refreshes are incremental (see ``services.metadata.refresh_metadata``),
+so a refresh of an unchanged database only reads the catalog signatures.
+
+Each connection's next refresh is spread by a random jitter, so connections
+added together (or loaded at startup) are not refreshed in lockstep, and a
+semaphore bounds the refreshes running at once. A database that cannot be
+refreshed is retried with exponential backoff.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..config import settings
+from ..models import DatabaseConnection
+from .metadata import refresh_metadata
+from .metadata_search import metadata_search
+
+logger = logging.getLogger(__name__)
+
+# How often the connection list is re-read and due refreshes are started
+_POLL_INTERVAL_SECONDS = 5.0
+
+
+@dataclass
+class _ScheduledRefresh:
+    """Refresh schedule and last outcome of one connection."""
+
+    connection_name: str
+    next_run: float
+    task: asyncio.Task | None = None
+    runs: int = 0
+    consecutive_failures: int = 0
+    last_error: str | None = None
+    last_success_at: datetime | None = None
+    last_finished_at: datetime | None = None
+    last_duration_ms: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.task is not None:
+            return "running"
+        return "backing_off" if self.consecutive_failures else "scheduled"
+
+
+class MetadataRefreshScheduler:
+    """Refreshes every connection's metadata on an interval, in the background."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker | None = None,
+        interval: float | None = None,
+        jitter: float | None = None,
+        max_concurrency: int | None = None,
+        backoff: float | None = None,
+        max_backoff: float | None = None,
+        poll_interval: float = _POLL_INTERVAL_SECONDS,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._jitter = jitter
+        self._max_concurrency = max_concurrency
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._poll_interval = poll_interval
+        self._entries: dict[str, _ScheduledRefresh] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def interval(self) -> float:
+        return self._interval if self._interval is not None else settings.metadata_refresh_interval_seconds
+
+    @property
+    def jitter(self) -> float:
+        return self._jitter if self._jitter is not None else settings.metadata_refresh_jitter
+
+    @property
+    def max_concurrency(self) -> int:
+        return max(
+            1,
+            self._max_concurrency
+            if self._max_concurrency is not None
+            else settings.metadata_refresh_max_concurrency,
+        )
+
+    @property
+    def backoff(self) -> float:
+        return self._backoff if self._backoff is not None else settings.metadata_refresh_backoff_seconds
+
+    @property
+    def max_backoff(self) -> float:
+        return (
+            self._max_backoff
+            if self._max_backoff is not None
+            else settings.metadata_refresh_max_backoff_seconds
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _get_session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            from ..db import async_session_maker
+
+            self._session_factory = async_session_maker
+        return self._session_factory
+
+    def _jittered(self, delay: float) -> float:
+        return max(0.0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _retry_delay(self, failures: int) -> float:
+        return min(self.backoff * 2 ** (failures - 1), self.max_backoff)
+
+    def start(self) -> None:
+        """Start the scheduler on the running event loop (not if the interval is 0)."""
+        if self.running or self.interval <= 0:
+            return
+        # Fresh context: refreshes are not part of any request's stats
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), context=contextvars.Context()
+        )
+
+    async def stop(self) -> None:
+        """Stop the scheduler and cancel the refreshes in progress."""
+        tasks = [entry.task for entry in self._entries.values() if entry.task is not None]
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._entries.clear()
+        self._semaphore = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.schedule()
+            except Exception as e:
+                logger.error(f"Metadata refresh scheduling failed: {e}", exc_info=True)
+            await asyncio.sleep(self._poll_interval)
+
+    async def schedule(self) -> list[asyncio.Task]:
+        """Start the refreshes that are due.
+
+        Connections seen for the first time get their first refresh within
+        the jitter window; deleted connections are dropped.
+
+        Returns:
+            The refresh tasks started
+        """
+        async with self._get_session_factory()() as session:
+            names = set(
+                (await session.execute(select(DatabaseConnection.name))).scalars()
+            )
+        for name in set(self._entries) - names:
+            # A refresh in progress is left to finish (and be cancelled by stop())
+            if self._entries[name].task is None:
+                del self._entries[name]
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        now = time.monotonic()
+        started = []
+        for name in sorted(names):
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = _ScheduledRefresh(
+                    name, now + random.uniform(0, self.interval * self.jitter)
+                )
+                self._entries[name] = entry
+            if entry.task is None and entry.next_run <= now:
+                entry.task = asyncio.get_running_loop().create_task(self._refresh(entry))
+                started.append(entry.task)
+        return started
+
+    async def _refresh(self, entry: _ScheduledRefresh) -> None:
+        delay = self.interval
+        try:
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    async with self._get_session_factory()() as session:
+                        await refresh_metadata(session, entry.connection_name)
+                        await metadata_search.refreshed(session, entry.connection_name)
+                except Exception as e:
+                    entry.consecutive_failures += 1
+                    entry.last_error = str(e) or type(e).__name__
+                    delay = self._retry_delay(entry.consecutive_failures)
+                    logger.warning(
+                        f"Background metadata refresh of {entry.connection_name} failed "
+                        f"({entry.consecutive_failures} in a row), retrying in {delay:g}s: {entry.last_error}"
+                    )
+                else:
+                    entry.consecutive_failures = 0
+                    entry.last_error = None
+                    entry.last_success_at = datetime.now(timezone.utc)
+                entry.runs += 1
+                entry.last_finished_at = datetime.now(timezone.utc)
+                entry.last_duration_ms = (time.perf_counter() - started) * 1000
+        finally:
+            entry.task = None
+            entry.next_run = time.monotonic() + self._jittered(delay)
+
+    def status(self) -> dict[str, Any]:
+        """Scheduler settings and the schedule of every connection."""
+        now = time.monotonic()
+        wall_now = datetime.now(timezone.utc)
+        return {
+            "enabled": self.running,
+            "interval_seconds": self.interval,
+            "jitter": self.jitter,
+            "max_concurrency": self.max_concurrency,
+            "running": sum(1 for entry in self._entries.values() if entry.task is not None),
+            "connections": [
+                {
+                    "name": entry.connection_name,
+                    "state": entry.state,
+                    "runs": entry.runs,
+                    "consecutive_failures": entry.consecutive_failures,
+                    "last_error": entry.last_error,
+                    "last_success_at": entry.last_success_at,
+                    "last_finished_at": entry.last_finished_at,
+                    "last_duration_ms": entry.last_duration_ms,
+                    "next_run_at": (
+                        None
+                        if entry.task is not None
+                        else wall_now + timedelta(seconds=max(0.0, entry.next_run - now))
+                    ),
+                }
+                for name, entry in sorted(self._entries.items())
+            ],
+        }
+
+
+metadata_scheduler = MetadataRefreshScheduler()
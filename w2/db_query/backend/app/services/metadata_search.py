@@ -0,0 +1,269 @@
+"""In-memory search over the schema, table and column names of stored metadata.
+
+:data:`metadata_search` keeps one :class:`MetadataSearchIndex` per connection,
+built from the stored metadata snapshot the first time the connection is
+searched and rebuilt whenever the snapshot changed (a refresh that changed
+the metadata bumps its version). Refreshes of a connection that has an index
+rebuild it straight away, so the next search does not have to.
+
+An index holds every name lowercased, in ranking order (schemas, then
+tables, then columns; shorter names first), with posting lists of entry ids
+for the exact names, the first 1-3 characters of each name and of each word
+within it (split on ``_``, ``.`` and other separators), and the trigrams of
+each name. A search looks matches up class by class (exact name, name prefix,
+word prefix, substring); posting lists are in ranking order, so it stops as
+soon as it has ``limit`` matches instead of ranking every candidate.
+"""
+
+import asyncio
+import logging
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .metadata import get_catalog_state, get_metadata, load_metadata
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("schema", "table", "column")
+MATCH_CLASSES = ("exact", "prefix", "word", "substring")
+
+# Longest name / word prefix with its own posting list; longer search terms
+# are looked up by their first characters (or rarest trigram) and checked
+_PREFIX_LENGTH = 3
+
+_WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+@dataclass(frozen=True, slots=True)
+class SearchEntry:
+    """Schema, table or column in a search index."""
+
+    kind: str
+    schema: str
+    table: str | None = None
+    column: str | None = None
+    # Table type ("table", "view") or column data type
+    type: str | None = None
+
+    @property
+    def name(self) -> str:
+        """The searched name: the column, table or schema name."""
+        return self.column or self.table or self.schema
+
+    @property
+    def qualified_name(self) -> str:
+        return ".".join(part for part in (self.schema, self.table, self.column) if part)
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    """Entry matched by a search, with how it matched."""
+
+    entry: SearchEntry
+    match: str
+
+
+def _word_starts(name: str) -> tuple[int, ...]:
+    """Offsets of the words of a lowercased name after the first one."""
+    return tuple(
+        match.end()
+        for match in _WORD_SPLIT.finditer(name)
+        if 0 < match.end() < len(name)
+    )
+
+
+class MetadataSearchIndex:
+    """Inverted index over the names in one metadata snapshot."""
+
+    def __init__(self, entries: Iterable[SearchEntry]):
+        kind_order = {kind: position for position, kind in enumerate(KINDS)}
+        self.entries = sorted(
+            entries,
+            key=lambda entry: (kind_order[entry.kind], len(entry.name), entry.name.lower(), entry.qualified_name),
+        )
+        self._names = [entry.name.lower() for entry in self.entries]
+        # Entries are sorted by kind, so each kind is a range of ids
+        self._kind_ranges: dict[str, tuple[int, int]] = {}
+        for entry_id, entry in enumerate(self.entries):
+            start, _ = self._kind_ranges.get(entry.kind, (entry_id, entry_id))
+            self._kind_ranges[entry.kind] = (start, entry_id + 1)
+        self._word_starts = [_word_starts(name) for name in self._names]
+        self._exact: dict[str, list[int]] = {}
+        self._prefixes: dict[str, list[int]] = {}
+        self._word_prefixes: dict[str, list[int]] = {}
+        self._trigrams: dict[str, list[int]] = {}
+
+        for entry_id, name in enumerate(self._names):
+            self._exact.setdefault(name, []).append(entry_id)
+            for length in range(1, min(len(name), _PREFIX_LENGTH) + 1):
+                self._prefixes.setdefault(name[:length], []).append(entry_id)
+            words = set()
+            for start in self._word_starts[entry_id]:
+                for length in range(1, min(len(name) - start, _PREFIX_LENGTH) + 1):
+                    words.add(name[start:start + length])
+            for key in words:
+                self._word_prefixes.setdefault(key, []).append(entry_id)
+            for trigram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                self._trigrams.setdefault(trigram, []).append(entry_id)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict[str, Any]) -> "MetadataSearchIndex":
+        """Build an index from a metadata snapshot (see ``services.metadata``)."""
+        entries = []
+        schemas = set()
+        for table in snapshot.get("tables") or []:
+            schema, dot, table_name = (table.get("name") or "").partition(".")
+            if not dot:
+                schema, table_name = "", schema
+            if not table_name:
+                continue
+            if schema:
+                schemas.add(schema)
+            entries.append(SearchEntry("table", schema, table_name, type=table.get("type")))
+            for column in table.get("columns") or []:
+                if column.get("name"):
+                    entries.append(
+                        SearchEntry("column", schema, table_name, column["name"], column.get("type"))
+                    )
+        entries.extend(SearchEntry("schema", schema) for schema in schemas)
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, limit: int = 20, kinds: Iterable[str] | None = None) -> list[SearchHit]:
+        """Find the best ranked entries whose name contains ``query``.
+
+        Matches are ranked by how they matched (``MATCH_CLASSES``, best
+        first), then schemas before tables before columns, shorter names
+        first. A query with dots (``sales.ord``, ``orders.id``) searches for
+        its last part and keeps the entries whose qualified name contains the
+        whole query.
+
+        Args:
+            query: Case-insensitive search term
+            limit: Maximum number of hits
+            kinds: Only entries of these kinds (default: all)
+
+        Returns:
+            Hits in ranking order
+        """
+        query = query.strip().lower()
+        term = query.rpartition(".")[2]
+        if not term or limit <= 0:
+            return []
+        ranges = [
+            self._kind_ranges[kind]
+            for kind in KINDS
+            if kind in self._kind_ranges and (kinds is None or kind in kinds)
+        ]
+        entries = self.entries
+        names = self._names
+
+        def candidates(entry_ids: list[int]) -> Iterable[int]:
+            # Posting lists are sorted, so the ids of each kind are a slice
+            if len(ranges) == len(self._kind_ranges):
+                return entry_ids
+            return [
+                entry_id
+                for start, end in ranges
+                for entry_id in entry_ids[bisect_left(entry_ids, start):bisect_left(entry_ids, end)]
+            ]
+
+        def word_match(entry_id: int) -> bool:
+            name = names[entry_id]
+            return any(name.startswith(term, start) for start in self._word_starts[entry_id])
+
+        key = term[:_PREFIX_LENGTH]
+        prefixes = self._prefixes.get(key, [])
+        word_prefixes = self._word_prefixes.get(key, [])
+        lookups = [(self._exact.get(term, []), None)]
+        if len(term) >= 3:
+            # Every match contains each trigram of the term, so the shortest
+            # trigram list is a candidate list for all the other classes
+            rarest = min(
+                (self._trigrams.get(term[i:i + 3], []) for i in range(len(term) - 2)), key=len
+            )
+            prefixes = min(prefixes, rarest, key=len)
+            word_prefixes = min(word_prefixes, rarest, key=len)
+        lookups.append((prefixes, lambda entry_id: names[entry_id].startswith(term)))
+        lookups.append((word_prefixes, word_match))
+        if len(term) >= 3:
+            lookups.append((rarest, lambda entry_id: term in names[entry_id]))
+
+        hits: list[SearchHit] = []
+        seen: set[int] = set()
+        for match, (entry_ids, matches) in zip(MATCH_CLASSES, lookups):
+            for entry_id in candidates(entry_ids):
+                if entry_id in seen or (matches is not None and not matches(entry_id)):
+                    continue
+                seen.add(entry_id)
+                if term != query and query not in entries[entry_id].qualified_name.lower():
+                    continue
+                hits.append(SearchHit(entries[entry_id], match))
+                if len(hits) == limit:
+                    return hits
+        return hits
+
+
+@dataclass
+class _CachedIndex:
+    # Metadata version and snapshot save time the index was built from
+    version: int
+    updated_at: datetime | None
+    index: MetadataSearchIndex
+
+
+class MetadataSearchCache:
+    """Search indexes of the connections' stored metadata, rebuilt when it changes."""
+
+    def __init__(self) -> None:
+        self._indexes: dict[str, _CachedIndex] = {}
+
+    async def get(self, session: AsyncSession, connection_name: str) -> tuple[MetadataSearchIndex, int] | None:
+        """Get the search index of a connection's current metadata.
+
+        Args:
+            session: Database session
+            connection_name: Connection name
+
+        Returns:
+            The index and the metadata version it was built from, or None if
+            the connection has no stored metadata
+        """
+        header = await get_metadata(session, connection_name)
+        if header is None:
+            self._indexes.pop(connection_name, None)
+            return None
+        state = await get_catalog_state(session, connection_name)
+        version = state.version if state is not None else 0
+        cached = self._indexes.get(connection_name)
+        if cached is not None and (cached.version, cached.updated_at) == (version, header.updated_at):
+            return cached.index, version
+
+        snapshot = await load_metadata(session, connection_name)
+        if snapshot is None:
+            return None
+        index = await asyncio.to_thread(MetadataSearchIndex.from_snapshot, snapshot)
+        # Normalizing a snapshot in the old format saves it again
+        header = await get_metadata(session, connection_name)
+        self._indexes[connection_name] = _CachedIndex(version, header.updated_at if header else None, index)
+        logger.info(f"Built metadata search index for {connection_name} ({len(index)} names, version {version})")
+        return index, version
+
+    async def refreshed(self, session: AsyncSession, connection_name: str) -> None:
+        """Rebuild a connection's index after a refresh, if it has been searched."""
+        if connection_name in self._indexes:
+            await self.get(session, connection_name)
+
+    def discard(self, connection_name: str) -> None:
+        """Drop a connection's index (when the connection is deleted)."""
+        self._indexes.pop(connection_name, None)
+
+
+metadata_search = MetadataSearchCache()
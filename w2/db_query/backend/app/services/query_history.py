@@ -0,0 +1,334 @@
+"""Query history services.
+
+Every execution through ``services.database.execute_query`` is queued on
+:data:`history_writer`, which writes them to the ``query_history`` table in
+batches from a background task, so recording history never adds a SQLite
+write to the request path. The table feeds per-fingerprint statistics in the
+spirit of ``pg_stat_statements`` and the SQL editor's recent-query list.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import Select, case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config import settings
+from ..models import QueryHistory
+from .sql_parser import fingerprint_sql
+
+logger = logging.getLogger(__name__)
+
+# How often the writer deletes rows older than the retention period
+_PRUNE_INTERVAL_SECONDS = 3600.0
+
+
+@dataclass
+class QueryHistoryEntry:
+    """A query execution waiting to be written."""
+
+    connection_name: str
+    database_type: str
+    sql: str
+    duration_ms: float
+    row_count: int = 0
+    error_message: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_row(self) -> dict[str, Any]:
+        fingerprint, _ = fingerprint_sql(self.sql, self.database_type)
+        return {
+            "connection_name": self.connection_name,
+            "fingerprint": fingerprint,
+            "sql": self.sql,
+            "duration_ms": self.duration_ms,
+            "row_count": self.row_count,
+            "status": "error" if self.error_message else "success",
+            "error_message": self.error_message,
+            "created_at": self.created_at,
+        }
+
+
+class QueryHistoryWriter:
+    """Batched asynchronous writer for the query_history table.
+
+    Entries are buffered in a bounded queue and flushed when a batch is full or
+    the flush interval elapses. When the queue is full new entries are dropped
+    (and counted) rather than slowing down queries.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker | None = None,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        queue_size: int | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = batch_size or settings.query_history_batch_size
+        self._flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else settings.query_history_flush_interval_seconds
+        )
+        # None is the stop sentinel
+        self._queue: asyncio.Queue[QueryHistoryEntry | None] = asyncio.Queue(
+            maxsize=queue_size or settings.query_history_queue_size
+        )
+        self._task: asyncio.Task | None = None
+        self._last_prune = 0.0
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._queue.maxsize)
+        # Fresh context: history writes are not part of any request's stats
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), context=contextvars.Context()
+        )
+
+    async def stop(self) -> None:
+        """Stop the flush loop after writing everything still queued."""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        while batch := self._drain():
+            await self._flush(batch)
+
+    def enqueue(self, entry: QueryHistoryEntry) -> bool:
+        """Queue an execution for writing without blocking.
+
+        Returns:
+            True if queued, False if the writer is not running or the queue is full
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Query history queue full, dropped {self.dropped} entries")
+            return False
+
+    def _drain(self) -> list[QueryHistoryEntry]:
+        batch = []
+        while not self._queue.empty() and len(batch) < self._batch_size:
+            entry = self._queue.get_nowait()
+            if entry is not None:
+                batch.append(entry)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            stopping = False
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    def _get_session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            from ..db import async_session_maker
+
+            self._session_factory = async_session_maker
+        return self._session_factory
+
+    async def _flush(self, batch: list[QueryHistoryEntry]) -> None:
+        try:
+            async with self._get_session_factory()() as session:
+                await session.execute(
+                    insert(QueryHistory), [entry.to_row() for entry in batch]
+                )
+                if time.monotonic() - self._last_prune > _PRUNE_INTERVAL_SECONDS:
+                    await prune_history(session)
+                    self._last_prune = time.monotonic()
+                await session.commit()
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Failed to write query history batch: {e}", exc_info=True)
+
+
+history_writer = QueryHistoryWriter()
+
+
+async def prune_history(session: AsyncSession) -> None:
+    """Delete history older than the configured retention period."""
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=settings.query_history_retention_days
+    )
+    await session.execute(delete(QueryHistory).where(QueryHistory.created_at < cutoff))
+
+
+async def delete_query_history(session: AsyncSession, connection_name: str) -> None:
+    """Delete a connection's query history (committed by the caller)."""
+    await session.execute(
+        delete(QueryHistory).where(QueryHistory.connection_name == connection_name)
+    )
+
+
+def _percentile_query(filters: list[Any], fingerprints: list[str], pct: int) -> Select:
+    """Nearest-rank percentile of the durations of each fingerprint, one row each.
+
+    The row at rank ``ceil(pct / 100 * n)`` is picked in the database with
+    window functions (in integer arithmetic: SQLite may lack ``CEIL``), so
+    the durations themselves are never loaded.
+    """
+    ranked = (
+        select(
+            QueryHistory.fingerprint,
+            QueryHistory.duration_ms,
+            func.row_number()
+            .over(partition_by=QueryHistory.fingerprint, order_by=QueryHistory.duration_ms)
+            .label("rank"),
+            func.count().over(partition_by=QueryHistory.fingerprint).label("n"),
+        )
+        .where(*filters, QueryHistory.fingerprint.in_(fingerprints))
+        .subquery()
+    )
+    return select(ranked.c.fingerprint, ranked.c.duration_ms).where(
+        ranked.c.rank * 100 >= pct * ranked.c.n,
+        (ranked.c.rank - 1) * 100 < pct * ranked.c.n,
+    )
+
+
+async def get_query_stats(
+    session: AsyncSession,
+    connection_name: str,
+    limit: int = 20,
+    since: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Aggregate query history per fingerprint, most total time first.
+
+    Args:
+        session: Database session
+        connection_name: Connection name
+        limit: Maximum number of fingerprints to return
+        since: Only include executions at or after this time
+
+    Returns:
+        List of per-fingerprint statistics (calls, errors, mean/p95/max time, rows)
+    """
+    filters = [QueryHistory.connection_name == connection_name]
+    if since is not None:
+        filters.append(QueryHistory.created_at >= since)
+
+    total_duration = func.sum(QueryHistory.duration_ms)
+    stats_result = await session.execute(
+        select(
+            QueryHistory.fingerprint,
+            func.count(QueryHistory.id).label("calls"),
+            func.sum(case((QueryHistory.status == "error", 1), else_=0)).label("errors"),
+            total_duration.label("total_duration_ms"),
+            func.avg(QueryHistory.duration_ms).label("mean_duration_ms"),
+            func.max(QueryHistory.duration_ms).label("max_duration_ms"),
+            func.sum(QueryHistory.row_count).label("total_rows"),
+            func.max(QueryHistory.created_at).label("last_seen_at"),
+            func.max(QueryHistory.id).label("latest_id"),
+        )
+        .where(*filters)
+        .group_by(QueryHistory.fingerprint)
+        .order_by(total_duration.desc())
+        .limit(limit)
+    )
+    stats = stats_result.all()
+    if not stats:
+        return []
+
+    p95_result = await session.execute(
+        _percentile_query(filters, [row.fingerprint for row in stats], 95)
+    )
+    p95 = dict(p95_result.all())
+
+    samples_result = await session.execute(
+        select(QueryHistory.id, QueryHistory.sql).where(
+            QueryHistory.id.in_([row.latest_id for row in stats])
+        )
+    )
+    samples = dict(samples_result.all())
+
+    return [
+        {
+            "fingerprint": row.fingerprint,
+            "sample_sql": samples[row.latest_id],
+            "calls": row.calls,
+            "errors": row.errors,
+            "total_duration_ms": round(row.total_duration_ms, 2),
+            "mean_duration_ms": round(row.mean_duration_ms, 2),
+            "p95_duration_ms": round(p95[row.fingerprint], 2),
+            "max_duration_ms": round(row.max_duration_ms, 2),
+            "total_rows": row.total_rows,
+            "mean_rows": round(row.total_rows / row.calls, 2),
+            "last_seen_at": row.last_seen_at,
+        }
+        for row in stats
+    ]
+
+
+async def get_recent_queries(
+    session: AsyncSession, connection_name: str, limit: int = 50
+) -> list[dict[str, Any]]:
+    """Get the most recently executed distinct queries for a connection.
+
+    Args:
+        session: Database session
+        connection_name: Connection name
+        limit: Maximum number of queries to return
+
+    Returns:
+        Distinct SQL texts with their latest execution, newest first
+    """
+    latest_ids = (
+        select(func.max(QueryHistory.id))
+        .where(QueryHistory.connection_name == connection_name)
+        .group_by(QueryHistory.sql)
+    )
+    result = await session.execute(
+        select(QueryHistory)
+        .where(QueryHistory.id.in_(latest_ids))
+        .order_by(QueryHistory.id.desc())
+        .limit(limit)
+    )
+    return [
+        {
+            "sql": entry.sql,
+            "duration_ms": round(entry.duration_ms, 2),
+            "row_count": entry.row_count,
+            "status": entry.status,
+            "error_message": entry.error_message,
+            "executed_at": entry.created_at,
+        }
+        for entry in result.scalars()
+    ]
@@ -0,0 +1,217 @@
+"""Metadata refreshes run as background jobs with progress events.
+
+A refresh (catalog fetch and LLM conversion) can take over a minute, longer
+than proxies keep a request open. ``POST /api/v1/dbs/{name}/refresh`` starts
+a :class:`RefreshJob` on :data:`refresh_jobs` and returns at once; the job's
+progress (phase, tables processed, LLM chunks converted) is recorded as a
+sequence of events that clients follow as Server-Sent Events, and can resume
+from with ``Last-Event-ID``.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .metadata import get_catalog_state, refresh_metadata
+from .metadata_search import metadata_search
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Finished jobs stay readable (and their events replayable) this long
+_FINISHED_JOB_TTL_SECONDS = 600.0
+
+
+class RefreshJobNotFoundError(Exception):
+    """No refresh job with this id for the connection (or it expired)."""
+
+
+@dataclass
+class RefreshEvent:
+    """One progress event of a refresh job: its id and the job's state then."""
+
+    id: int
+    event: str
+    data: dict[str, Any]
+
+
+@dataclass
+class RefreshJob:
+    """A metadata refresh running in the background."""
+
+    id: str
+    connection_name: str
+    full: bool = False
+    status: str = QUEUED
+    phase: str = QUEUED
+    tables_total: int | None = None
+    tables_done: int = 0
+    llm_chunks_total: int | None = None
+    llm_chunks_done: int = 0
+    version: int | None = None
+    error: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+    events: list[RefreshEvent] = field(default_factory=list, repr=False)
+    task: asyncio.Task | None = field(default=None, repr=False)
+    _finished_monotonic: float | None = field(default=None, init=False, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def snapshot(self) -> dict[str, Any]:
+        """The job's current state."""
+        return {
+            "job_id": self.id,
+            "name": self.connection_name,
+            "full": self.full,
+            "status": self.status,
+            "phase": self.phase,
+            "tables_total": self.tables_total,
+            "tables_done": self.tables_done,
+            "llm_chunks_total": self.llm_chunks_total,
+            "llm_chunks_done": self.llm_chunks_done,
+            "version": self.version,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _emit(self, event: str = "progress") -> None:
+        self.events.append(RefreshEvent(len(self.events) + 1, event, self.snapshot()))
+        # Wake every follower, then start a new generation for the next event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def report(self, phase: str, **counters: int) -> None:
+        """Progress callback for ``refresh_metadata``."""
+        self.phase = phase
+        for name, value in counters.items():
+            setattr(self, name, value)
+        self._emit()
+
+    async def follow(
+        self, after: int = 0, keepalive: float | None = None
+    ) -> AsyncIterator[RefreshEvent | None]:
+        """Yield the job's events after the given id, until the job has finished.
+
+        Args:
+            after: Id of the last event already seen (0 for all of them)
+            keepalive: Yield None after this many seconds without an event
+
+        Yields:
+            Events in order, or None when the keepalive interval passed
+        """
+        while True:
+            changed = self._changed
+            while after < len(self.events):
+                after += 1
+                yield self.events[after - 1]
+            if self.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), keepalive)
+            except TimeoutError:
+                yield None
+
+
+class RefreshJobStore:
+    """Refresh jobs by id; at most one unfinished job per connection."""
+
+    def __init__(self, session_factory: async_sessionmaker | None = None) -> None:
+        self._session_factory = session_factory
+        self._jobs: dict[str, RefreshJob] = {}
+
+    def _get_session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            from ..db import async_session_maker
+
+            self._session_factory = async_session_maker
+        return self._session_factory
+
+    def _evict_finished(self) -> None:
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job._finished_monotonic is not None and now - job._finished_monotonic > _FINISHED_JOB_TTL_SECONDS:
+                del self._jobs[job_id]
+
+    def start(self, connection_name: str, full: bool = False) -> RefreshJob:
+        """Start refreshing a connection's metadata in the background.
+
+        If a refresh job of the connection is still running, that job is
+        returned instead of starting another one.
+        """
+        self._evict_finished()
+        for job in self._jobs.values():
+            if job.connection_name == connection_name and not job.finished:
+                return job
+        job = RefreshJob(id=uuid.uuid4().hex, connection_name=connection_name, full=full)
+        job._emit()
+        self._jobs[job.id] = job
+        # Fresh context: the refresh is not part of the starting request's stats
+        job.task = asyncio.get_running_loop().create_task(
+            self._run(job), context=contextvars.Context()
+        )
+        return job
+
+    def get(self, connection_name: str, job_id: str) -> RefreshJob:
+        """Get a connection's refresh job.
+
+        Raises:
+            RefreshJobNotFoundError: If there is no such job
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.connection_name != connection_name:
+            raise RefreshJobNotFoundError(
+                f"Refresh job '{job_id}' not found; finished jobs are kept "
+                f"for {_FINISHED_JOB_TTL_SECONDS:g}s"
+            )
+        return job
+
+    async def _run(self, job: RefreshJob) -> None:
+        job.status = RUNNING
+        try:
+            async with self._get_session_factory()() as session:
+                await refresh_metadata(session, job.connection_name, full=job.full, progress=job.report)
+                await metadata_search.refreshed(session, job.connection_name)
+                state = await get_catalog_state(session, job.connection_name)
+            job.version = state.version if state else None
+            job.status = SUCCEEDED
+            job.phase = "done"
+        except Exception as e:
+            logger.error(f"Refresh job {job.id} of {job.connection_name} failed: {e}", exc_info=True)
+            job.status = FAILED
+            job.error = str(e) or type(e).__name__
+        finally:
+            if not job.finished:
+                # Cancelled (shutdown)
+                job.status = FAILED
+                job.error = "Refresh was cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+            job._finished_monotonic = time.monotonic()
+            job._emit("done" if job.status == SUCCEEDED else "error")
+
+    async def stop(self) -> None:
+        """Cancel the running refresh jobs."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+
+
+refresh_jobs = RefreshJobStore()
@@ -0,0 +1,485 @@
+"""Paged query results served from live server-side cursors.
+
+A paged query opens a cursor on its own target-database connection (a
+portal in a read-only transaction on PostgreSQL, an unbuffered result on
+MySQL) and returns the first page with a continuation token. Later pages are
+fetched from the same cursor, so browsing a large result never re-executes the
+query. Cursors idle for longer than ``result_cursor_idle_timeout_seconds`` are
+closed by a background sweeper.
+
+A *materialized* paged query instead reads the whole result in the background
+into a :class:`~.result_store.MaterializedResult` (spilled to disk when large)
+and releases the database connection once it is read. Its pages can then be
+read at any offset and in any sort order.
+
+Tokens have the form ``"<cursor id>.<offset>"``. The offset makes a retried
+request for the page just served safe (it is answered from the last page), and
+a token that is out of step with the cursor is rejected instead of silently
+skipping rows.
+"""
+
+import asyncio
+import contextvars
+import logging
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..adapters import ConnectionInfo, ResultCursor, get_adapter_factory
+from ..config import settings
+from .query_history import QueryHistoryEntry, history_writer
+from .result_store import (
+    ROW_GROUP_ROWS,
+    MaterializedResult,
+    ResultEvictedError,
+    SpillBudgetError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CursorError(Exception):
+    """Base error for paged query results."""
+
+
+class CursorNotFoundError(CursorError):
+    """The token's cursor does not exist, was closed or has expired."""
+
+
+class CursorPositionError(CursorError):
+    """The token does not match the cursor's current position."""
+
+
+class CursorLimitError(CursorError):
+    """Too many cursors are open."""
+
+
+class CursorSortError(CursorError):
+    """The requested sort is not possible for this result."""
+
+
+@dataclass
+class ResultPage:
+    """One page of a paged query result."""
+
+    columns: list[str]
+    rows: list[list[Any]]
+    offset: int
+    has_more: bool
+    continuation_token: str | None
+    truncated: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "columns": self.columns,
+            "rows": self.rows,
+            "row_count": len(self.rows),
+            "offset": self.offset,
+            "has_more": self.has_more,
+            "continuation_token": self.continuation_token,
+            "truncated": self.truncated,
+        }
+
+
+@dataclass
+class OpenCursor:
+    """A paged query and the cursor its pages are read from."""
+
+    id: str
+    connection_name: str
+    database_type: str
+    sql: str
+    page_size: int
+    cursor: ResultCursor | None
+    last_used: float = field(default_factory=time.monotonic)
+    # Rows handed out so far, and rows read ahead to know whether more follow
+    offset: int = 0
+    buffer: list[list[Any]] = field(default_factory=list)
+    last_page: ResultPage | None = None
+    # Materialized queries: the result, the task reading it and the last sort
+    result: MaterializedResult | None = None
+    drain_task: asyncio.Task | None = None
+    sort_order: tuple[tuple[str, bool], Any] | None = None
+    rows_read: int = 0
+    fetch_ms: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def token(self, offset: int) -> str:
+        return f"{self.id}.{offset}"
+
+    async def fetch(self, n: int) -> list[list[Any]]:
+        start = time.perf_counter()
+        try:
+            rows = await self.cursor.fetch(n)
+        finally:
+            self.fetch_ms += (time.perf_counter() - start) * 1000
+        self.rows_read += len(rows)
+        return rows
+
+    async def read_page(self) -> ResultPage:
+        """Read the next page, plus one row to tell whether another follows."""
+        rows = self.buffer + await self.fetch(self.page_size + 1 - len(self.buffer))
+        page_rows, self.buffer = rows[: self.page_size], rows[self.page_size :]
+        has_more = bool(self.buffer)
+        page = ResultPage(
+            columns=self.cursor.columns,
+            rows=page_rows,
+            offset=self.offset,
+            has_more=has_more,
+            continuation_token=self.token(self.offset + len(page_rows)) if has_more else None,
+        )
+        self.offset += len(page_rows)
+        self.last_page = page
+        self.last_used = time.monotonic()
+        return page
+
+    async def read_materialized_page(
+        self, offset: int, sort: tuple[str, bool] | None = None
+    ) -> ResultPage:
+        """Read the page at ``offset`` of the materialized result.
+
+        Raises:
+            CursorPositionError: If the offset is past the end of the result
+            CursorSortError: If the sort column does not exist
+        """
+        order = None
+        if sort is None:
+            await self.result.wait_for(offset + self.page_size + 1)
+        else:
+            # Sorting needs every row
+            await self.result.wait_for()
+            if self.sort_order is None or self.sort_order[0] != sort:
+                try:
+                    self.sort_order = (sort, self.result.sort_order(*sort))
+                except KeyError:
+                    raise CursorSortError(f"Unknown sort column '{sort[0]}'")
+            order = self.sort_order[1]
+        if offset > self.result.row_count:
+            raise CursorPositionError(
+                f"Offset {offset} is past the end of the result ({self.result.row_count} rows)"
+            )
+        rows = self.result.read(offset, self.page_size, order)
+        end = offset + len(rows)
+        has_more = end < self.result.row_count
+        self.last_used = time.monotonic()
+        return ResultPage(
+            columns=self.result.columns,
+            rows=rows,
+            offset=offset,
+            has_more=has_more,
+            continuation_token=self.token(end) if has_more else None,
+            truncated=self.result.truncated and not has_more,
+        )
+
+    async def drain(self) -> None:
+        """Read the whole result from the database cursor into ``result``."""
+        error: Exception | None = None
+        try:
+            while True:
+                rows = await self.fetch(ROW_GROUP_ROWS)
+                if rows:
+                    self.result.append(rows)
+                if len(rows) < ROW_GROUP_ROWS:
+                    break
+        except SpillBudgetError as e:
+            logger.warning(f"Paged query {self.id} truncated at {self.result.row_count} rows: {e}")
+        except asyncio.CancelledError:
+            self.result.finish(CursorNotFoundError("The paged query was closed"))
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            await asyncio.shield(
+                self.close_cursor((str(error) or type(error).__name__) if error else None)
+            )
+            if not self.result.done:
+                self.result.finish(error)
+
+    async def close(self) -> None:
+        """Stop reading, close the database cursor and free the result."""
+        if self.drain_task is not None and not self.drain_task.done():
+            self.drain_task.cancel()
+            try:
+                await self.drain_task
+            except (Exception, asyncio.CancelledError):
+                pass
+        await self.close_cursor()
+        if self.result is not None:
+            self.result.discard()
+            self.sort_order = None
+
+    async def close_cursor(self, error: str | None = None) -> None:
+        """Close the database cursor and record the query in the history."""
+        cursor, self.cursor = self.cursor, None
+        if cursor is None:
+            return
+        try:
+            await cursor.close()
+        except Exception as e:
+            logger.warning(f"Failed to close result cursor {self.id}: {e}")
+        if settings.query_history_enabled:
+            history_writer.enqueue(
+                QueryHistoryEntry(
+                    connection_name=self.connection_name,
+                    database_type=self.database_type,
+                    sql=self.sql,
+                    duration_ms=self.fetch_ms,
+                    row_count=self.rows_read,
+                    error_message=error,
+                )
+            )
+
+
+def _parse_token(token: str) -> tuple[str, int]:
+    cursor_id, _, offset = token.rpartition(".")
+    if not cursor_id or not offset.isdigit():
+        raise CursorNotFoundError(f"Invalid continuation token '{token}'")
+    return cursor_id, int(offset)
+
+
+class CursorStore:
+    """Open paged-query cursors, with an idle timeout and a limit on their number."""
+
+    def __init__(
+        self,
+        max_open: int | None = None,
+        idle_timeout: float | None = None,
+    ) -> None:
+        self._max_open = max_open
+        self._idle_timeout = idle_timeout
+        self._cursors: dict[str, OpenCursor] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def max_open(self) -> int:
+        return self._max_open if self._max_open is not None else settings.result_cursor_max_open
+
+    @property
+    def idle_timeout(self) -> float:
+        return (
+            self._idle_timeout
+            if self._idle_timeout is not None
+            else settings.result_cursor_idle_timeout_seconds
+        )
+
+    @property
+    def open_count(self) -> int:
+        """Paged queries holding a database cursor or a materialized result."""
+        return sum(
+            1
+            for entry in self._cursors.values()
+            if entry.cursor is not None or entry.result is not None
+        )
+
+    async def open(
+        self,
+        connection_name: str,
+        url: str,
+        database_type: str,
+        sql: str,
+        page_size: int,
+        timeout_ms: int | None = None,
+        materialize: bool = False,
+    ) -> ResultPage:
+        """Execute a query on a new cursor and read its first page.
+
+        Args:
+            connection_name: Connection the query runs on
+            url: Database connection URL
+            database_type: Database type identifier
+            sql: SQL SELECT query to execute
+            page_size: Rows per page
+            timeout_ms: Timeout for opening the cursor and for each fetch
+            materialize: Read the whole result in the background instead of
+                one page per request
+
+        Returns:
+            The first page
+
+        Raises:
+            CursorLimitError: If ``max_open`` cursors are already open
+            QueryTimeoutError: If a fetch exceeds the timeout
+            ValueError: If the query fails
+        """
+        await self.close_idle()
+        if self.open_count >= self.max_open:
+            raise CursorLimitError(
+                f"Too many open result cursors ({self.max_open}); "
+                "close finished ones or wait for them to expire"
+            )
+
+        adapter = get_adapter_factory().create(database_type)
+        cursor = await adapter.open_cursor(
+            ConnectionInfo.from_url(url),
+            sql,
+            timeout_ms=timeout_ms,
+            # Server-side backstop in case the sweeper never gets to it
+            idle_timeout_seconds=2 * self.idle_timeout,
+        )
+        entry = OpenCursor(
+            id=secrets.token_urlsafe(12),
+            connection_name=connection_name,
+            database_type=database_type,
+            sql=sql,
+            page_size=page_size,
+            cursor=cursor,
+        )
+        if materialize:
+            entry.result = MaterializedResult(cursor.columns)
+            # Fresh context: the read outlives the request that started it
+            entry.drain_task = asyncio.get_running_loop().create_task(
+                entry.drain(), context=contextvars.Context()
+            )
+        self._cursors[entry.id] = entry
+        return await self._read(entry, 0)
+
+    async def next_page(
+        self,
+        connection_name: str,
+        token: str,
+        sort_by: str | None = None,
+        descending: bool = False,
+    ) -> ResultPage:
+        """Read the page a continuation token points to.
+
+        Pages of a materialized query can be read at any offset (change the
+        offset in the token) and sorted by a column; the token of a sorted page
+        continues in that order when the same sort is passed again.
+
+        Raises:
+            CursorNotFoundError: If the cursor does not exist or has expired
+            CursorPositionError: If the token is not the cursor's next page
+            CursorSortError: If sorting a query that is not materialized
+            QueryTimeoutError: If the fetch exceeds the timeout
+            ValueError: If the fetch fails
+        """
+        entry = self._get(connection_name, token)
+        _, offset = _parse_token(token)
+        sort = (sort_by, descending) if sort_by else None
+        async with entry.lock:
+            if entry.result is not None:
+                return await self._read(entry, offset, sort)
+            if sort is not None:
+                raise CursorSortError("Only materialized paged queries can be sorted")
+            if entry.last_page is not None and offset == entry.last_page.offset:
+                # Retry of the page just served
+                entry.last_used = time.monotonic()
+                return entry.last_page
+            if entry.cursor is None:
+                raise CursorPositionError("The result has already been read to the end")
+            if offset != entry.offset:
+                raise CursorPositionError(
+                    f"Token offset {offset} does not match the cursor position {entry.offset}"
+                )
+            return await self._read(entry, offset)
+
+    async def close(self, connection_name: str, token: str) -> None:
+        """Close a cursor before it is read to the end.
+
+        Raises:
+            CursorNotFoundError: If the cursor does not exist or has expired
+        """
+        entry = self._get(connection_name, token)
+        async with entry.lock:
+            self._cursors.pop(entry.id, None)
+            await entry.close()
+
+    async def close_idle(self) -> int:
+        """Close cursors that have been idle longer than the idle timeout.
+
+        Returns:
+            Number of cursors closed
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [
+            entry
+            for entry in self._cursors.values()
+            if entry.last_used < deadline and not entry.lock.locked()
+        ]
+        for entry in expired:
+            self._cursors.pop(entry.id, None)
+            await entry.close()
+        if expired:
+            logger.info(f"Closed {len(expired)} idle result cursors")
+        return len(expired)
+
+    async def close_all(self) -> None:
+        entries, self._cursors = list(self._cursors.values()), {}
+        for entry in entries:
+            await entry.close()
+
+    async def close_connection(self, connection_name: str) -> None:
+        """Close every cursor of a connection (e.g. after it is deleted)."""
+        entries = [e for e in self._cursors.values() if e.connection_name == connection_name]
+        for entry in entries:
+            self._cursors.pop(entry.id, None)
+            await entry.close()
+
+    def start(self) -> None:
+        """Start the idle-cursor sweeper on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(
+            self._sweep(), context=contextvars.Context()
+        )
+
+    async def stop(self) -> None:
+        """Stop the sweeper and close every open cursor."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.close_all()
+
+    def _get(self, connection_name: str, token: str) -> OpenCursor:
+        cursor_id, _ = _parse_token(token)
+        entry = self._cursors.get(cursor_id)
+        if entry is None or entry.connection_name != connection_name:
+            raise CursorNotFoundError(
+                "Result cursor not found; it was closed or expired after "
+                f"{self.idle_timeout:g}s without a fetch"
+            )
+        return entry
+
+    async def _read(
+        self, entry: OpenCursor, offset: int, sort: tuple[str, bool] | None = None
+    ) -> ResultPage:
+        if entry.result is not None:
+            try:
+                return await entry.read_materialized_page(offset, sort)
+            except (CursorPositionError, CursorSortError):
+                raise
+            except ResultEvictedError as e:
+                self._cursors.pop(entry.id, None)
+                await entry.close()
+                raise CursorNotFoundError(str(e)) from e
+            except Exception:
+                self._cursors.pop(entry.id, None)
+                await asyncio.shield(entry.close())
+                raise
+
+        try:
+            page = await entry.read_page()
+        except (Exception, asyncio.CancelledError) as e:
+            self._cursors.pop(entry.id, None)
+            await asyncio.shield(entry.close_cursor(str(e) or type(e).__name__))
+            raise
+        if not page.has_more:
+            # Read to the end: release the connection, keep the page for retries
+            await entry.close_cursor()
+        return page
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(max(0.05, min(self.idle_timeout / 4, 30.0)))
+            try:
+                await self.close_idle()
+            except Exception as e:
+                logger.error(f"Idle result cursor sweep failed: {e}", exc_info=True)
+
+
+cursor_store = CursorStore()
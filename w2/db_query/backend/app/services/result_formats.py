@@ -0,0 +1,175 @@
+"""Binary encodings of query results and ``Accept`` header negotiation.
+
+``POST /api/v1/dbs/{name}/query`` answers in JSON unless the client asks for
+one of the binary formats, which are encoded column by column straight from
+the :class:`~app.adapters.ColumnarResult`:
+
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream with one record
+  batch. Numeric, decimal, timestamp and binary columns keep their types;
+  values Arrow cannot type (e.g. UUIDs) are sent as strings.
+- ``application/msgpack``: a map with ``columns``, ``rowCount``, ``queryId``
+  and ``data`` (one array per column). Bytes stay binary; decimals,
+  timestamps, ranges and other non-native values use their JSON form.
+
+Values that need a fallback are converted like in JSON responses
+(``app.adapters.columnar._default``), so every value the JSON path can
+write can be written in the binary formats too.
+
+Both need optional packages (``pyarrow``, ``msgpack``; the ``formats`` extra).
+A format whose package is missing is treated as not available.
+"""
+
+from typing import Any
+
+import orjson
+
+from ..adapters import ColumnarResult
+from ..adapters.columnar import _default
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: the "formats" extra
+    pa = None
+
+try:
+    import msgpack
+except ImportError:  # optional: the "formats" extra
+    msgpack = None
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+# Accepted spellings of each media type
+_MEDIA_TYPES = {
+    JSON: JSON,
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+class NotAcceptableError(ValueError):
+    """None of the media types the client accepts can be produced."""
+
+
+def available_formats() -> list[str]:
+    """Media types that can be produced with the installed packages, JSON first."""
+    formats = [JSON]
+    if pa is not None:
+        formats.append(ARROW_STREAM)
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    return formats
+
+
+def _parse_accept(accept: str) -> list[tuple[str, float]]:
+    ranges = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # Ties keep the client's order
+        ranges.append((media_type.lower(), quality, -position))
+    ranges.sort(key=lambda item: (item[1], item[2]), reverse=True)
+    return [(media_type, quality) for media_type, quality, _ in ranges]
+
+
+def negotiate_result_format(accept: str | None) -> str:
+    """Pick the response media type for a query result.
+
+    Args:
+        accept: The request's ``Accept`` header
+
+    Returns:
+        One of ``JSON``, ``ARROW_STREAM`` or ``MSGPACK``
+
+    Raises:
+        NotAcceptableError: If the client accepts none of the available formats
+    """
+    if not accept:
+        return JSON
+    available = available_formats()
+    for media_type, quality in _parse_accept(accept):
+        if quality <= 0:
+            continue
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        chosen = _MEDIA_TYPES.get(media_type)
+        if chosen in available:
+            return chosen
+    raise NotAcceptableError(
+        f"Cannot produce any of the accepted media types; available: {', '.join(available)}"
+    )
+
+
+def _as_list(column: Any) -> list[Any]:
+    return column.tolist() if hasattr(column, "tolist") else list(column)
+
+
+def _to_text(value: Any) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    value = _default(value)
+    if isinstance(value, str):
+        return value
+    # Structured values (e.g. ranges) as JSON text
+    return orjson.dumps(value, default=_default).decode()
+
+
+def arrow_array(column: Any) -> "pa.Array":
+    """Build an Arrow array from a column, letting Arrow infer its type."""
+    try:
+        return pa.array(column)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError):
+        # Values Arrow cannot type, e.g. UUIDs or mixed types: send their text form
+        return pa.array([_to_text(value) for value in column], type=pa.string())
+
+
+def encode_arrow(result: ColumnarResult, query_id: str | None = None) -> bytes:
+    """Encode a result as an Arrow IPC stream with a single record batch.
+
+    The query id is stored in the schema metadata.
+    """
+    metadata = {"query_id": query_id} if query_id else None
+    batch = pa.RecordBatch.from_arrays(
+        [arrow_array(column) for column in result.data],
+        names=result.columns,
+        metadata=metadata,
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(result: ColumnarResult, query_id: str | None = None) -> bytes:
+    """Encode a result as a column-oriented MessagePack map."""
+    return msgpack.packb(
+        {
+            "columns": result.columns,
+            "rowCount": result.row_count,
+            "queryId": query_id,
+            "data": [_as_list(column) for column in result.data],
+        },
+        default=_default,
+        use_bin_type=True,
+    )
+
+
+def encode_result(media_type: str, result: ColumnarResult, query_id: str | None = None) -> bytes:
+    """Encode a result in a negotiated binary media type."""
+    if media_type == ARROW_STREAM:
+        return encode_arrow(result, query_id)
+    if media_type == MSGPACK:
+        return encode_msgpack(result, query_id)
+    raise ValueError(f"Not a binary result format: {media_type}")
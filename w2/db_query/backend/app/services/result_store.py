@@ -0,0 +1,490 @@
+"""Materialized query results, spilled to memory-mapped files when large.
+
+A :class:`MaterializedResult` collects the rows of a query as they are read
+from the database. While the result is smaller than
+``result_spill_threshold_bytes`` its rows stay in memory; beyond that they are
+written to a file in row groups of :data:`ROW_GROUP_ROWS` rows and read back
+through ``mmap``, so the memory held for a result is one row group no matter
+how large it is.
+
+Each row group stores its columns one after another. Integer and float
+columns are stored as packed 64-bit arrays (with a null mask when they contain
+NULLs), everything else as a JSON array of the values as they would appear in
+an API response. Columns can therefore be read (and sorted) without decoding
+the rest of the row group. The row-group index is kept in memory: files only
+live as long as the process that wrote them.
+
+All spill files share the disk budget of the :class:`ResultStore`. When a new
+row group would exceed it, the least recently used finished results are
+evicted; a result that cannot fit even then is truncated.
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import time
+import uuid
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from pydantic_core import to_jsonable_python
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+ROW_GROUP_ROWS = 4096
+FILE_SUFFIX = ".dbqr"
+
+# Column encodings
+INT = "i"
+FLOAT = "f"
+DECIMAL = "d"
+JSON = "j"
+
+_ARRAY_TYPES = {INT: "q", FLOAT: "d"}
+
+
+class SpillBudgetError(Exception):
+    """A row group does not fit in the spill disk budget."""
+
+
+class ResultEvictedError(Exception):
+    """The result's spill file was evicted to stay within the disk budget."""
+
+
+def _column_kind(values: list[Any]) -> str:
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        value_type = type(value)
+        if value_type is int and -(2**63) <= value < 2**63:
+            value_kind = INT
+        elif value_type is float:
+            value_kind = FLOAT
+        elif value_type is Decimal:
+            value_kind = DECIMAL
+        else:
+            return JSON
+        if kind is None:
+            kind = value_kind
+        elif kind != value_kind:
+            return JSON
+    return kind or JSON
+
+
+def _encode_column(values: list[Any]) -> tuple[str, bytes, bytes]:
+    """Encode one column of a row group.
+
+    Returns:
+        Encoding kind, null mask (empty if there are no NULLs) and data
+    """
+    kind = _column_kind(values)
+    if kind in _ARRAY_TYPES:
+        nulls = bytes(value is None for value in values)
+        data = array(_ARRAY_TYPES[kind], (0 if value is None else value for value in values))
+        return kind, nulls if any(nulls) else b"", data.tobytes()
+    data = json.dumps(
+        values, default=to_jsonable_python, ensure_ascii=False, separators=(",", ":")
+    )
+    return kind, b"", data.encode("utf-8")
+
+
+def _estimate_size(rows: list[list[Any]]) -> int:
+    return len(json.dumps(rows, default=str, ensure_ascii=False))
+
+
+@dataclass
+class _ColumnChunk:
+    kind: str
+    offset: int
+    nulls_length: int
+    data_length: int
+
+
+@dataclass
+class _RowGroup:
+    start_row: int
+    rows: int
+    columns: list[_ColumnChunk]
+
+
+class ResultFile:
+    """Append-only columnar spill file, read through ``mmap``."""
+
+    def __init__(self, path: Path, store: "ResultStore") -> None:
+        self.path = path
+        self._store = store
+        self._file = open(path, "w+b")
+        self._mmap: mmap.mmap | None = None
+        self._groups: list[_RowGroup] = []
+        self._starts: list[int] = []
+        # Small cache of decoded row groups for consecutive page reads
+        self._decoded: OrderedDict[int, list[list[Any]]] = OrderedDict()
+        self.size = 0
+        self.row_count = 0
+        self.finished = False
+        self.evicted = False
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def append(self, rows: list[list[Any]]) -> None:
+        """Write rows as one row group.
+
+        Raises:
+            SpillBudgetError: If the row group does not fit in the disk budget
+        """
+        encoded = [_encode_column(list(column)) for column in zip(*rows)]
+        length = sum(len(nulls) + len(data) for _, nulls, data in encoded)
+        self._store.reserve(self, length)
+        chunks = []
+        offset = self.size
+        for kind, nulls, data in encoded:
+            self._file.write(nulls)
+            self._file.write(data)
+            chunks.append(_ColumnChunk(kind, offset, len(nulls), len(data)))
+            offset += len(nulls) + len(data)
+        self._groups.append(_RowGroup(self.row_count, len(rows), chunks))
+        self._starts.append(self.row_count)
+        self.size = offset
+        self.row_count += len(rows)
+
+    def read(self, start: int, stop: int) -> list[list[Any]]:
+        """Read rows ``start`` (inclusive) to ``stop`` (exclusive)."""
+        rows: list[list[Any]] = []
+        index = bisect_right(self._starts, start) - 1
+        while start < stop and index < len(self._groups):
+            group = self._groups[index]
+            group_rows = self._group_rows(index)
+            end = min(stop, group.start_row + group.rows)
+            rows.extend(group_rows[start - group.start_row : end - group.start_row])
+            start = end
+            index += 1
+        return rows
+
+    def take(self, indices: list[int]) -> list[list[Any]]:
+        """Read the rows at the given positions, decoding each row group once."""
+        rows: list[list[Any] | None] = [None] * len(indices)
+        by_group: dict[int, list[int]] = {}
+        for position, row in enumerate(indices):
+            by_group.setdefault(bisect_right(self._starts, row) - 1, []).append(position)
+        for index, positions in by_group.items():
+            group = self._groups[index]
+            group_rows = self._group_rows(index)
+            for position in positions:
+                rows[position] = group_rows[indices[position] - group.start_row]
+        return rows
+
+    def column(self, column: int) -> list[Any]:
+        """Read all values of one column without decoding the other columns."""
+        values: list[Any] = []
+        for group in self._groups:
+            values.extend(self._decode(group.columns[column]))
+        return values
+
+    def column_kinds(self, column: int) -> set[str]:
+        return {group.columns[column].kind for group in self._groups}
+
+    def close(self) -> None:
+        """Close and delete the file."""
+        self._decoded.clear()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if not self._file.closed:
+            self._file.close()
+        self.path.unlink(missing_ok=True)
+
+    def _view(self) -> mmap.mmap:
+        if self.closed:
+            raise ResultEvictedError("The result was evicted from the spill store")
+        self.last_used = time.monotonic()
+        self._store.touch(self)
+        if self._mmap is None or len(self._mmap) < self.size:
+            # The file has grown since it was mapped
+            self._file.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _decode(self, chunk: _ColumnChunk) -> list[Any]:
+        view = self._view()
+        start = chunk.offset + chunk.nulls_length
+        data = view[start : start + chunk.data_length]
+        if chunk.kind not in _ARRAY_TYPES:
+            return json.loads(data)
+        values = array(_ARRAY_TYPES[chunk.kind])
+        values.frombytes(data)
+        decoded = values.tolist()
+        if chunk.nulls_length:
+            nulls = view[chunk.offset : chunk.offset + chunk.nulls_length]
+            decoded = [None if null else value for null, value in zip(nulls, decoded)]
+        return decoded
+
+    def _group_rows(self, index: int) -> list[list[Any]]:
+        rows = self._decoded.get(index)
+        if rows is None:
+            columns = [self._decode(chunk) for chunk in self._groups[index].columns]
+            rows = [list(row) for row in zip(*columns)]
+            self._decoded[index] = rows
+            while len(self._decoded) > 2:
+                self._decoded.popitem(last=False)
+        else:
+            self._decoded.move_to_end(index)
+        return rows
+
+
+class ResultStore:
+    """Spill files of materialized results, within an LRU disk budget."""
+
+    def __init__(self, directory: Path | None = None, budget_bytes: int | None = None) -> None:
+        self._directory = directory
+        self._budget_bytes = budget_bytes
+        self._files: OrderedDict[int, ResultFile] = OrderedDict()
+        self.evictions = 0
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is not None:
+            return self._directory
+        if settings.result_spill_dir:
+            return Path(settings.result_spill_dir).expanduser()
+        return Path(settings.sqlite_db_path).parent / "results"
+
+    @property
+    def budget_bytes(self) -> int:
+        return (
+            self._budget_bytes
+            if self._budget_bytes is not None
+            else settings.result_spill_budget_bytes
+        )
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(file.size for file in self._files.values())
+
+    def create_file(self) -> ResultFile:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file = ResultFile(self.directory / f"{uuid.uuid4().hex}{FILE_SUFFIX}", self)
+        self._files[id(file)] = file
+        return file
+
+    def reserve(self, file: ResultFile, nbytes: int) -> None:
+        """Make room for ``nbytes`` more bytes in ``file``.
+
+        Evicts the least recently used finished results if necessary.
+
+        Raises:
+            SpillBudgetError: If the bytes do not fit even after evicting
+        """
+        used = self.used_bytes
+        while used + nbytes > self.budget_bytes:
+            victim = next(
+                (f for f in self._files.values() if f.finished and f is not file), None
+            )
+            if victim is None:
+                raise SpillBudgetError(
+                    f"Result spill budget of {self.budget_bytes} bytes exhausted"
+                )
+            used -= victim.size
+            self.evict(victim)
+        self._files.move_to_end(id(file))
+
+    def touch(self, file: ResultFile) -> None:
+        if id(file) in self._files:
+            self._files.move_to_end(id(file))
+
+    def evict(self, file: ResultFile) -> None:
+        logger.info(f"Evicting spilled result {file.path.name} ({file.size} bytes)")
+        file.evicted = True
+        self.evictions += 1
+        self.release(file)
+
+    def release(self, file: ResultFile) -> None:
+        """Delete a spill file and forget it."""
+        self._files.pop(id(file), None)
+        file.close()
+
+    def clear(self) -> None:
+        """Delete every spill file, including ones left over by a previous process."""
+        for file in list(self._files.values()):
+            self.release(file)
+        if self.directory.is_dir():
+            for path in self.directory.glob(f"*{FILE_SUFFIX}"):
+                path.unlink(missing_ok=True)
+
+
+result_store = ResultStore()
+
+
+def _sort_key(kinds: set[str]):
+    if DECIMAL in kinds:
+        # Decimals are stored as their JSON strings
+        return Decimal
+    return None
+
+
+class MaterializedResult:
+    """Rows of a query, in memory while small and spilled to disk when large."""
+
+    def __init__(
+        self,
+        columns: list[str],
+        store: ResultStore | None = None,
+        spill_threshold_bytes: int | None = None,
+    ) -> None:
+        self.columns = columns
+        self._store = store or result_store
+        self._spill_threshold_bytes = (
+            spill_threshold_bytes
+            if spill_threshold_bytes is not None
+            else settings.result_spill_threshold_bytes
+        )
+        # Rows not (yet) in the spill file: the whole result until it is
+        # spilled, then less than one row group
+        self._rows: list[list[Any]] = []
+        self._memory_bytes = 0
+        self._file: ResultFile | None = None
+        self._error: BaseException | None = None
+        self._progress = asyncio.Event()
+        self.done = False
+        self.truncated = False
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def row_count(self) -> int:
+        return (self._file.row_count if self._file else 0) + len(self._rows)
+
+    def append(self, rows: list[list[Any]]) -> None:
+        """Add rows read from the database.
+
+        Raises:
+            SpillBudgetError: If spilled rows do not fit in the disk budget; the
+                result is marked truncated and keeps the rows it has
+        """
+        self._rows.extend(rows)
+        if self._file is None:
+            self._memory_bytes += _estimate_size(rows)
+            if self._memory_bytes > self._spill_threshold_bytes:
+                self._file = self._store.create_file()
+                logger.info(f"Spilling query result to {self._file.path}")
+        try:
+            while self._file is not None and len(self._rows) >= ROW_GROUP_ROWS:
+                self._file.append(self._rows[:ROW_GROUP_ROWS])
+                del self._rows[:ROW_GROUP_ROWS]
+        except SpillBudgetError:
+            self.truncated = True
+            raise
+        finally:
+            self._notify()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """Mark the result complete, or failed with ``error``."""
+        self._error = error
+        self.done = True
+        if self._file is not None:
+            self._file.finished = True
+        self._notify()
+
+    async def wait_for(self, row_count: int | None = None) -> None:
+        """Wait until ``row_count`` rows are available or the result is complete.
+
+        Args:
+            row_count: Rows to wait for, None to wait for the complete result
+
+        Raises:
+            The error the result failed with
+        """
+        while not self.done and (row_count is None or self.row_count < row_count):
+            await self._progress.wait()
+        if self._error is not None:
+            raise self._error
+
+    def read(self, offset: int, limit: int, order: array | None = None) -> list[list[Any]]:
+        """Read up to ``limit`` rows from ``offset``, optionally in a sort order.
+
+        Raises:
+            ResultEvictedError: If the spill file was evicted
+        """
+        if order is not None:
+            return self._take(order[offset : offset + limit])
+        stop = min(offset + limit, self.row_count)
+        spilled = self._file.row_count if self._file else 0
+        rows = self._file.read(offset, min(stop, spilled)) if offset < spilled else []
+        rows.extend(self._rows[max(offset, spilled) - spilled : stop - spilled])
+        return rows
+
+    def sort_order(self, column: str, descending: bool = False) -> array:
+        """Row positions sorted by one column, NULLs last.
+
+        Only the sort column is read, so sorting a spilled result does not
+        decode the other columns.
+
+        Raises:
+            KeyError: If the column does not exist
+            ResultEvictedError: If the spill file was evicted
+        """
+        if column not in self.columns:
+            raise KeyError(column)
+        index = self.columns.index(column)
+        tail = [row[index] for row in self._rows]
+        if self._file is None:
+            values, kinds = tail, set()
+        else:
+            values = self._file.column(index)
+            kinds = self._file.column_kinds(index)
+            if tail:
+                # Compare the tail in the form it will have in the file: dates,
+                # UUIDs etc. are strings there
+                kind, _, data = _encode_column(tail)
+                kinds.add(kind)
+                if kind not in _ARRAY_TYPES:
+                    tail = json.loads(data)
+            values.extend(tail)
+        key = _sort_key(kinds)
+        positions = [i for i, value in enumerate(values) if value is not None]
+        nulls = [i for i, value in enumerate(values) if value is None]
+        try:
+            positions.sort(
+                key=(lambda i: key(values[i])) if key else values.__getitem__,
+                reverse=descending,
+            )
+        except (TypeError, ArithmeticError):
+            # Mixed types: order by type, then by text
+            positions.sort(
+                key=lambda i: (type(values[i]).__name__, str(values[i])), reverse=descending
+            )
+        return array("q", positions + nulls)
+
+    def discard(self) -> None:
+        """Free the rows and delete the spill file."""
+        self._rows = []
+        if self._file is not None:
+            self._store.release(self._file)
+
+    def _take(self, positions: array) -> list[list[Any]]:
+        spilled = self._file.row_count if self._file else 0
+        rows = self._file.take([p for p in positions if p < spilled]) if spilled else []
+        from_file = iter(rows)
+        return [
+            next(from_file) if position < spilled else self._rows[position - spilled]
+            for position in positions
+        ]
+
+    def _notify(self) -> None:
+        self._progress.set()
+        self._progress = asyncio.Event()
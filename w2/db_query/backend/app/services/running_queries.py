@@ -0,0 +1,192 @@
+"""Registry of queries running on target databases.
+
+Queries executed through :func:`run_query` are registered under an id while
+they run, so they can be listed and cancelled - by
+``DELETE /api/v1/dbs/{name}/queries/{id}`` or when the HTTP client disconnects.
+Cancelling first asks the database to abort the statement
+(``pg_cancel_backend`` / ``KILL QUERY``) so the connection is released cleanly,
+and cancels the executing task if the statement has not stopped within
+``settings.query_cancel_grace_seconds``.
+
+The registry lives in process memory: with several workers a query can only
+be cancelled through the worker that runs it.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from ..adapters import ConnectionInfo, get_adapter_factory
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCancelledError(Exception):
+    """Raised when a running query was cancelled before it completed."""
+
+
+class DuplicateQueryIdError(ValueError):
+    """Raised when a query id is already used by a running query."""
+
+
+@dataclass
+class RunningQuery:
+    """A query executing on a target database."""
+
+    id: str
+    connection_name: str
+    url: str
+    database_type: str
+    sql: str
+    timeout_ms: int | None
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    backend_id: int | None = None
+    cancel_reason: str | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def set_backend_id(self, backend_id: int) -> None:
+        """``on_connect`` callback recording the server-side session id."""
+        self.backend_id = backend_id
+
+    async def cancel(self, reason: str) -> None:
+        """Cancel the query on the server, then the task if it does not stop.
+
+        Args:
+            reason: Why the query is cancelled (reported to the caller)
+        """
+        if self.task is None or self.task.done() or self.cancel_reason is not None:
+            return
+        self.cancel_reason = reason
+        logger.info(f"Cancelling query {self.id} on {self.connection_name}: {reason}")
+        if self.backend_id is not None:
+            adapter = get_adapter_factory().create(self.database_type)
+            await adapter.cancel_query(ConnectionInfo.from_url(self.url), self.backend_id)
+            done, _ = await asyncio.wait(
+                {self.task}, timeout=settings.query_cancel_grace_seconds
+            )
+            if done:
+                return
+        self.task.cancel()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "sql": self.sql,
+            "started_at": self.started_at,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "timeout_ms": self.timeout_ms,
+            "cancelling": self.cancel_reason is not None,
+        }
+
+
+_running: dict[str, RunningQuery] = {}
+
+
+def register_query(
+    connection_name: str,
+    url: str,
+    database_type: str,
+    sql: str,
+    timeout_ms: int | None,
+    query_id: str | None = None,
+) -> RunningQuery:
+    """Register a query before it is started with :func:`run_query`.
+
+    Args:
+        connection_name: Connection the query runs on
+        url: Database connection URL
+        database_type: Database type identifier
+        sql: SQL being executed
+        timeout_ms: Resolved statement timeout
+        query_id: Client-chosen id; a random id is generated if omitted
+
+    Returns:
+        The registered query
+
+    Raises:
+        DuplicateQueryIdError: If the id belongs to a query that is still running
+    """
+    query_id = query_id or uuid.uuid4().hex
+    if query_id in _running:
+        raise DuplicateQueryIdError(f"Query '{query_id}' is already running")
+    query = RunningQuery(
+        id=query_id,
+        connection_name=connection_name,
+        url=url,
+        database_type=database_type,
+        sql=sql,
+        timeout_ms=timeout_ms,
+    )
+    _running[query_id] = query
+    return query
+
+
+def get_running_query(connection_name: str, query_id: str) -> RunningQuery | None:
+    """Get a running query of a connection by id."""
+    query = _running.get(query_id)
+    if query is None or query.connection_name != connection_name:
+        return None
+    return query
+
+
+def list_running_queries(connection_name: str) -> list[RunningQuery]:
+    """List the running queries of a connection, oldest first."""
+    return sorted(
+        (query for query in _running.values() if query.connection_name == connection_name),
+        key=lambda query: query.started_at,
+    )
+
+
+async def run_query(
+    query: RunningQuery,
+    execution: Awaitable[Mapping[str, Any]],
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+) -> Mapping[str, Any]:
+    """Run a registered query, cancelling it if the client goes away.
+
+    Args:
+        query: Query returned by :func:`register_query`
+        execution: The ``execute_query`` call to run (with
+            ``on_connect=query.set_backend_id``)
+        is_disconnected: Polled while the query runs; the query is cancelled
+            once it returns True (e.g. ``Request.is_disconnected``)
+
+    Returns:
+        The query result
+
+    Raises:
+        QueryCancelledError: If the query was cancelled
+    """
+    query.task = asyncio.ensure_future(execution)
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {query.task}, timeout=settings.query_disconnect_poll_seconds
+            )
+            if done:
+                break
+            if is_disconnected is not None and await is_disconnected():
+                await query.cancel("client disconnected")
+
+        if query.task.cancelled() or (
+            query.cancel_reason is not None and query.task.exception() is not None
+        ):
+            raise QueryCancelledError(
+                f"Query {query.id} was cancelled: {query.cancel_reason}"
+            )
+        return query.task.result()
+    finally:
+        if not query.task.done():
+            query.task.cancel()
+        _running.pop(query.id, None)
@@ -0,0 +1,267 @@
+"""Slow-query log services.
+
+Executions that take at least ``settings.slow_query_threshold_ms`` are written
+to the ``slow_queries`` table off the request path: the row is stored first and
+the EXPLAIN plan is captured and attached afterwards, so a slow or failing
+EXPLAIN never delays the query response.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+from collections.abc import Mapping
+from itertools import islice
+from typing import Any
+
+import orjson
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..adapters import ColumnarResult, ConnectionInfo, get_adapter_factory
+from ..adapters.columnar import _default
+from ..config import settings
+from ..models import SlowQuery
+from .sql_parser import fingerprint_sql
+
+logger = logging.getLogger(__name__)
+
+# Keep references to in-flight background tasks so they are not garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+# Rows encoded to estimate a result's size
+_SIZE_SAMPLE_ROWS = 100
+
+
+def result_size_bytes(result: Mapping[str, Any]) -> int:
+    """Estimate the size of a query result as serialized JSON.
+
+    Only the first ``_SIZE_SAMPLE_ROWS`` rows are encoded; the remaining rows
+    are assumed to be as large as the sampled ones on average, so the cost
+    does not grow with the result.
+
+    Args:
+        result: Query result mapping (columns, rows, row_count)
+
+    Returns:
+        Estimated size in bytes of the JSON encoded result
+    """
+    if isinstance(result, ColumnarResult):
+        sample = list(islice(result.iter_rows(), _SIZE_SAMPLE_ROWS))
+    else:
+        sample = list(result["rows"][:_SIZE_SAMPLE_ROWS])
+    row_count = result["row_count"]
+    size = len(
+        orjson.dumps(
+            {"columns": result["columns"], "rows": sample, "rowCount": row_count},
+            default=_default,
+            option=orjson.OPT_UTC_Z,
+        )
+    )
+    if sample and row_count > len(sample):
+        # Each further row adds its encoding plus a separating comma
+        sample_size = len(orjson.dumps(sample, default=_default, option=orjson.OPT_UTC_Z))
+        size += round((sample_size - 1) / len(sample) * (row_count - len(sample)))
+    return size
+
+
+async def record_slow_query(
+    session: AsyncSession,
+    *,
+    connection_name: str,
+    database_type: str,
+    sql: str,
+    duration_ms: float,
+    row_count: int,
+    bytes_returned: int,
+) -> SlowQuery:
+    """Store a slow query execution.
+
+    Args:
+        session: Database session
+        connection_name: Connection the query ran on
+        database_type: Database type identifier (used for fingerprinting)
+        sql: Executed SQL
+        duration_ms: Execution time in milliseconds
+        row_count: Number of rows returned
+        bytes_returned: Size of the serialized result
+
+    Returns:
+        Stored SlowQuery instance
+    """
+    fingerprint, normalized_sql = fingerprint_sql(sql, database_type)
+    slow_query = SlowQuery(
+        connection_name=connection_name,
+        fingerprint=fingerprint,
+        normalized_sql=normalized_sql,
+        sql=sql,
+        duration_ms=duration_ms,
+        row_count=row_count,
+        bytes_returned=bytes_returned,
+    )
+    session.add(slow_query)
+    await session.commit()
+    return slow_query
+
+
+async def capture_plan(
+    session: AsyncSession,
+    slow_query_id: int,
+    url: str,
+    database_type: str,
+    sql: str,
+) -> None:
+    """Run EXPLAIN for a recorded slow query and attach the plan.
+
+    Args:
+        session: Database session
+        slow_query_id: ID of the SlowQuery row to update
+        url: Database connection URL
+        database_type: Database type identifier
+        sql: SQL to explain
+    """
+    values: dict[str, Any]
+    try:
+        adapter = get_adapter_factory().create(database_type)
+        plan = await adapter.explain_query(ConnectionInfo.from_url(url), sql)
+        values = {"plan_json": plan}
+    except Exception as e:
+        values = {"plan_error": str(e)}
+    await session.execute(
+        update(SlowQuery).where(SlowQuery.id == slow_query_id).values(**values)
+    )
+    await session.commit()
+
+
+async def _log_slow_query(
+    session_factory: async_sessionmaker,
+    url: str,
+    capture: bool,
+    **fields: Any,
+) -> None:
+    try:
+        async with session_factory() as session:
+            slow_query = await record_slow_query(session, **fields)
+            if capture:
+                await capture_plan(
+                    session,
+                    slow_query.id,
+                    url,
+                    fields["database_type"],
+                    fields["sql"],
+                )
+    except Exception as e:
+        logger.error(f"Failed to record slow query: {e}", exc_info=True)
+
+
+def schedule_slow_query_log(
+    *,
+    url: str,
+    connection_name: str,
+    database_type: str,
+    sql: str,
+    duration_ms: float,
+    row_count: int,
+    bytes_returned: int,
+    session_factory: async_sessionmaker | None = None,
+) -> asyncio.Task:
+    """Record a slow query (and its plan) in the background.
+
+    The task runs in a fresh context so its statements are not attributed
+    to the request that triggered it.
+
+    Returns:
+        The scheduled task
+    """
+    if session_factory is None:
+        from ..db import async_session_maker
+
+        session_factory = async_session_maker
+
+    logger.warning(
+        f"Slow query on {connection_name}: {duration_ms:.0f}ms, {row_count} rows"
+    )
+    task = asyncio.get_running_loop().create_task(
+        _log_slow_query(
+            session_factory,
+            url,
+            settings.slow_query_capture_plan,
+            connection_name=connection_name,
+            database_type=database_type,
+            sql=sql,
+            duration_ms=duration_ms,
+            row_count=row_count,
+            bytes_returned=bytes_returned,
+        ),
+        context=contextvars.Context(),
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def delete_slow_queries(session: AsyncSession, connection_name: str) -> None:
+    """Delete a connection's slow-query log (committed by the caller)."""
+    await session.execute(delete(SlowQuery).where(SlowQuery.connection_name == connection_name))
+
+
+async def aggregate_slow_queries(
+    session: AsyncSession, connection_name: str, limit: int = 20
+) -> list[dict[str, Any]]:
+    """Aggregate slow queries per fingerprint, most total time first.
+
+    Args:
+        session: Database session
+        connection_name: Connection name
+        limit: Maximum number of fingerprints to return
+
+    Returns:
+        List of per-fingerprint statistics with the latest sample and plan
+    """
+    total_duration = func.sum(SlowQuery.duration_ms)
+    stats_result = await session.execute(
+        select(
+            SlowQuery.fingerprint,
+            func.count(SlowQuery.id).label("calls"),
+            total_duration.label("total_duration_ms"),
+            func.avg(SlowQuery.duration_ms).label("mean_duration_ms"),
+            func.max(SlowQuery.duration_ms).label("max_duration_ms"),
+            func.sum(SlowQuery.row_count).label("total_rows"),
+            func.max(SlowQuery.bytes_returned).label("max_bytes_returned"),
+            func.max(SlowQuery.created_at).label("last_seen_at"),
+            func.max(SlowQuery.id).label("latest_id"),
+        )
+        .where(SlowQuery.connection_name == connection_name)
+        .group_by(SlowQuery.fingerprint)
+        .order_by(total_duration.desc())
+        .limit(limit)
+    )
+    stats = stats_result.all()
+    if not stats:
+        return []
+
+    latest_result = await session.execute(
+        select(SlowQuery).where(SlowQuery.id.in_([row.latest_id for row in stats]))
+    )
+    latest = {row.id: row for row in latest_result.scalars()}
+
+    aggregates = []
+    for row in stats:
+        sample = latest[row.latest_id]
+        aggregates.append(
+            {
+                "fingerprint": row.fingerprint,
+                "normalized_sql": sample.normalized_sql,
+                "sample_sql": sample.sql,
+                "calls": row.calls,
+                "total_duration_ms": round(row.total_duration_ms, 2),
+                "mean_duration_ms": round(row.mean_duration_ms, 2),
+                "max_duration_ms": round(row.max_duration_ms, 2),
+                "total_rows": row.total_rows,
+                "max_bytes_returned": row.max_bytes_returned,
+                "last_seen_at": row.last_seen_at,
+                "plan": json.loads(sample.plan_json) if sample.plan_json else None,
+                "plan_error": sample.plan_error,
+            }
+        )
+    return aggregates
@@ -4,10 +4,13 @@ This module has been refactored to use the DatabaseAdapter pattern for
 dialect detection, following the Dependency Inversion Principle.
 """
 
+import hashlib
+
 import sqlglot
 from sqlglot import exp
 
 from ..adapters import get_adapter_factory
+from ..instrumentation import statement_shape
 
 
 def validate_sql(sql: str, database_type: str = "postgresql") -> tuple[bool, str | None]:
@@ -90,6 +93,41 @@ def add_limit_if_needed(sql: str, database_type: str = "postgresql", default_lim
         return _fallback_add_limit(sql, default_limit)
 
 
+def cap_limit(sql: str, database_type: str = "postgresql", max_rows: int = 1000) -> str:
+    """Make sure a query returns at most ``max_rows`` rows.
+    
+    Unlike :func:`add_limit_if_needed`, an existing LIMIT larger than
+    ``max_rows`` (or one that is not a plain number) is lowered to it.
+    
+    Args:
+        sql: SQL query
+        database_type: Database type identifier
+        max_rows: Maximum number of rows
+        
+    Returns:
+        SQL query with a LIMIT of at most ``max_rows``
+    """
+    try:
+        factory = get_adapter_factory()
+        if not factory.is_supported(database_type):
+            return _fallback_add_limit(sql, max_rows)
+        
+        dialect = factory.create(database_type).sqlglot_dialect
+        parsed = sqlglot.parse_one(sql, dialect=dialect)
+        if parsed is None:
+            return _fallback_add_limit(sql, max_rows)
+        
+        limit = parsed.args.get("limit")
+        if limit is not None:
+            value = limit.expression
+            if isinstance(value, exp.Literal) and value.is_int and int(value.this) <= max_rows:
+                return sql
+        parsed.set("limit", exp.Limit(expression=exp.Literal.number(max_rows)))
+        return parsed.sql(dialect=dialect)
+    except Exception:
+        return _fallback_add_limit(sql, max_rows)
+
+
 def _fallback_add_limit(sql: str, default_limit: int) -> str:
     """Fallback method to add LIMIT using string manipulation.
     
@@ -104,3 +142,97 @@ def _fallback_add_limit(sql: str, default_limit: int) -> str:
     if "LIMIT" not in sql_upper:
         return f"{sql.rstrip(';')} LIMIT {default_limit}"
     return sql
+
+
+def normalize_sql(sql: str, database_type: str = "postgresql") -> str:
+    """Canonicalize formatting without changing what a query returns.
+    
+    Unlike ``fingerprint_sql`` literals are kept, so two queries normalize to
+    the same text only if they return the same result: it is regenerated by
+    sqlglot, which unifies whitespace and keyword case.
+    
+    Args:
+        sql: SQL query
+        database_type: Database type identifier
+        
+    Returns:
+        Normalized SQL
+    """
+    try:
+        factory = get_adapter_factory()
+        if not factory.is_supported(database_type):
+            raise ValueError(f"Unsupported database type: {database_type}")
+        dialect = factory.create(database_type).sqlglot_dialect
+        
+        parsed = sqlglot.parse_one(sql, dialect=dialect)
+        if parsed is None:
+            raise ValueError("Failed to parse SQL")
+        return parsed.sql(dialect=dialect)
+    except Exception:
+        return " ".join(sql.split()).rstrip(";")
+
+
+def fingerprint_sql(sql: str, database_type: str = "postgresql") -> tuple[str, str]:
+    """Compute a fingerprint that groups queries differing only in literals.
+    
+    Literals become placeholders and IN lists collapse to a single
+    placeholder, so ``WHERE id = 1`` and ``WHERE id IN (2, 3)`` style
+    variations of one query share a fingerprint (like pg_stat_statements).
+    
+    Args:
+        sql: SQL query
+        database_type: Database type identifier
+        
+    Returns:
+        Tuple of (fingerprint, normalized_sql)
+    """
+    try:
+        factory = get_adapter_factory()
+        if not factory.is_supported(database_type):
+            raise ValueError(f"Unsupported database type: {database_type}")
+        dialect = factory.create(database_type).sqlglot_dialect
+        
+        parsed = sqlglot.parse_one(sql, dialect=dialect)
+        if parsed is None:
+            raise ValueError("Failed to parse SQL")
+        
+        def _normalize(node: exp.Expression) -> exp.Expression:
+            if isinstance(node, exp.Literal):
+                return exp.Placeholder()
+            if isinstance(node, exp.In) and node.expressions:
+                node.set("expressions", [exp.Placeholder()])
+            return node
+        
+        normalized = parsed.transform(_normalize).sql(dialect=dialect, normalize=True)
+    except Exception:
+        # Unparseable SQL still gets a stable, literal-insensitive fingerprint
+        normalized = statement_shape(sql).rstrip(";").lower()
+    
+    fingerprint = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+    return fingerprint, normalized
+
+
+def row_limit_values(sql: str, database_type: str = "postgresql") -> tuple[str, ...]:
+    """The LIMIT / OFFSET / FETCH expressions of a query, which a fingerprint ignores.
+    
+    Queries sharing a fingerprint can still differ widely in the rows they
+    read when these differ (``LIMIT 10`` vs ``LIMIT 10000000``).
+    
+    Args:
+        sql: SQL query
+        database_type: Database type identifier
+        
+    Returns:
+        The expressions as SQL, in query order; the whole query if it cannot be parsed
+    """
+    try:
+        dialect = get_adapter_factory().create(database_type).sqlglot_dialect
+        parsed = sqlglot.parse_one(sql, dialect=dialect)
+        if parsed is None:
+            raise ValueError("Failed to parse SQL")
+        return tuple(
+            node.sql(dialect=dialect)
+            for node in parsed.find_all(exp.Limit, exp.Offset, exp.Fetch)
+        )
+    except Exception:
+        return (sql,)
@@ -0,0 +1,81 @@
+"""Metadata response size benchmark: plain JSON vs stored gzip / zstd blobs.
+
+Builds a synthetic metadata snapshot (``--tables`` tables of ``--columns``
+columns each) and reports the size of the ``GET /api/v1/dbs/{name}`` body as
+it used to be sent (``json.dumps`` with default separators), rendered
+compactly, and compressed the way it is stored in ``meta_snapshot_blobs``,
+together with the one-off compression time. zstd is skipped when
+``zstandard`` is not installed.
+
+Usage:
+    uv run --extra zstd python benchmarks/bench_metadata_compression.py --tables 2000 --columns 50
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas import MetadataResponse  # noqa: E402
+from app.services import metadata  # noqa: E402
+
+TYPES = ["integer", "bigint", "text", "character varying", "timestamp with time zone", "numeric", "boolean"]
+
+
+def make_snapshot(tables: int, columns: int) -> dict:
+    return {
+        "tables": [
+            {
+                "name": f"schema_{t % 20}.table_{t}",
+                "type": "table" if t % 10 else "view",
+                "columns": [
+                    {
+                        "name": "id" if c == 0 else f"column_{c}_of_table_{t}",
+                        "type": TYPES[(t + c) % len(TYPES)],
+                        "nullable": c % 3 != 0,
+                        "default": f"nextval('table_{t}_id_seq'::regclass)" if c == 0 else None,
+                    }
+                    for c in range(columns)
+                ],
+            }
+            for t in range(tables)
+        ]
+    }
+
+
+def report(name: str, size: int, baseline: int, ms: float | None = None) -> None:
+    timing = f" compress={ms:8.1f}ms" if ms is not None else ""
+    print(f"{name:<14} bytes={size:>12,} ratio={baseline / size:6.1f}x{timing}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=50)
+    args = parser.parse_args()
+
+    snapshot = make_snapshot(args.tables, args.columns)
+    print(f"tables={args.tables} columns={args.tables * args.columns:,}")
+    legacy = json.dumps({"name": "db", "metadata": snapshot}).encode()
+    body = MetadataResponse(name="db", metadata=snapshot).model_dump_json(by_alias=True).encode()
+    report("json (spaced)", len(legacy), len(legacy))
+    report("json (compact)", len(body), len(legacy))
+
+    encoded = metadata._compress_snapshot(body)
+    start = time.perf_counter()
+    gzip.compress(body, compresslevel=9, mtime=0)
+    report("gzip", len(encoded["gzip"]), len(legacy), (time.perf_counter() - start) * 1000)
+    if metadata.zstandard is None:
+        print("zstd           skipped (zstandard not installed)")
+        return
+    start = time.perf_counter()
+    metadata.zstandard.ZstdCompressor(level=19).compress(body)
+    report("zstd", len(encoded["zstd"]), len(legacy), (time.perf_counter() - start) * 1000)
+
+
+if __name__ == "__main__":
+    main()
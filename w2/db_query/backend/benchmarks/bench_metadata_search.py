@@ -0,0 +1,57 @@
+"""Metadata search benchmark: index build time and search latency.
+
+Builds a :class:`~app.services.metadata_search.MetadataSearchIndex` over a
+synthetic metadata snapshot (``--tables`` tables of ``--columns`` columns
+each) and reports the build time and the mean / worst latency of
+``GET /api/v1/dbs/{name}/search`` queries of each kind: short prefixes,
+exact names, word prefixes, substrings, dotted names, misses, and the same
+with a kind filter.
+
+Usage:
+    uv run python benchmarks/bench_metadata_search.py --tables 2000 --columns 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.metadata_search import MetadataSearchIndex  # noqa: E402
+from bench_metadata_compression import make_snapshot  # noqa: E402
+
+QUERIES = [
+    "i", "id", "col", "column_4", "table_19", "of_table_1999", "umn_4",
+    "schema_3.table_3", "table_7.id", "column_49_of_table_1999", "xyz",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    snapshot = make_snapshot(args.tables, args.columns)
+    start = time.perf_counter()
+    index = MetadataSearchIndex.from_snapshot(snapshot)
+    print(f"names={len(index):,} build={(time.perf_counter() - start) * 1000:.0f}ms")
+
+    worst = 0.0
+    for kinds in (None, ["table"], ["schema", "column"]):
+        for query in QUERIES:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                hits = index.search(query, args.limit, kinds)
+            ms = (time.perf_counter() - start) * 1000 / args.repeat
+            worst = max(worst, ms)
+            label = f"{query} [{','.join(kinds)}]" if kinds else query
+            print(f"{label:<40} hits={len(hits):>3} mean={ms:7.3f}ms")
+    print(f"worst mean latency: {worst:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Query result benchmark: row lists + to_dict() vs ColumnarResult.
+
+Builds a synthetic result from driver-style row tuples (int, float, text,
+numeric, timestamp columns) and compares, per path:
+
+- memory retained by the result once the driver's records are dropped (tracemalloc)
+- time to build the result and encode the camelCase JSON response
+
+The row-list path is what the adapters did before: one list per row,
+``QueryResult.to_dict()``, ``SqlQueryResponse`` validation and JSON encoding.
+
+Usage:
+    uv run python benchmarks/bench_query_result.py --rows 1000 --int-columns 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.adapters import ColumnarResult, QueryResult  # noqa: E402
+from app.schemas import SqlQueryResponse  # noqa: E402
+
+
+def make_records(rows: int, int_columns: int) -> tuple[list[str], list[tuple]]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    columns = [f"i{c}" for c in range(int_columns)] + ["price", "name", "amount", "created_at"]
+    records = [
+        tuple(r * c for c in range(int_columns))
+        + (r / 3, f"customer-{r}", Decimal(r) / 100, start + timedelta(seconds=r))
+        for r in range(rows)
+    ]
+    return columns, records
+
+
+def row_list_path(columns: list[str], records: list[tuple]) -> bytes:
+    result = QueryResult(columns=columns, rows=[list(r) for r in records], row_count=len(records))
+    response = SqlQueryResponse(**result.to_dict())
+    return response.model_dump_json(by_alias=True).encode()
+
+
+def columnar_path(columns: list[str], records: list[tuple]) -> bytes:
+    return ColumnarResult.from_records(columns, records).to_json(queryId=None)
+
+
+def retained_bytes(build, rows: int, int_columns: int) -> int:
+    """Memory still held by a result once the driver's records are gone."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    columns, records = make_records(rows, int_columns)
+    result = build(columns, records)
+    del records
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def measure(name: str, fn, columns: list[str], records: list[tuple], rounds: int, memory: int) -> None:
+    for _ in range(min(5, rounds)):
+        fn(columns, records)
+    samples = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = fn(columns, records)
+        samples.append((time.perf_counter() - start) * 1000)
+        size = len(body)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"{name:<9} mean={statistics.mean(samples):7.2f}ms "
+        f"p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms "
+        f"bytes={size} retained={memory / 1024:,.0f}KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--int-columns", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    columns, records = make_records(args.rows, args.int_columns)
+    print(f"rows={args.rows} columns={len(columns)} rounds={args.rounds}")
+    row_memory = retained_bytes(
+        lambda cols, recs: QueryResult(cols, [list(r) for r in recs], len(recs)),
+        args.rows,
+        args.int_columns,
+    )
+    columnar_memory = retained_bytes(ColumnarResult.from_records, args.rows, args.int_columns)
+    measure("row-list", row_list_path, columns, records, args.rounds, row_memory)
+    measure("columnar", columnar_path, columns, records, args.rounds, columnar_memory)
+
+
+if __name__ == "__main__":
+    main()
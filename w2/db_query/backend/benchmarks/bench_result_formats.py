@@ -0,0 +1,63 @@
+"""Query result format benchmark: JSON vs Arrow IPC stream vs MessagePack.
+
+Encodes the same synthetic ``ColumnarResult`` (int, float, text, numeric,
+timestamp columns) in each response format the query endpoint can negotiate
+and reports encode time and body size. Formats whose optional package
+(``pyarrow``, ``msgpack``) is not installed are skipped.
+
+Usage:
+    uv run --extra formats python benchmarks/bench_result_formats.py --rows 20000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.adapters import ColumnarResult  # noqa: E402
+from app.services import result_formats  # noqa: E402
+from benchmarks.bench_query_result import make_records  # noqa: E402
+
+
+def measure(name: str, fn, result: ColumnarResult, rounds: int) -> None:
+    for _ in range(min(5, rounds)):
+        fn(result)
+    samples = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = fn(result)
+        samples.append((time.perf_counter() - start) * 1000)
+        size = len(body)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"{name:<8} mean={statistics.mean(samples):7.2f}ms "
+        f"p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms "
+        f"bytes={size:,}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--int-columns", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    columns, records = make_records(args.rows, args.int_columns)
+    result = ColumnarResult.from_records(columns, records)
+    print(f"rows={args.rows} columns={len(columns)} rounds={args.rounds}")
+    measure("json", lambda r: r.to_json(queryId="q"), result, args.rounds)
+    for media_type, name in ((result_formats.ARROW_STREAM, "arrow"), (result_formats.MSGPACK, "msgpack")):
+        if media_type not in result_formats.available_formats():
+            print(f"{name:<8} skipped (package not installed)")
+            continue
+        measure(name, lambda r, m=media_type: result_formats.encode_result(m, r, "q"), result, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,14 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 
 # Set environment variable before importing app modules
 os.environ.setdefault("DeepSeek_API_KEY", "test_key")
+# Fail tests when a route executes more SQL statements than its declared budget
+os.environ.setdefault("QUERY_BUDGET_ENFORCED", "true")
 
-from app.db import Base
+from fastapi.testclient import TestClient
+
+from app.db import Base, get_session
+from app.instrumentation import instrument_engine
+from app.main import app
 
 
 @pytest.fixture
@@ -21,6 +27,8 @@ async def test_db_session():
     database_url = f"sqlite+aiosqlite:///{db_path}"
     
     engine = create_async_engine(database_url, echo=False)
+    # Count statements so routes are held to their query budgets
+    instrument_engine(engine)
     async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     
     # Create tables
@@ -40,6 +48,16 @@ async def test_db_session():
     shutil.rmtree(temp_dir)
 
 
+@pytest.fixture
+def client(test_db_session):
+    """Create a test client with mocked database session."""
+    app.dependency_overrides[get_session] = lambda: test_db_session
+
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+
+
 @pytest.fixture
 def sample_postgres_url():
     """Sample PostgreSQL connection URL for testing."""
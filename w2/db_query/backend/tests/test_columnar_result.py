@@ -0,0 +1,77 @@
+"""Tests for the column-oriented query result."""
+import uuid
+from array import array
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import orjson
+from asyncpg import Range
+
+from app.adapters import ColumnarResult
+from app.schemas import SqlQueryResponse
+
+
+class TestColumnarResult:
+    """Test building, reading and encoding columnar results."""
+
+    def test_numeric_columns_are_typed_arrays(self):
+        """Test that only NULL-free int/float columns are packed into arrays."""
+        records = [(1, 1.5, None, True, 2**70, "a"), (2, 2.5, 3, False, 1, "b")]
+        result = ColumnarResult.from_records(["i", "f", "nullable", "flag", "big", "s"], records)
+
+        assert isinstance(result.column("i"), array) or hasattr(result.column("i"), "dtype")
+        assert isinstance(result.column("f"), array) or hasattr(result.column("f"), "dtype")
+        assert result.column("nullable") == (None, 3)
+        assert result.column("flag") == (True, False)
+        assert result.column("big") == (2**70, 1)
+        assert result.rows == [list(r) for r in records]
+        assert type(result.rows[0][0]) is int
+
+    def test_mapping_matches_query_result_dict(self):
+        """Test that the result can be used where the to_dict() form was expected."""
+        result = ColumnarResult.from_records(["id", "name"], [(1, "a"), (2, "b")])
+
+        assert result == {"columns": ["id", "name"], "rows": [[1, "a"], [2, "b"]], "row_count": 2}
+        assert SqlQueryResponse(**result).rows == [[1, "a"], [2, "b"]]
+        assert ColumnarResult.from_records([], []).to_dict() == {"columns": [], "rows": [], "row_count": 0}
+
+    def test_to_json_matches_response_model(self):
+        """Test that direct encoding is byte-identical to the SqlQueryResponse JSON."""
+        records = [
+            (
+                1,
+                0.1,
+                Decimal("1.50"),
+                datetime(2024, 1, 1, tzinfo=timezone.utc),
+                datetime(2024, 1, 1, 1, 2, 3, 4500, tzinfo=timezone(timedelta(hours=2))),
+                date(2024, 1, 2),
+                uuid.UUID("12345678-1234-5678-1234-567812345678"),
+                "naïve ✓",
+                None,
+                b"bytes",
+                [Decimal("1.5"), None],
+                [[1, 2], [3, 4]],
+                datetime(2024, 1, 1, 12, 30),
+                time(8, 15, 30),
+                timedelta(days=1, seconds=5),
+                float("nan"),
+            )
+        ]
+        columns = [f"c{i}" for i in range(len(records[0]))]
+        result = ColumnarResult.from_records(columns, records)
+
+        expected = SqlQueryResponse(**result.to_dict(), query_id="q1").model_dump_json(by_alias=True)
+        assert result.to_json(queryId="q1") == expected.encode()
+
+    def test_to_json_encodes_ranges_and_binary(self):
+        """Test values the response model cannot serialize."""
+        records = [(Range(1, 10), Range(empty=True), b"\x00\xff")]
+        result = ColumnarResult.from_records(["r", "empty", "blob"], records)
+
+        assert orjson.loads(result.to_json())["rows"] == [
+            [
+                {"lower": 1, "upper": 10, "lowerInc": True, "upperInc": False, "isEmpty": False},
+                {"lower": None, "upper": None, "lowerInc": False, "upperInc": False, "isEmpty": True},
+                "\\x00ff",
+            ]
+        ]
@@ -0,0 +1,48 @@
+"""Tests for the in-process event bus."""
+import pytest
+
+from app.adapters import QueryEstimate
+from app.services.cost_guard import estimate_cache
+from app.services.events import EventBus, event_bus
+from app.services.metadata import METADATA_CHANGED, MetadataChanged
+
+
+class TestEventBus:
+    """Test publishing events to subscribed handlers."""
+
+    @pytest.mark.asyncio
+    async def test_publish(self):
+        """Test sync and async handlers, failing handlers and unsubscribing."""
+        bus = EventBus()
+        received = []
+
+        async def async_handler(event):
+            received.append(("async", event))
+
+        def failing_handler(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe("topic", failing_handler)
+        unsubscribe = bus.subscribe("topic", lambda event: received.append(("sync", event)))
+        bus.subscribe("topic", async_handler)
+        bus.subscribe("other", lambda event: received.append(("other", event)))
+
+        await bus.publish("topic", 1)
+        unsubscribe()
+        await bus.publish("topic", 2)
+
+        assert received == [("sync", 1), ("async", 1), ("async", 2)]
+
+    @pytest.mark.asyncio
+    async def test_metadata_change_invalidates_estimates(self):
+        """Test that dropped or altered tables drop the connection's cost estimates."""
+        estimate = QueryEstimate(cost=1.0, rows=1.0)
+        estimate_cache.put(("events_db", "fp"), estimate)
+
+        added = {"tables_added": ["public.t"], "tables_dropped": [], "tables_altered": []}
+        await event_bus.publish(METADATA_CHANGED, MetadataChanged("events_db", 1, 2, added))
+        assert estimate_cache.get(("events_db", "fp")) is estimate
+
+        dropped = {**added, "tables_dropped": ["public.old"]}
+        await event_bus.publish(METADATA_CHANGED, MetadataChanged("events_db", 2, 3, dropped))
+        assert estimate_cache.get(("events_db", "fp")) is None
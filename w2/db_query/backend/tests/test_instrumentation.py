@@ -0,0 +1,166 @@
+"""Tests for per-request SQL instrumentation."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.adapters.instrumented import InstrumentedConnection, InstrumentedCursor
+from app.config import settings
+from app.instrumentation import (
+    APP_DB,
+    TARGET_DB,
+    QueryBudgetExceeded,
+    QueryStats,
+    begin_request,
+    budget_exempt,
+    end_request,
+    instrument_engine,
+    query_budget,
+    query_stats_middleware,
+    statement_shape,
+)
+from app.main import app
+
+
+class TestStatementShape:
+    """Test statement normalization used for N+1 detection."""
+
+    def test_literals_and_params_are_replaced(self):
+        """Test that literals and bind markers normalize to the same shape."""
+        assert statement_shape("SELECT * FROM t WHERE id = 1 AND name = 'a'") == (
+            "SELECT * FROM t WHERE id = ? AND name = ?"
+        )
+        assert statement_shape("SELECT *\n  FROM t WHERE id = $1") == (
+            "SELECT * FROM t WHERE id = ?"
+        )
+        assert statement_shape("SELECT * FROM t WHERE id IN (%s, %s, %s)") == (
+            "SELECT * FROM t WHERE id IN (?)"
+        )
+
+    def test_repeated_shapes(self):
+        """Test that repeated statements are reported per source."""
+        stats = QueryStats()
+        for table_id in range(5):
+            stats.record(TARGET_DB, f"SELECT * FROM columns WHERE table_id = {table_id}", 1.0)
+        stats.record(APP_DB, "SELECT 1", 0.5)
+
+        assert stats.count == 6
+        assert stats.repeated(5) == {f"{TARGET_DB}: SELECT * FROM columns WHERE table_id = ?": 5}
+        assert stats.server_timing() == (
+            'appdb;dur=0.50;desc="1 queries", targetdb;dur=5.00;desc="5 queries"'
+        )
+
+
+class TestDriverWrappers:
+    """Test the instrumented asyncpg/aiomysql proxies."""
+
+    @pytest.mark.asyncio
+    async def test_asyncpg_connection_is_counted(self):
+        """Test that statements on a wrapped asyncpg connection are recorded."""
+        raw = MagicMock()
+        raw.fetch = AsyncMock(return_value=[])
+        raw.close = AsyncMock()
+        conn = InstrumentedConnection(raw)
+
+        stats, token = begin_request()
+        try:
+            await conn.fetch("SELECT 1")
+            await conn.fetch("SELECT 2")
+            await conn.close()
+        finally:
+            end_request(token)
+
+        assert stats.counts[TARGET_DB] == 2
+        raw.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_aiomysql_cursor_is_counted(self):
+        """Test that statements on a wrapped aiomysql cursor are recorded."""
+        raw = MagicMock()
+        raw.execute = AsyncMock(return_value=1)
+        raw.fetchall = AsyncMock(return_value=[])
+        cur = InstrumentedCursor(raw)
+
+        stats, token = begin_request()
+        try:
+            await cur.execute("SELECT * FROM t WHERE id = %s", (1,))
+            assert await cur.fetchall() == []
+        finally:
+            end_request(token)
+
+        assert stats.counts[TARGET_DB] == 1
+        raw.execute.assert_awaited_once_with("SELECT * FROM t WHERE id = %s", (1,))
+
+    @pytest.mark.asyncio
+    async def test_no_request_context(self):
+        """Test that wrappers work outside of a request without recording."""
+        raw = MagicMock()
+        raw.fetchval = AsyncMock(return_value=1)
+        assert await InstrumentedConnection(raw).fetchval("SELECT 1") == 1
+
+
+class TestQueryBudget:
+    """Test Server-Timing reporting and query budgets."""
+
+    def test_server_timing_header(self, test_db_session):
+        """Test that app database queries are reported in Server-Timing."""
+        from app.db import get_session
+
+        instrument_engine(test_db_session.bind)
+        app.dependency_overrides[get_session] = lambda: test_db_session
+        try:
+            response = TestClient(app).get("/api/v1/dbs")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.headers["server-timing"].startswith("appdb;dur=")
+        assert 'desc="1 queries"' in response.headers["server-timing"]
+
+    def test_budget_exceeded_fails_in_test_mode(self, monkeypatch):
+        """Test that exceeding the budget raises when enforcement is on."""
+        monkeypatch.setattr(settings, "query_budget_enforced", True)
+        raw = MagicMock()
+        raw.fetch = AsyncMock(return_value=[])
+
+        budget_app = FastAPI()
+        budget_app.middleware("http")(query_stats_middleware)
+
+        @budget_app.get("/columns", dependencies=[Depends(query_budget(1))])
+        async def columns() -> dict:
+            conn = InstrumentedConnection(raw)
+            for table in ("a", "b"):
+                await conn.fetch(f"SELECT * FROM columns WHERE table_name = '{table}'")
+            return {}
+
+        with pytest.raises(QueryBudgetExceeded, match="executed 2 queries"):
+            TestClient(budget_app).get("/columns")
+
+        monkeypatch.setattr(settings, "query_budget_enforced", False)
+        response = TestClient(budget_app).get("/columns")
+        assert response.status_code == 200
+        assert response.headers["server-timing"].startswith("targetdb;dur=")
+        assert 'desc="2 queries"' in response.headers["server-timing"]
+
+    def test_budget_exempt_statements(self, monkeypatch):
+        """Test that exempt statements are reported but not held to the budget."""
+        monkeypatch.setattr(settings, "query_budget_enforced", True)
+        raw = MagicMock()
+        raw.fetch = AsyncMock(return_value=[])
+
+        budget_app = FastAPI()
+        budget_app.middleware("http")(query_stats_middleware)
+
+        @budget_app.get("/migrate", dependencies=[Depends(query_budget(1))])
+        async def migrate() -> dict:
+            conn = InstrumentedConnection(raw)
+            with budget_exempt():
+                await conn.fetch("UPDATE legacy SET migrated = true")
+                await conn.fetch("DELETE FROM legacy")
+            await conn.fetch("SELECT * FROM tables")
+            return {}
+
+        response = TestClient(budget_app).get("/migrate")
+        assert response.status_code == 200
+        assert 'desc="3 queries"' in response.headers["server-timing"]
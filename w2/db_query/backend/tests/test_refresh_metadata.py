@@ -104,8 +104,8 @@ class TestRefreshMetadata:
                 assert metadata_obj is not None
                 assert metadata_obj.connection_name == "test_db"
                 # Should use raw metadata format
-                import json
-                stored_metadata = json.loads(metadata_obj.metadata_json)
+                from app.services.metadata import load_metadata
+                stored_metadata = await load_metadata(test_db_session, "test_db")
                 assert "tables" in stored_metadata
                 assert len(stored_metadata["tables"]) > 0
 
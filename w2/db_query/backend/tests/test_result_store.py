@@ -0,0 +1,131 @@
+"""Tests for materialized query results and the spill store."""
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.services.result_store import (
+    ROW_GROUP_ROWS,
+    MaterializedResult,
+    ResultEvictedError,
+    ResultStore,
+    SpillBudgetError,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Spill store in a temporary directory with a generous budget."""
+    store = ResultStore(directory=tmp_path, budget_bytes=64 * 1024 * 1024)
+    yield store
+    store.clear()
+
+
+def _rows(start: int, stop: int) -> list[list]:
+    return [
+        [i, i / 2, None if i % 7 == 0 else f"name-{i}", Decimal(f"{i % 13}.5")]
+        for i in range(start, stop)
+    ]
+
+
+class TestMaterializedResult:
+    """Test in-memory and spilled results."""
+
+    @pytest.mark.asyncio
+    async def test_small_result_stays_in_memory(self, store, tmp_path):
+        """Test that results below the threshold are not written to disk."""
+        result = MaterializedResult(["id", "half", "name", "amount"], store, spill_threshold_bytes=1 << 20)
+        result.append(_rows(0, 100))
+        result.finish()
+
+        await result.wait_for()
+        assert not result.spilled
+        assert list(tmp_path.iterdir()) == []
+        assert result.read(10, 2) == _rows(10, 12)
+
+    @pytest.mark.asyncio
+    async def test_spilled_result_reads_across_row_groups(self, store, tmp_path):
+        """Test that spilled rows read back with NULLs, in JSON form where not numeric."""
+        result = MaterializedResult(["id", "half", "name", "amount"], store, spill_threshold_bytes=1024)
+        total = 2 * ROW_GROUP_ROWS + 10
+        for start in range(0, total, 1000):
+            result.append(_rows(start, min(start + 1000, total)))
+        result.finish()
+
+        assert result.spilled
+        assert result.row_count == total
+        assert len(list(tmp_path.iterdir())) == 1
+        # A page spanning the first row group boundary, from the file
+        page = result.read(ROW_GROUP_ROWS - 1, 3)
+        assert [row[0] for row in page] == [ROW_GROUP_ROWS - 1, ROW_GROUP_ROWS, ROW_GROUP_ROWS + 1]
+        assert page[1][1] == ROW_GROUP_ROWS / 2
+        assert page[0][3] == f"{(ROW_GROUP_ROWS - 1) % 13}.5"
+        assert result.read(7, 1)[0][2] is None
+        # The tail not yet in a row group is still in memory
+        assert result.read(total - 2, 5) == _rows(total - 2, total)
+
+        result.discard()
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_sort_order(self, store):
+        """Test sorting spilled results by numeric and decimal columns, NULLs last."""
+        result = MaterializedResult(["id", "half", "name", "amount"], store, spill_threshold_bytes=1024)
+        result.append(_rows(0, ROW_GROUP_ROWS + 100))
+        result.finish()
+
+        order = result.sort_order("id", descending=True)
+        assert [row[0] for row in result.read(0, 2, order)] == [ROW_GROUP_ROWS + 99, ROW_GROUP_ROWS + 98]
+
+        order = result.sort_order("amount", descending=True)
+        # Spilled decimals are compared as numbers, not as their JSON strings
+        assert {Decimal(row[3]) for row in result.read(0, 5, order)} == {Decimal("12.5")}
+
+        order = result.sort_order("name")
+        assert result.read(len(order) - 1, 1, order)[0][2] is None
+        with pytest.raises(KeyError):
+            result.sort_order("missing")
+
+
+    @pytest.mark.asyncio
+    async def test_sort_across_spill_boundary(self, store):
+        """Test that spilled and in-memory timestamps sort together."""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        stamps = [start + timedelta(minutes=i) for i in range(ROW_GROUP_ROWS + 904)]
+        random.Random(7).shuffle(stamps)
+        result = MaterializedResult(["at"], store, spill_threshold_bytes=1024)
+        result.append([[stamp] for stamp in stamps])
+        result.finish()
+
+        order = result.sort_order("at")
+        ordered = [datetime.fromisoformat(str(row[0])) for row in result.read(0, len(order), order)]
+        assert ordered == sorted(stamps)
+
+
+class TestResultStore:
+    """Test the spill disk budget."""
+
+    def test_lru_eviction_and_truncation(self, tmp_path):
+        """Test that finished results are evicted oldest first, and oversized ones truncated."""
+        store = ResultStore(directory=tmp_path, budget_bytes=300_000)
+        first = MaterializedResult(["id", "half", "name", "amount"], store, spill_threshold_bytes=0)
+        first.append(_rows(0, ROW_GROUP_ROWS))
+        first.finish()
+        second = MaterializedResult(["id", "half", "name", "amount"], store, spill_threshold_bytes=0)
+        second.append(_rows(0, ROW_GROUP_ROWS))
+        second.finish()
+        first.read(0, 1)
+
+        third = MaterializedResult(["id", "half", "name", "amount"], store, spill_threshold_bytes=0)
+        third.append(_rows(0, ROW_GROUP_ROWS))
+        assert store.evictions == 1
+        with pytest.raises(ResultEvictedError):
+            second.read(0, 1)
+        assert first.read(0, 1)[0][:3] == [0, 0.0, None]
+
+        with pytest.raises(SpillBudgetError):
+            third.append(_rows(0, 3 * ROW_GROUP_ROWS))
+        assert third.truncated
+        store.clear()
+        assert list(tmp_path.iterdir()) == []
@@ -3,26 +3,10 @@ import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi.testclient import TestClient
 
-from app.main import app
 from app.models import DatabaseConnection, DatabaseMetadata
 
 
-@pytest.fixture
-def client(test_db_session):
-    """Create a test client with mocked database session."""
-    def override_get_session():
-        return test_db_session
-    
-    from app.db import get_session
-    app.dependency_overrides[get_session] = override_get_session
-    
-    yield TestClient(app)
-    
-    app.dependency_overrides.clear()
-
-
 class TestEdgeCases:
     """Test edge cases and error scenarios."""
 
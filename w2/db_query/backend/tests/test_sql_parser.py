@@ -1,7 +1,7 @@
 """Tests for SQL parser and validation services."""
 import pytest
 
-from app.services.sql_parser import add_limit_if_needed, validate_sql
+from app.services.sql_parser import add_limit_if_needed, cap_limit, validate_sql
 
 
 class TestValidateSql:
@@ -179,3 +179,19 @@ class TestAddLimitIfNeeded:
         assert isinstance(result, str)
         assert len(result) > 0
 
+
+class TestCapLimit:
+    """Test capping the rows a query returns."""
+
+    def test_add_limit_when_missing(self):
+        """Test that a query without LIMIT gets the cap."""
+        assert cap_limit("SELECT * FROM users", max_rows=100) == "SELECT * FROM users LIMIT 100"
+
+    def test_keep_smaller_limit(self):
+        """Test that a LIMIT within the cap is kept."""
+        sql = "SELECT * FROM users LIMIT 10 OFFSET 5"
+        assert cap_limit(sql, max_rows=100) == sql
+
+    def test_lower_larger_limit(self):
+        """Test that a LIMIT above the cap is lowered to it."""
+        assert cap_limit("SELECT * FROM users LIMIT 5000", "mysql", max_rows=100) == "SELECT * FROM users LIMIT 100"
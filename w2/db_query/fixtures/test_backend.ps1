@@ -75,7 +75,7 @@ try {
     Write-Host "   Status: $($response.StatusCode)" -ForegroundColor Green
     $content = $response.Content | ConvertFrom-Json
     Write-Host "   Database: $($content.name)" -ForegroundColor Cyan
-    Write-Host "   Metadata keys: $($content.metadata.PSObject.Properties.Name -join ', ')" -ForegroundColor Cyan
+    Write-Host "   Refresh job: $($content.jobId) ($($content.status))" -ForegroundColor Cyan
 } catch {
     Write-Host "   ERROR: $_" -ForegroundColor Red
     if ($_.Exception.Response) {
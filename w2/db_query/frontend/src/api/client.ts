@@ -4,7 +4,11 @@ import type {
   DatabaseConnection,
   DatabaseListResponse,
   DatabaseConnectionRequest,
+  MetadataDiffResponse,
   MetadataResponse,
+  MetadataSearchHit,
+  MetadataSearchResponse,
+  RefreshJob,
   SqlQueryRequest,
   SqlQueryResponse,
   NaturalLanguageQueryRequest,
@@ -66,13 +70,65 @@ class ApiClient {
     return response.data
   }
 
-  async refreshDatabaseMetadata(name: string): Promise<MetadataResponse> {
-    const response = await this.client.post<MetadataResponse>(
-      `/dbs/${name}/refresh`
+  async getMetadataDiff(
+    name: string,
+    since?: number
+  ): Promise<MetadataDiffResponse> {
+    const response = await this.client.get<MetadataDiffResponse>(
+      `/dbs/${name}/metadata/diff`,
+      { params: since !== undefined ? { since } : undefined }
+    )
+    return response.data
+  }
+
+  async searchDatabaseMetadata(
+    name: string,
+    q: string,
+    options: { kind?: Array<MetadataSearchHit['kind']>; limit?: number } = {}
+  ): Promise<MetadataSearchResponse> {
+    const response = await this.client.get<MetadataSearchResponse>(
+      `/dbs/${name}/search`,
+      {
+        params: { q, ...options },
+        // kind=table&kind=column
+        paramsSerializer: { indexes: null },
+      }
+    )
+    return response.data
+  }
+
+  async refreshDatabaseMetadata(name: string, full = false): Promise<RefreshJob> {
+    const response = await this.client.post<RefreshJob>(
+      `/dbs/${name}/refresh`,
+      undefined,
+      { params: full ? { full: true } : undefined }
     )
     return response.data
   }
 
+  /** Follow a refresh job; the source closes itself after the last event. */
+  refreshJobEvents(
+    name: string,
+    jobId: string,
+    onEvent: (job: RefreshJob) => void
+  ): EventSource {
+    const source = new EventSource(
+      `${API_BASE_URL}/dbs/${name}/refresh/${jobId}/events`
+    )
+    const handle = (event: MessageEvent) => onEvent(JSON.parse(event.data))
+    source.addEventListener('progress', handle)
+    for (const type of ['done', 'error']) {
+      source.addEventListener(type, (event) => {
+        // Native 'error' events (lost connection) carry no data
+        if (event instanceof MessageEvent && event.data) {
+          handle(event)
+          source.close()
+        }
+      })
+    }
+    return source
+  }
+
   async queryDatabase(
     name: string,
     request: SqlQueryRequest
@@ -44,6 +44,65 @@ export interface MetadataResponse {
       rowCount?: number
     }>
   }
+  version?: number | null
+  changedAt?: string | null
+}
+
+export interface RefreshJob {
+  jobId: string
+  name: string
+  full: boolean
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  phase: string
+  tablesTotal: number | null
+  tablesDone: number
+  llmChunksTotal: number | null
+  llmChunksDone: number
+  version: number | null
+  error: string | null
+  createdAt: string
+  finishedAt: string | null
+}
+
+export interface MetadataTableDiff {
+  name: string
+  changes: Record<string, { from: unknown; to: unknown }>
+  columnsAdded: string[]
+  columnsDropped: string[]
+  columnsAltered: Array<{
+    name: string
+    changes: Record<string, { from: unknown; to: unknown }>
+  }>
+}
+
+export interface MetadataDiffResponse {
+  name: string
+  version: number
+  complete: boolean
+  diffs: Array<{
+    fromVersion: number
+    toVersion: number
+    createdAt: string
+    tablesAdded: string[]
+    tablesDropped: string[]
+    tablesAltered: MetadataTableDiff[]
+  }>
+}
+
+export interface MetadataSearchHit {
+  kind: 'schema' | 'table' | 'column'
+  schema: string
+  table: string | null
+  column: string | null
+  type: string | null
+  match: 'exact' | 'prefix' | 'word' | 'substring'
+}
+
+export interface MetadataSearchResponse {
+  name: string
+  query: string
+  version: number
+  results: MetadataSearchHit[]
 }
 
 export interface SqlQueryRequest {